@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+测量模块导入时间
+每次都在全新的解释器进程中导入，得到真实的冷启动开销，并检查是否拉入了pygame
+用法: python3 measure_import.py [模块名 ...] [-n 次数]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+_SNIPPET = (
+    "import sys, time\n"
+    "t = time.perf_counter()\n"
+    "import {module}\n"
+    "print(time.perf_counter() - t, 'pygame' in sys.modules)\n"
+)
+
+
+def measure(module, runs=10):
+    """返回 (导入耗时列表(秒), 是否导入了pygame)"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    timings = []
+    loaded_pygame = False
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _SNIPPET.format(module=module)],
+            cwd=script_dir, stdout=subprocess.PIPE, universal_newlines=True, check=True,
+        ).stdout.splitlines()[-1].split()
+        timings.append(float(output[0]))
+        loaded_pygame = loaded_pygame or output[1] == "True"
+    return timings, loaded_pygame
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="测量模块的冷启动导入时间")
+    parser.add_argument("modules", nargs="*", default=["tetris_core", "tetris"])
+    parser.add_argument("-n", "--runs", type=int, default=10, help="每个模块测量的次数")
+    args = parser.parse_args(argv)
+
+    for module in args.modules:
+        timings, loaded_pygame = measure(module, args.runs)
+        print(f"{module:<16} 中位数 {statistics.median(timings) * 1000:7.2f} ms  "
+              f"最小 {min(timings) * 1000:7.2f} ms  "
+              f"pygame: {'是' if loaded_pygame else '否'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,17 +4,41 @@
 运行此脚本来开始游戏
 """
 
+import time
+
+# 启动计时的起点，越早越好
+_STARTED = time.perf_counter()
+
+import argparse
 import os
 import sys
 
 def main():
+    parser = argparse.ArgumentParser(description="启动俄罗斯方块游戏")
+    parser.add_argument("--ai", action="store_true", help="启动时直接开启自动演示")
+    parser.add_argument("--uncapped", action="store_true", help="不限制渲染帧率")
+    parser.add_argument("--profile", action="store_true", help="统计每帧各阶段耗时，按 F3 显示")
+    parser.add_argument("--trace", metavar="FILE", help="退出时把帧耗时轨迹写入 .json 或 .csv 文件")
+    parser.add_argument("--das", type=float, default=250, help="左右键按住多久后开始自动移动（毫秒）")
+    parser.add_argument("--arr", type=float, default=50, help="自动移动的间隔（毫秒），0 为直接移到墙边")
+    parser.add_argument("--startup", action="store_true", help="显示第一帧后打印启动各阶段的耗时")
+    parser.add_argument("--width", type=int, default=10, help="棋盘宽度（格）")
+    parser.add_argument("--height", type=int, default=20, help="棋盘高度（格），超出窗口时画面滚动")
+    args = parser.parse_args()
+    # 下面会切换工作目录，先把轨迹路径转换为绝对路径
+    trace_path = os.path.abspath(args.trace) if args.trace else None
+    
     # 确保我们在正确的目录中
     script_dir = os.path.dirname(os.path.abspath(__file__))
     os.chdir(script_dir)
     
     try:
-        # 导入并运行游戏
+        # 导入并运行游戏（图形前端和pygame在这里才加载）
         from tetris import main as tetris_main
+        from tetris_perf import StartupTimer
+        startup = StartupTimer(_STARTED) if args.startup else None
+        if startup is not None:
+            startup.mark("import")
         print("正在启动俄罗斯方块游戏...")
         print("游戏控制:")
         print("  ← → : 移动方块")
@@ -23,10 +47,17 @@ def main():
         print("  空格 : 硬降（直接落到底部）")
         print("  P : 暂停/继续")
         print("  R : 重新开始")
+        print("  A : 自动演示（启动时加 --ai 直接开启）")
+        print("  启动时加 --uncapped 不限制渲染帧率")
+        print("  F3 : 帧耗时面板（启动时加 --profile 或 --trace 文件）")
         print("  关闭窗口或按 Ctrl+C 退出游戏")
         print("\n开始游戏！")
         
-        tetris_main()
+        tetris_main(autoplay=args.ai,
+                    render_rate=None if args.uncapped else 60,
+                    profile=args.profile, trace_path=trace_path,
+                    width=args.width, height=args.height, das=args.das, arr=args.arr,
+                    startup=startup)
         
     except ImportError as e:
         print(f"导入错误: {e}")
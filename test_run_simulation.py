@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+批量模拟测试脚本
+检查带种子的对局可以复现，并行与串行运行得到相同的统计
+"""
+
+import sys
+import os
+
+# 添加当前目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def test_seeded_game():
+    """测试相同种子得到相同的对局"""
+    from run_simulation import play_game
+
+    print("测试带种子的对局...")
+    first = play_game(42)
+    assert play_game(42) == first, "相同种子的对局结果不同"
+    assert first['pieces'] > 0, "对局没有放置任何方块"
+    assert play_game(42, max_pieces=3)['pieces'] <= 3, "最大方块数限制无效"
+    print("✓ 带种子的对局测试通过")
+
+def test_parallel_matches_serial():
+    """测试并行运行与串行运行的统计一致"""
+    from run_simulation import run
+
+    print("测试并行模拟...")
+    seeds = range(20)
+    streamed = []
+    parallel = run(seeds, jobs=2, on_result=streamed.append)
+    serial = run(seeds, jobs=1)
+    assert sorted(r['seed'] for r in streamed) == list(seeds), "逐局结果不完整"
+    assert parallel.summary() == serial.summary(), "并行与串行的统计不一致"
+    print("✓ 并行模拟测试通过")
+
+def main():
+    """运行所有测试"""
+    print("开始测试批量模拟...\n")
+
+    try:
+        test_seeded_game()
+        test_parallel_matches_serial()
+        print("\n🎉 所有测试都通过了！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
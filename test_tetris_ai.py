@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+自动玩家测试脚本
+检查启发式特征、限时束搜索和实时执行
+"""
+
+import sys
+import os
+
+# 添加当前目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def test_board_features():
+    """测试棋盘特征计算"""
+    from tetris_core import Board, RED
+    from tetris_ai import board_features
+
+    print("测试棋盘特征...")
+    board = Board(4, 6)
+    board[3][0] = RED   # 第0列高3，下面两个洞
+    board[5][1] = RED   # 第1列高1
+    board[4][1] = RED   # 第1列高2
+    aggregate, holes, bumpiness = board_features(board)
+    assert aggregate == 3 + 2, "总高度不正确"
+    assert holes == 2, "洞数不正确"
+    assert bumpiness == 1 + 2 + 0, "凹凸度不正确"
+    print("✓ 棋盘特征测试通过")
+
+def test_autoplayer():
+    """测试自动玩家能持续消行且结果可复现"""
+    from tetris_core import TetrisGame
+    from tetris_ai import AutoPlayer, play_turn
+
+    print("测试自动玩家...")
+    def play(seed):
+        game = TetrisGame(seed=seed)
+        player = AutoPlayer(time_limit=None)
+        for _ in range(120):
+            assert play_turn(game, player), "自动玩家过早结束游戏"
+        assert player.last_depth == 2, "没有完成两层搜索"
+        return game.score, game.lines_cleared
+    first = play(11)
+    assert first == play(11), "不限时的自动玩家结果不可复现"
+    assert first[1] >= 30, "自动玩家消行太少"
+    print("✓ 自动玩家测试通过")
+
+def test_time_limit():
+    """测试时间用完时仍能给出决策"""
+    import time
+    from tetris_core import TetrisGame, ROTATE
+    from tetris_ai import AutoPlayer, MOVE_DELTAS, plan_moves
+
+    print("测试限时决策...")
+    game = TetrisGame(seed=2)
+    player = AutoPlayer(time_limit=0)
+    placement = player.choose(game)
+    assert placement is not None, "限时决策没有给出落点"
+    assert player.last_nodes == 1 and player.last_depth == 0, "时间用完后第一层也应停止"
+    assert placement.moves is not None, "选定的落点没有输入序列"
+
+    # 高棋盘：第一层的枚举也受时间限制
+    game = TetrisGame(width=100, height=10000, seed=2)
+    player = AutoPlayer(time_limit=0.012)
+    start = time.perf_counter()
+    placement = player.choose(game)
+    assert time.perf_counter() - start < 0.2, "高棋盘上的决策超时太多"
+    piece = game.current_piece
+    for move in plan_moves(placement):
+        if move == ROTATE:
+            assert game.rotate_piece(), "选定落点的输入序列无效"
+        else:
+            assert game.move_piece(*MOVE_DELTAS[move]), "选定落点的输入序列无效"
+    assert (piece.x, piece.rotation) == (placement.x, placement.rotation), "输入序列没有到达落点"
+    print("✓ 限时决策测试通过")
+
+def test_autopilot():
+    """测试逐帧执行自动玩家的决策"""
+    from tetris_core import TetrisGame
+    from tetris_ai import AutoPilot
+
+    print("测试自动演示...")
+    game = TetrisGame(seed=4)
+    pilot = AutoPilot(moves_per_step=1)
+    placed = 0
+    piece = game.current_piece
+    for _ in range(400):
+        assert pilot.step(game), "自动演示过早结束游戏"
+        if game.current_piece is not piece:
+            placed += 1
+            piece = game.current_piece
+    assert placed >= 40, "自动演示放置的方块太少"
+    print("✓ 自动演示测试通过")
+
+def test_eval_cache():
+    """测试评估缓存的LRU淘汰和命中统计，以及对局中哈希保持正确"""
+    from tetris_core import Board, TetrisGame
+    from tetris_ai import AutoPlayer, EvalCache, play_turn
+
+    print("测试评估缓存...")
+    cache = EvalCache(maxsize=2)
+    cache.put(1, 'a')
+    cache.put(2, 'b')
+    assert cache.get(1) == 'a', "缓存未命中"
+    cache.put(3, 'c')  # 淘汰最久未使用的 2
+    assert cache.get(2) is None and len(cache) == 2, "LRU淘汰不正确"
+    assert (cache.hits, cache.misses) == (1, 1), "命中统计不正确"
+
+    game = TetrisGame(seed=5)
+    player = AutoPlayer(time_limit=None)
+    for _ in range(60):
+        play_turn(game, player)
+    fresh = Board(game.grid.width, game.grid.height)
+    for x, y, color in game.grid.filled_cells():
+        fresh[y][x] = color
+    assert game.lines_cleared > 0, "对局没有消行"
+    assert game.grid.hash == fresh.hash, "对局中的增量哈希不正确"
+    assert player.feature_cache.hits > 0, "评估缓存没有命中"
+    print("✓ 评估缓存测试通过")
+
+def main():
+    """运行所有测试"""
+    print("开始测试自动玩家...\n")
+
+    try:
+        test_board_features()
+        test_autoplayer()
+        test_time_limit()
+        test_autopilot()
+        test_eval_cache()
+        print("\n🎉 所有测试都通过了！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
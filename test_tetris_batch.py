@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+批量模拟器测试脚本
+检查 BatchTetris 与 TetrisGame 在相同操作下得到完全相同的结果
+"""
+
+import sys
+import os
+import random
+
+import numpy as np
+
+# 添加当前目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def _sync_pieces(batch, games):
+    """让批量模拟器使用与各局 TetrisGame 相同的方块"""
+    for i, game in enumerate(games):
+        if batch.alive[i]:
+            batch.shape[i] = game.current_piece.shape_index
+            batch.next_shape[i] = game.next_piece.shape_index
+
+def _prefill(batch, games, rows):
+    """在两边的底部都铺上相同的方块，只在最左列留出一口井，便于产生消行"""
+    from tetris_core import RED
+    from tetris_batch import PAD, TOP
+
+    for game in games:
+        for y in range(game.grid.height - rows, game.grid.height):
+            for x in range(1, game.grid.width):
+                game.grid[y][x] = RED
+    masks = np.array([game.grid.rows for game in games])
+    batch.boards[:, TOP:TOP + batch.height] = (masks << PAD) | batch.wall
+
+def test_matches_tetris_game():
+    """测试批量模拟与 TetrisGame 规则一致"""
+    from tetris_core import TetrisGame
+    from tetris_batch import BatchTetris
+
+    print("测试批量模拟与单局规则一致...")
+    n = 16
+    rng = random.Random(7)
+    games = [TetrisGame() for _ in range(n)]
+    batch = BatchTetris(n, seed=7)
+    _prefill(batch, games, 12)
+    _sync_pieces(batch, games)
+    alive = [True] * n
+
+    for _ in range(300):
+        rotations = [rng.randrange(4) for _ in range(n)]
+        shifts = [rng.randint(-5, 5) for _ in range(n)]
+        for step in range(4):
+            turn = np.array([r > step for r in rotations])
+            for i in range(n):
+                if alive[i] and turn[i]:
+                    games[i].rotate_piece()
+            before = batch.rotation.copy()
+            batch.rotate()
+            # 只保留本步需要旋转的棋局
+            batch.rotation[~turn] = before[~turn]
+            assert list(batch.rotation) == [g.current_piece.rotation for g in games], "旋转结果不一致"
+        for _ in range(5):
+            dx = [(s > 0) - (s < 0) for s in shifts]
+            moved = batch.move(dx)
+            for i in range(n):
+                if alive[i]:
+                    assert moved[i] == games[i].move_piece(dx[i], 0), "移动结果不一致"
+        for i in range(n):
+            if alive[i]:
+                alive[i] = games[i].hard_drop()
+        batch.hard_drop()
+        assert list(batch.alive) == alive, "游戏结束判定不一致"
+        _sync_pieces(batch, games)
+        for i, game in enumerate(games):
+            assert list(batch.row_masks()[i]) == game.grid.rows, "棋盘不一致"
+            assert batch.score[i] == game.score, "得分不一致"
+            assert batch.lines_cleared[i] == game.lines_cleared, "消除行数不一致"
+            assert batch.level[i] == game.level, "等级不一致"
+        if not any(alive):
+            break
+    assert sum(batch.lines_cleared) > 0, "测试没有覆盖到消行"
+    print("✓ 批量模拟一致性测试通过")
+
+def test_clear_lines():
+    """测试批量消行"""
+    from tetris_batch import BatchTetris, PAD, TOP
+
+    print("测试批量消行...")
+    batch = BatchTetris(2, seed=0)
+    full = (1 << batch.width) - 1
+    rows = batch.row_masks()
+    rows[0, -2:] = full
+    rows[0, -3] = 0b1
+    rows[1, -1] = 0b10
+    batch.boards[:, TOP:TOP + batch.height] = (rows << PAD) | batch.wall
+    cleared = batch.clear_lines()
+    assert list(cleared) == [2, 0], "消除行数不正确"
+    masks = batch.row_masks()
+    assert masks[0, -1] == 0b1 and masks[0, :-1].sum() == 0, "行下移不正确"
+    assert masks[1, -1] == 0b10, "未消行的棋盘被修改"
+    print("✓ 批量消行测试通过")
+
+def main():
+    """运行所有测试"""
+    print("开始测试批量模拟器...\n")
+
+    try:
+        test_matches_tetris_game()
+        test_clear_lines()
+        print("\n🎉 所有测试都通过了！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
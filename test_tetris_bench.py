@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+性能基准测试脚本
+检查基准报告的格式，以及与基线比较时能发现回退
+"""
+
+import sys
+import os
+
+# 添加当前目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def test_report():
+    """测试基准报告可以序列化为JSON，并且工作负载由种子决定"""
+    import json
+    import random
+    from tetris_bench import run, bench_hard_drop
+
+    print("测试基准报告...")
+    report = run(['get_cells', 'hard_drop'], seed=3, repeat=2)
+    assert json.loads(json.dumps(report)) == report, "报告不能序列化为JSON"
+    for name in ('get_cells', 'hard_drop'):
+        result = report['results'][name]
+        assert result['rate'] > 0 and len(result['runs']) == 2, f"{name} 的结果不完整"
+    assert bench_hard_drop(random.Random(1), 1)[0] == bench_hard_drop(random.Random(1), 1)[0]
+    print("✓ 基准报告测试通过")
+
+def test_compare():
+    """测试与基线比较时按阈值标记回退"""
+    from tetris_bench import compare
+
+    print("测试基线比较...")
+    def report(**rates):
+        return {'results': {name: {'rate': rate} for name, rate in rates.items()}}
+
+    rows = compare(report(render=850.0, hard_drop=1200.0, get_cells=1.0),
+                   report(render=1000.0, hard_drop=1000.0), threshold=0.1)
+    flags = {row[0]: row[4] for row in rows}
+    assert flags == {'render': True, 'hard_drop': False}, "回退标记不正确"
+    print("✓ 基线比较测试通过")
+
+def main():
+    """运行所有测试"""
+    print("开始测试性能基准...\n")
+
+    try:
+        test_report()
+        test_compare()
+        print("\n🎉 所有测试都通过了！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
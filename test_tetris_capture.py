@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+离屏录制测试脚本
+检查帧视图与表面共享内存、同一种子的画面可以复现，以及后台写盘的结果
+"""
+
+import sys
+import os
+
+# 添加当前目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+def test_recorder_frames():
+    """测试帧视图是零拷贝的，并且画面由种子决定"""
+    import numpy as np
+    import pygame
+    from tetris_capture import FrameRecorder
+
+    print("测试离屏录制...")
+    first = FrameRecorder(seed=5)
+    for index, pixels in first.frames(40):
+        pass
+    assert index == 39 and pixels is first.pixels, "帧号或视图不正确"
+    assert np.shares_memory(pixels, first.buffer), "视图不是零拷贝的"
+    assert (pygame.surfarray.array3d(first.surface) == pixels).all(), "视图与表面的像素不同"
+
+    second = FrameRecorder(seed=5)
+    for _ in second.frames(40):
+        pass
+    assert (second.pixels == first.pixels).all(), "相同种子的画面不同"
+    print("✓ 离屏录制测试通过")
+
+def test_frame_writer():
+    """测试后台线程写出的原始流和PNG与录制的画面一致"""
+    import json
+    import tempfile
+    import numpy as np
+    import pygame
+    from tetris_capture import FrameRecorder, FrameWriter
+
+    print("测试后台写盘...")
+    with tempfile.TemporaryDirectory() as directory:
+        recorder = FrameRecorder(seed=1)
+        kept = []
+        with FrameWriter(os.path.join(directory, "raw"), "raw", queue_size=2) as raw, \
+             FrameWriter(os.path.join(directory, "png"), "png") as png:
+            for _, pixels in recorder.frames(6, raw):
+                png.submit(pixels)
+                kept.append(pixels.copy())
+
+        with open(os.path.join(directory, "raw", "frames.json")) as f:
+            meta = json.load(f)
+        assert meta['frames'] == 6, "描述文件的帧数不正确"
+        stream = np.fromfile(os.path.join(directory, "raw", "frames.rgb"), dtype=np.uint8)
+        frames = stream.reshape(meta['frames'], meta['height'], meta['width'], 3)
+        assert (frames[5] == kept[5].transpose(1, 0, 2)).all(), "原始流的画面不正确"
+
+        image = pygame.image.load(os.path.join(directory, "png", "frame_000005.png"))
+        assert (pygame.surfarray.array3d(image) == kept[5]).all(), "PNG的画面不正确"
+    print("✓ 后台写盘测试通过")
+
+def main():
+    """运行所有测试"""
+    print("开始测试离屏录制...\n")
+
+    try:
+        test_recorder_frames()
+        test_frame_writer()
+        print("\n🎉 所有测试都通过了！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+强化学习环境测试脚本
+检查观测数组原地更新且与游戏状态一致、同一种子可以复现，以及结束和截断
+"""
+
+import sys
+import os
+
+# 添加当前目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def _expected(game):
+    """直接从游戏状态生成的观测，用来对照"""
+    import numpy as np
+    board = np.array([[game.grid.is_occupied(x, y) for x in range(game.grid.width)]
+                      for y in range(game.grid.height)], dtype=np.uint8)
+    piece = np.zeros_like(board)
+    for x, y in game.current_piece.get_cells():
+        if y >= 0:
+            piece[y, x] = 1
+    return board, piece
+
+def test_in_place_observation():
+    """测试每一步返回同一组数组，内容与游戏状态一致"""
+    import random
+    from tetris_env import TetrisEnv, ACTIONS, DROP
+
+    print("测试原地更新的观测...")
+    env = TetrisEnv()
+    observation, info = env.reset(seed=7)
+    arrays = {name: array for name, array in observation.items()}
+    rng = random.Random(7)
+    for step in range(3000):
+        action = DROP if step % 9 == 0 else rng.randrange(len(ACTIONS))
+        observation, reward, terminated, truncated, info = env.step(action)
+        assert all(observation[name] is arrays[name] for name in arrays), "观测数组被重新分配了"
+        if step % 50 == 0 or terminated:
+            board, piece = _expected(env.game)
+            assert (observation['board'] == board).all(), f"第 {step} 步棋盘不一致"
+            assert (observation['piece'] == piece).all(), f"第 {step} 步当前方块不一致"
+            current = env.game.current_piece
+            assert list(observation['piece_state']) == [current.shape_index, current.rotation,
+                                                        current.x, current.y]
+            assert observation['next_piece'][0] == env.game.next_piece.shape_index
+        assert reward >= 0 and info['score'] == env.game.score
+        if terminated:
+            observation, info = env.reset(seed=step)
+            assert not observation['board'].any() and info['steps'] == 0, "重置后棋盘没有清空"
+    print("✓ 原地更新的观测测试通过")
+
+def test_episode():
+    """测试同一种子的回合可以复现，以及结束、截断和非法动作"""
+    from tetris_env import TetrisEnv, DROP, NOOP
+
+    print("测试回合...")
+    def run(seed):
+        env = TetrisEnv(max_steps=500)
+        env.reset(seed=seed)
+        total = 0
+        for step in range(500):
+            _, reward, terminated, truncated, _ = env.step(DROP if step % 2 else NOOP)
+            total += reward
+            if terminated or truncated:
+                return total, step, terminated, truncated, env.observation['board'].copy()
+        return total, step, False, False, None
+
+    first = run(3)
+    assert first[2] and not first[3], "一直硬降应当很快结束"
+    second = run(3)
+    assert first[:4] == second[:4] and (first[4] == second[4]).all(), "相同种子的回合不同"
+
+    env = TetrisEnv(tick_ms=None, max_steps=10)
+    env.reset(seed=1)
+    y = env.observation['piece_state'][3]
+    for _ in range(10):
+        _, _, terminated, truncated, _ = env.step(NOOP)
+    assert env.observation['piece_state'][3] == y, "没有重力时方块不应该下落"
+    assert truncated and not terminated
+    try:
+        env.step(99)
+        assert False, "应当拒绝未知的动作"
+    except ValueError:
+        pass
+    print("✓ 回合测试通过")
+
+def main():
+    """运行所有测试"""
+    print("开始测试强化学习环境...\n")
+
+    try:
+        test_in_place_observation()
+        test_episode()
+        print("\n🎉 所有测试都通过了！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
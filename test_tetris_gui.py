@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+渲染器测试脚本
+使用SDL的dummy视频驱动，不需要真实的显示设备
+"""
+
+import sys
+import os
+
+# 添加当前目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+def _play(game, step):
+    """按固定的节奏操作游戏"""
+    if step % 7 == 0:
+        return game.hard_drop()
+    if step % 3 == 0:
+        game.rotate_piece()
+    else:
+        game.move_piece(1 if step % 2 else -1, 0)
+    return game.update(200)
+
+def test_dirty_rect_rendering():
+    """测试局部刷新的画面与整屏重画一致，且变化都在返回的矩形内"""
+    import pygame
+    from tetris_core import TetrisGame
+    from tetris_gui import TetrisRenderer, WINDOW_WIDTH, WINDOW_HEIGHT
+
+    print("测试局部刷新渲染...")
+    pygame.display.init()
+    pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    screen = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+    reference = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+    renderer = TetrisRenderer(screen)
+    game = TetrisGame(seed=8)
+    state = "playing"
+    previous = None
+    for step in range(80):
+        if state == "playing" and not _play(game, step):
+            state = "game_over"
+        if step == 40:
+            state = "paused"
+        elif step == 45:
+            state = "playing"
+        dirty = renderer.render(game, state)
+
+        # 与全新渲染器的整屏结果逐像素比较
+        fresh = TetrisRenderer(reference)
+        fresh.render(game, state)
+        assert pygame.image.tostring(screen, "RGB") == pygame.image.tostring(reference, "RGB"), \
+            "局部刷新的画面与整屏重画不一致"
+
+        # 上一帧到这一帧的像素变化必须都落在返回的矩形中
+        if previous is not None:
+            diff = previous.copy()
+            diff.blit(screen, (0, 0), special_flags=pygame.BLEND_RGB_SUB)
+            back = screen.copy()
+            back.blit(previous, (0, 0), special_flags=pygame.BLEND_RGB_SUB)
+            diff.blit(back, (0, 0), special_flags=pygame.BLEND_RGB_ADD)
+            for rect in dirty:
+                diff.fill((0, 0, 0), rect)
+            changed = pygame.mask.from_threshold(diff, (0, 0, 0), (1, 1, 1, 255))
+            assert changed.count() == WINDOW_WIDTH * WINDOW_HEIGHT, "有变化没有包含在刷新矩形中"
+        previous = screen.copy()
+
+    # 没有任何变化时不需要刷新
+    assert renderer.render(game, state) == [], "画面没有变化时仍然返回了刷新矩形"
+    print("✓ 局部刷新渲染测试通过")
+
+def test_text_cache():
+    """测试文字缓存只在文本变化时重新渲染"""
+    import pygame
+    from tetris_core import TetrisGame
+    from tetris_gui import TetrisRenderer, TextCache, WINDOW_WIDTH, WINDOW_HEIGHT
+
+    print("测试文字缓存...")
+    pygame.font.init()
+    font = pygame.font.Font(None, 20)
+    cache = TextCache(maxsize=2)
+    first = cache.render(font, "Score: 0", (255, 255, 255))
+    assert cache.render(font, "Score: 0", (255, 255, 255)) is first, "相同文本没有复用缓存"
+    cache.render(font, "Score: 1", (255, 255, 255))
+    cache.render(font, "Score: 2", (255, 255, 255))
+    assert len(cache) == 2, "缓存没有容量上限"
+    assert cache.render(font, "Score: 0", (255, 255, 255)) is not first, "被淘汰的文本仍然返回旧表面"
+
+    renderer = TetrisRenderer(pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)))
+    game = TetrisGame(seed=1)
+    for _ in range(10):
+        renderer.draw_info(game)
+    misses = renderer.text_cache.misses
+    game.score += 100
+    renderer.draw_info(game)
+    assert renderer.text_cache.misses == misses + 1, "只有得分文本应当重新渲染"
+
+    # 预加载之后，暂停和结束画面不再渲染新的文字
+    renderer.preload()
+    misses = renderer.text_cache.misses
+    renderer.render(game, "paused")
+    renderer.render(game, "game_over")
+    assert renderer.text_cache.misses == misses, "预加载没有覆盖暂停和结束画面"
+    print("✓ 文字缓存测试通过")
+
+def test_profiled_renderer():
+    """测试开启统计的渲染器记录 render 和各个 draw_* 的耗时"""
+    import pygame
+    from tetris_core import TetrisGame
+    from tetris_gui import TetrisRenderer, WINDOW_WIDTH, WINDOW_HEIGHT
+    from tetris_perf import FrameProfiler
+
+    print("测试渲染耗时统计...")
+    profiler = FrameProfiler()
+    renderer = TetrisRenderer(pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)), profiler)
+    game = TetrisGame(seed=2)
+    for step in range(20):
+        profiler.begin_frame()
+        renderer.render(game, "playing")
+        _play(game, step)
+        profiler.end_frame()
+    sections = profiler.summary()
+    for name in ('render', 'draw_board', 'draw_piece', 'draw_ghost_piece', 'draw_grid'):
+        assert sections[name]['count'] > 0, f"没有记录 {name}"
+    assert not renderer.hud_rect.colliderect(renderer.info_rect), "统计面板遮住了计数"
+    assert renderer.screen_rect.contains(renderer.draw_perf_hud(profiler)), "统计面板超出窗口"
+    print("✓ 渲染耗时统计测试通过")
+
+def test_frame_scheduler():
+    """测试固定步长调度：逻辑步数只取决于经过的时间，渲染按频率限速"""
+    from tetris_gui import FrameScheduler
+
+    print("测试固定步长调度...")
+    now = [0.0]
+    scheduler = FrameScheduler(tick_rate=50, render_rate=25, max_ticks=5, clock=lambda: now[0])
+    ticks = 0
+    for frame_time in (0.005, 0.013, 0.031, 0.007, 0.044):
+        now[0] += frame_time
+        ticks += scheduler.ticks()
+    assert ticks == 5, "逻辑步数与经过的时间不符"  # 0.1 秒 / 0.02 秒
+
+    # 落后太多时只补 max_ticks 步，剩下的时间丢弃
+    now[0] += 1.0
+    assert scheduler.ticks() == 5 and scheduler.ticks() == 0, "积压的时间没有丢弃"
+
+    # 渲染限速：0.04 秒内只渲染一次
+    assert scheduler.should_render()
+    assert not scheduler.should_render()
+    now[0] += 0.01
+    assert not scheduler.should_render() and 0 < scheduler.idle_time() <= 0.02
+    now[0] += 0.03
+    assert scheduler.should_render()
+
+    # 暂停之后重新计时，不补跑暂停的时间
+    now[0] += 60.0
+    scheduler.reset()
+    now[0] += 0.021
+    assert scheduler.ticks() == 1, "暂停的时间被补跑了"
+
+    uncapped = FrameScheduler(render_rate=None, clock=lambda: now[0])
+    assert uncapped.should_render() and uncapped.should_render() and uncapped.idle_time() == 0
+    print("✓ 固定步长调度测试通过")
+
+def test_scrolling_viewport():
+    """测试大棋盘只绘制可视区域，且可视区域跟随当前方块"""
+    import pygame
+    from tetris_core import TetrisGame, SHAPE_COLORS
+    from tetris_gui import TetrisRenderer, WINDOW_WIDTH, WINDOW_HEIGHT, GRID_WIDTH, GRID_HEIGHT, CELL_SIZE
+
+    print("测试滚动视口...")
+    game = TetrisGame(seed=4, width=100, height=10000)
+    board = game.grid
+    for y in range(board.height - 30, board.height):
+        for x in range(board.width - 1):
+            board.set_color(x, y, SHAPE_COLORS[y % 7])
+    renderer = TetrisRenderer(pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)))
+    drawn = []
+    draw_cells = renderer.draw_cells
+    renderer.draw_cells = lambda: (drawn.extend(dest for _, dest, _ in renderer.cells), draw_cells())
+
+    assert renderer.render(game, "playing") and renderer.view_y == 0
+    assert (renderer.view_cols, renderer.view_rows) == (GRID_WIDTH, GRID_HEIGHT)
+    assert renderer.playfield_rect.width == GRID_WIDTH * CELL_SIZE + 1
+    # 方块落到已放置的方块附近时，视口跟着滚动，只画看得见的格子
+    game.current_piece.y = board.height - 40
+    drawn.clear()
+    dirty = renderer.render(game, "playing")
+    assert renderer.view_y > board.height - 60 and renderer.playfield_rect in dirty
+    assert 0 < len(drawn) <= GRID_WIDTH * GRID_HEIGHT + 12, "绘制了可视区域以外的格子"
+    assert all(renderer.playfield_rect.collidepoint(dest) for dest in drawn)
+    piece_rect = renderer._piece_rect(game.current_piece, game.current_piece.y)
+    assert renderer.playfield_rect.contains(piece_rect) and piece_rect.height > 0, "方块不在视口内"
+
+    # 默认尺寸的棋盘不滚动
+    small = TetrisRenderer(pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)))
+    normal = TetrisGame(seed=4)
+    for step in range(30):
+        small.render(normal, "playing")
+        _play(normal, step)
+        assert (small.view_x, small.view_y) == (0, 0)
+    print("✓ 滚动视口测试通过")
+
+def test_cell_atlas():
+    """测试格子用图集贴图绘制，颜色与位置正确，且每帧只调用一次 blits"""
+    import pygame
+    from tetris_core import TetrisGame, SHAPE_COLORS
+    from tetris_gui import (TetrisRenderer, CellAtlas, WINDOW_WIDTH, WINDOW_HEIGHT,
+                            CELL_SIZE, GRID_X_OFFSET, GRID_Y_OFFSET)
+
+    print("测试格子图集...")
+
+    class CountingSurface(pygame.Surface):
+        blits_calls = 0
+
+        def blits(self, *args, **kwargs):
+            CountingSurface.blits_calls += 1
+            return super().blits(*args, **kwargs)
+
+    atlas = CellAtlas()
+    assert len(atlas) == len(set(SHAPE_COLORS)), "图集应当预先包含所有方块颜色"
+    surface = atlas.surface
+    assert atlas.tile(SHAPE_COLORS[0]) and atlas.surface is surface, "已有颜色不应重建图集"
+
+    screen = CountingSurface((WINDOW_WIDTH, WINDOW_HEIGHT))
+    renderer = TetrisRenderer(screen)
+    game = TetrisGame(seed=3)
+    game.grid.set_color(0, game.grid.height - 1, (10, 200, 30))  # 不在 SHAPE_COLORS 中的颜色
+    for step in range(20):
+        CountingSurface.blits_calls = 0
+        renderer.render(game, "playing")
+        assert CountingSurface.blits_calls <= 1, "一帧中调用了多次 blits"
+        _play(game, step)
+    assert len(renderer.atlas) == len(set(SHAPE_COLORS)) + 1, "新颜色没有加入图集"
+
+    renderer.invalidate()
+    renderer.render(game, "playing")
+
+    def center(x, y):
+        return (GRID_X_OFFSET + x * CELL_SIZE + CELL_SIZE // 2, GRID_Y_OFFSET + y * CELL_SIZE + CELL_SIZE // 2)
+
+    for x, y, color in game.grid.filled_cells():
+        assert screen.get_at(center(x, y))[:3] == color, "已放置的格子颜色不对"
+        # 格子之间留出网格线
+        corner = (GRID_X_OFFSET + x * CELL_SIZE, GRID_Y_OFFSET + y * CELL_SIZE)
+        assert screen.get_at(corner)[:3] != color
+    piece = game.current_piece
+    ghost_y = piece.y + game.drop_distance(piece)
+    for dx, dy in piece.get_geometry().cells:
+        assert screen.get_at(center(piece.x + dx, piece.y + dy))[:3] == piece.color
+        if ghost_y + dy > piece.y + 3:
+            assert screen.get_at(center(piece.x + dx, ghost_y + dy))[:3] == tuple(c // 3 for c in piece.color)
+    next_x, next_y = renderer.preview_rect.topleft
+    half = CELL_SIZE // 2
+    for j, i in game.next_piece.get_geometry().cells:
+        assert screen.get_at((next_x + j * half + half // 2, next_y + i * half + half // 2))[:3] == \
+            game.next_piece.color, "预览格子颜色不对"
+    print("✓ 格子图集测试通过")
+
+def test_trace_first_frame():
+    """测试轨迹的第一帧不包含预加载时画的暂停和结束画面"""
+    import json
+    import tempfile
+    import pygame
+    import tetris_gui
+
+    print("测试帧耗时轨迹...")
+    set_mode = pygame.display.set_mode
+    def set_mode_then_quit(*args, **kwargs):
+        screen = set_mode(*args, **kwargs)
+        pygame.time.set_timer(pygame.QUIT, 300)
+        return screen
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "trace.json")
+        pygame.display.set_mode = set_mode_then_quit
+        try:
+            tetris_gui.main(trace_path=path)
+        except SystemExit:
+            pass
+        finally:
+            pygame.display.set_mode = set_mode
+        with open(path) as f:
+            trace = json.load(f)
+    assert trace['frames'], "轨迹没有记录帧"
+    assert 'draw_pause' not in trace['summary'] and 'draw_game_over' not in trace['summary'], \
+        "预加载的绘制被计入了帧耗时"
+    print("✓ 帧耗时轨迹测试通过")
+
+def main():
+    """运行所有测试"""
+    print("开始测试渲染器...\n")
+
+    try:
+        test_dirty_rect_rendering()
+        test_text_cache()
+        test_frame_scheduler()
+        test_profiled_renderer()
+        test_scrolling_viewport()
+        test_cell_atlas()
+        test_trace_first_frame()
+        print("\n🎉 所有测试都通过了！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
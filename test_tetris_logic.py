@@ -140,6 +140,487 @@ def test_movement():
     
     print("✓ 方块移动测试通过")
 
+def test_bitboard():
+    """测试位棋盘的掩码与颜色平面"""
+    from tetris import Board, BLACK, RED, CYAN
+
+    print("测试位棋盘...")
+    board = Board(10, 20)
+    board[19][0] = RED
+    board[19][9] = CYAN
+    assert board.rows[19] == (1 << 0) | (1 << 9), "行掩码不正确"
+    assert board[19][0] == RED and board[19][9] == CYAN, "颜色平面不正确"
+    assert board[19][5] == BLACK, "空单元格颜色不正确"
+
+    # 越界和重叠检测
+    assert not board.fits([(0, 19)]), "重叠检测失败"
+    assert not board.fits([(10, 0)]), "右边界检测失败"
+    assert board.fits([(5, 19), (5, -1)]), "有效位置检测失败"
+
+    # 填满两行后一次压缩移除，上方的行下移
+    board[17][3] = RED
+    for y in (18, 19):
+        for x in range(10):
+            board[y][x] = CYAN
+    assert board.full_rows() == [18, 19], "完整行检测失败"
+    board.remove_rows(board.full_rows())
+    assert board.rows[19] == 1 << 3 and board[19][3] == RED, "行下移不正确"
+    assert sum(board.rows[:19]) == 0, "顶部未补充空行"
+
+    board[19][3] = BLACK
+    assert board.rows[19] == 0, "清空单元格失败"
+
+    # lock 返回涉及的行，只检查这些行也能找到完整行
+    for x in range(6):
+        board[19][x] = RED
+    touched = board.lock([(6, 19), (7, 19), (8, 19), (9, 19), (9, 18), (9, -1)], CYAN)
+    assert touched == [18, 19], "lock 返回的行不正确"
+    assert board.full_rows(touched) == board.full_rows() == [19], "只检查涉及的行时结果不同"
+    print("✓ 位棋盘测试通过")
+
+def test_geometry_table():
+    """测试几何表与原始形状字符串一致"""
+    import random
+    from tetris import Board, GEOMETRY, SHAPES, RED
+
+    print("测试几何表...")
+    for shape_index, rotations in enumerate(SHAPES):
+        for rotation, shape in enumerate(rotations):
+            cells = [(j, i) for i, row in enumerate(shape)
+                     for j, cell in enumerate(row) if cell == '#']
+            geometry = GEOMETRY[shape_index][rotation]
+            assert sorted(geometry.cells) == sorted(cells), "几何表单元格不正确"
+
+    # 掩码碰撞检测与逐格检测结果一致
+    rng = random.Random(1)
+    board = Board(10, 20)
+    for _ in range(60):
+        board[rng.randrange(20)][rng.randrange(10)] = RED
+    for _ in range(2000):
+        shape_index = rng.randrange(len(SHAPES))
+        geometry = rng.choice(GEOMETRY[shape_index])
+        x, y = rng.randint(-4, 10), rng.randint(-4, 20)
+        cells = [(x + dx, y + dy) for dx, dy in geometry.cells]
+        assert board.fits_piece(geometry, x, y) == board.fits(cells), "掩码碰撞检测不一致"
+    print("✓ 几何表测试通过")
+
+def test_hard_drop():
+    """测试硬降"""
+    from tetris import TetrisGame, Piece, GRID_HEIGHT
+
+    print("测试硬降...")
+    game = TetrisGame()
+    game.current_piece = Piece(3, 0, shape_index=1)  # O形，占第2、3行
+    assert game.drop_distance() == GRID_HEIGHT - 4, "下落距离不正确"
+    game.hard_drop()
+    assert game.score == 2 * (GRID_HEIGHT - 4), "硬降得分不正确"
+    assert game.grid.rows[GRID_HEIGHT - 1] == 0b11 << 4, "硬降落点不正确"
+    print("✓ 硬降测试通过")
+
+def test_core_without_pygame():
+    """测试核心逻辑不会导入pygame"""
+    import subprocess
+
+    print("测试核心模块导入...")
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    output = subprocess.run(
+        [sys.executable, "-c",
+         "import sys, tetris_core, tetris; tetris.TetrisGame().hard_drop(); "
+         "print('pygame' in sys.modules)"],
+        cwd=script_dir, stdout=subprocess.PIPE, universal_newlines=True, check=True,
+    ).stdout.strip()
+    assert output == "False", "导入核心逻辑时不应加载pygame"
+    print("✓ 核心模块导入测试通过")
+
+def test_seeded_pieces():
+    """测试相同种子生成相同的方块序列"""
+    from tetris import TetrisGame
+
+    print("测试方块序列种子...")
+    def sequence(game):
+        shapes = []
+        for _ in range(20):
+            shapes.append(game.current_piece.shape_index)
+            game.current_piece = game.next_piece
+            game.next_piece = game.new_piece()
+        return shapes
+    assert sequence(TetrisGame(seed=3)) == sequence(TetrisGame(seed=3)), "相同种子的方块序列不同"
+    print("✓ 方块序列种子测试通过")
+
+def test_placements():
+    """测试落点搜索与逐步移动的结果一致"""
+    import random
+    from tetris import TetrisGame, Piece, SHAPES, RED
+
+    print("测试落点搜索...")
+    rng = random.Random(5)
+    for _ in range(30):
+        game = TetrisGame(seed=rng.randrange(1000))
+        # 随机铺一些方块，制造悬空的洞
+        for y in range(8, 20):
+            for x in range(10):
+                if rng.random() < 0.45:
+                    game.grid[y][x] = RED
+        piece = game.current_piece
+
+        # 用 is_valid_position 逐步搜索作为参照
+        start = (piece.x, piece.y, piece.rotation)
+        seen = {start}
+        frontier = [start]
+        expected = set()
+        for x, y, r in frontier:
+            probe = Piece(x, y, piece.shape_index)
+            probe.rotation = r
+            turned = (r + 1) % len(SHAPES[piece.shape_index])
+            for state, ok in (((x - 1, y, r), game.is_valid_position(probe, -1, 0)),
+                              ((x + 1, y, r), game.is_valid_position(probe, 1, 0)),
+                              ((x, y + 1, r), game.is_valid_position(probe, 0, 1)),
+                              ((x, y, turned), game.is_valid_position(probe, rotation=turned))):
+                if ok and state not in seen:
+                    seen.add(state)
+                    frontier.append(state)
+            if not game.is_valid_position(probe, 0, 1):
+                expected.add((x, y, r))
+
+        placements = game.get_placements()
+        assert {(p.x, p.y, p.rotation) for p in placements} == expected, "落点集合不正确"
+
+        # 按输入序列操作应当到达对应的落点
+        for placement in rng.sample(placements, min(5, len(placements))):
+            replay = Piece(piece.x, piece.y, piece.shape_index)
+            game.current_piece = replay
+            for move in placement.moves:
+                if move == 'rotate':
+                    assert game.rotate_piece(), "输入序列无效"
+                else:
+                    dx, dy = {'left': (-1, 0), 'right': (1, 0), 'down': (0, 1)}[move]
+                    assert game.move_piece(dx, dy), "输入序列无效"
+            assert (replay.x, replay.y, replay.rotation) == placement[:3], "输入序列没有到达落点"
+            game.current_piece = piece
+    print("✓ 落点搜索测试通过")
+
+def test_zobrist_hash():
+    """测试 Zobrist 哈希随放置和消行增量更新"""
+    from tetris import Board, RED, BLUE, BLACK
+
+    print("测试 Zobrist 哈希...")
+    def rebuilt(board):
+        fresh = Board(board.width, board.height)
+        for x, y, color in board.filled_cells():
+            fresh[y][x] = color
+        return fresh.hash
+
+    # 哈希只与占用有关，与颜色和修改顺序无关
+    a, b = Board(10, 20), Board(10, 20)
+    a[19][0] = RED
+    a[18][3] = RED
+    b[18][3] = BLUE
+    b[19][0] = BLUE
+    assert a.hash == b.hash and a.hash != 0, "相同占用的哈希不同"
+    a[19][0] = BLACK
+    a[18][3] = BLACK
+    assert a.hash == 0, "清空后哈希没有复原"
+
+    # 放置和消行之后与重新计算的结果一致
+    board = Board(10, 20)
+    board.lock([(x, 19) for x in range(10)] + [(2, 18), (4, 17)], RED)
+    board.lock([(x, 16) for x in range(10)] + [(2, 18)], BLUE)
+    assert board.hash == rebuilt(board), "放置后哈希不正确"
+    board.remove_rows(board.full_rows())
+    assert board.hash == rebuilt(board), "消行后哈希不正确"
+    assert board.copy().hash == board.hash, "复制后哈希不正确"
+    print("✓ Zobrist 哈希测试通过")
+
+def test_column_index():
+    """测试列高度索引和基于它的下落距离"""
+    import random
+    from tetris import Board, TetrisGame, GEOMETRY
+
+    print("测试列高度索引...")
+    def expected_columns(board):
+        heights, holes = [], []
+        for x in range(board.width):
+            filled = [y for y in range(board.height) if board.is_occupied(x, y)]
+            height = board.height - filled[0] if filled else 0
+            heights.append(height)
+            holes.append(height - len(filled))
+        return heights, holes
+
+    def scan_distance(board, geometry, x, y):
+        distance = 0
+        while board.fits_piece(geometry, x, y + distance + 1):
+            distance += 1
+        return distance
+
+    rng = random.Random(11)
+    for seed in range(5):
+        game = TetrisGame(seed=seed)
+        for _ in range(60):
+            piece = game.current_piece
+            for _ in range(rng.randrange(4)):
+                game.rotate_piece()
+            game.move_piece(rng.randint(-5, 5), 0)
+            geometry = GEOMETRY[piece.shape_index][piece.rotation]
+            assert game.drop_distance() == scan_distance(game.grid, geometry, piece.x, piece.y), \
+                "下落距离与逐行检测不一致"
+            if not game.hard_drop():
+                break
+            assert (game.grid.heights, game.grid.holes) == expected_columns(game.grid), \
+                "放置或消行后列索引不正确"
+
+    # 方块在悬空结构下方时，下落距离不受上方方块影响
+    board = Board(10, 20)
+    board.lock([(x, 10) for x in range(10)], (255, 0, 0))
+    geometry = GEOMETRY[1][0]  # O
+    assert board.drop_distance(geometry, 3, 11) == scan_distance(board, geometry, 3, 11) == 5
+    assert board.drop_distance(geometry, 3, -4) == scan_distance(board, geometry, 3, -4) == 10
+    assert board.copy().heights == board.heights == [10] * 10
+    assert board.holes == [9] * 10
+    print("✓ 列高度索引测试通过")
+
+def test_snapshot():
+    """测试快照的恢复、复制和序列化"""
+    import struct
+    from tetris import TetrisGame, GameSnapshot
+
+    print("测试快照...")
+    def play(game, steps):
+        """按固定的操作走若干步，返回每步之后的状态"""
+        states = []
+        for step in range(steps):
+            game.move_piece(step % 5 - 2, 0)
+            if step % 3 == 0:
+                game.rotate_piece()
+            game.hard_drop()
+            states.append((game.score, game.lines_cleared, game.grid.hash,
+                           game.current_piece.shape_index, game.next_piece.shape_index))
+        return states
+
+    game = TetrisGame(seed=18)
+    play(game, 15)
+    snapshot = game.snapshot()
+    expected = play(game, 15)
+
+    # 恢复之后（包括随机数生成器）重走一遍得到同样的结果
+    game.restore(snapshot)
+    assert play(game, 15) == expected, "恢复快照后对局不同"
+
+    # 复制品与原对局互不影响
+    game.restore(snapshot)
+    clone = game.clone()
+    assert play(clone, 15) == expected, "复制的对局不同"
+    assert game.snapshot() == snapshot, "修改复制品影响了原对局"
+
+    # 序列化往返
+    data = snapshot.to_bytes()
+    loaded = GameSnapshot.from_bytes(data)
+    restored = TetrisGame.from_snapshot(loaded)
+    assert restored.snapshot() == snapshot, "序列化往返后快照不同"
+    assert restored.grid.heights == game.grid.heights, "反序列化后列索引不正确"
+    assert play(restored, 15) == expected, "从字节恢复的对局不同"
+    try:
+        GameSnapshot.from_bytes(b"XXXX" + data[4:])
+        assert False, "应当拒绝错误的数据"
+    except ValueError:
+        pass
+
+    # 旧的 TTS1 格式：头部没有保存的行数，所有行的掩码和颜色都保存
+    board = snapshot.board
+    row_bytes = (board.width + 7) // 8
+    version, internal, gauss = snapshot.rng_state
+    old = b"".join([
+        struct.pack("<4sHHBBhhBqIIdB", b"TTS1", board.width, board.height,
+                    snapshot.shape, snapshot.rotation, snapshot.x, snapshot.y, snapshot.next_shape,
+                    snapshot.score, snapshot.lines_cleared, snapshot.level, snapshot.fall_time,
+                    len(board.palette)),
+        bytes(channel for color in board.palette for channel in color),
+        b"".join(mask.to_bytes(row_bytes, "little") for mask in board.rows),
+        bytes(board.width * board.height - len(board.colors)) + board.colors,
+        struct.pack("<B625IBd", version, *internal, gauss is not None, gauss or 0.0),
+    ])
+    restored = TetrisGame.from_snapshot(GameSnapshot.from_bytes(old))
+    assert restored.snapshot() == snapshot, "读取旧格式后快照不同"
+    assert play(restored, 15) == expected, "从旧格式恢复的对局不同"
+    print("✓ 快照测试通过")
+
+def test_large_board():
+    """测试按对局设置的大棋盘：存储只与有方块的行成正比"""
+    from tetris import TetrisGame, GameSnapshot, SHAPE_COLORS, BLACK
+
+    print("测试大棋盘...")
+    game = TetrisGame(seed=19, width=100, height=10000)
+    board = game.grid
+    assert (board.width, board.height) == (100, 10000)
+    assert 0 <= game.current_piece.x < 100
+    for step in range(30):
+        game.move_piece(step * 7 % 90 - 45, 0)
+        assert game.hard_drop(), "大棋盘上不应该结束"
+    allocated = [y for y, row in enumerate(board.colors) if row is not None]
+    assert allocated == [y for y, mask in enumerate(board.rows) if mask], "颜色行应当只为非空行分配"
+    assert board.top_row() == min(allocated) and board.top_row() > 9900
+
+    # 填满最底行和倒数第三行后消行：中间一行下移一格，更上面的下移两格
+    bottom = board.height - 1
+    for x in range(board.width):
+        board.set_color(x, bottom, SHAPE_COLORS[0])
+        board.set_color(x, bottom - 2, SHAPE_COLORS[1])
+    shift = {bottom - 1: 1}
+    expected = {(x, y + shift.get(y, 2)): c for x, y, c in board.filled_cells() if y not in (bottom, bottom - 2)}
+    lines = game.lines_cleared
+    game.clear_lines()
+    assert game.lines_cleared == lines + 2 and board.full_rows() == []
+    assert {(x, y): c for x, y, c in board.filled_cells()} == expected, "消行后方块位置不对"
+    assert all(row is None for row in board.colors[:board.top_row()]), "消行后上方仍有颜色行"
+
+    # 清空一行的最后一格时释放该行的颜色
+    top = board.top_row()
+    for x in range(board.width):
+        board.set_color(x, top, BLACK)
+    assert board.colors[top] is None and board.top_row() > top
+
+    # 快照和序列化只包含有方块的部分
+    snapshot = game.snapshot()
+    assert len(snapshot.board.colors) == (board.height - board.top_row()) * board.width
+    data = snapshot.to_bytes()
+    assert len(data) < 10000, "序列化数据不应随棋盘高度增长"
+    restored = TetrisGame.from_snapshot(GameSnapshot.from_bytes(data))
+    assert restored.snapshot() == snapshot, "大棋盘快照往返后不同"
+    print("✓ 大棋盘测试通过")
+
+def test_undo():
+    """测试放置历史：撤销回到当时的状态，重新放置得到同样的方块序列，内存有上限"""
+    from tetris import TetrisGame, GameSnapshot, InputHandler
+    from tetris_ai import AutoPlayer, play_turn
+
+    print("测试撤销...")
+    def state(game):
+        board = game.grid
+        piece = game.current_piece
+        return (tuple(board.rows), [board.get_color(x, y) for x, y, _ in board.filled_cells()],
+                board.hash, tuple(board.columns), tuple(board.holes),
+                piece.shape_index, piece.rotation, piece.x, piece.y, game.next_piece.shape_index,
+                game.score, game.lines_cleared, game.level)
+
+    player = AutoPlayer(beam_width=1, time_limit=None)
+    game = TetrisGame(seed=20)
+    history = game.record_history(capacity=40, keyframe_interval=8)
+    states = [state(game)]
+    locks = []
+    for _ in range(120):
+        assert play_turn(game, player)
+        piece = history[history.head - 1].lock
+        locks.append(piece)
+        states.append(state(game))
+    assert game.lines_cleared > 0, "测试对局应当有消行"
+    assert len(history) == 40 and len(history.entries) == 40, "历史应当只保留最近的记录"
+    assert len(history.keyframes) <= 40 // 8 + 1, "快照数量应当有上限"
+    assert history[119].lock == locks[119]
+    try:
+        history[79]
+        assert False, "被覆盖的记录不应当还能访问"
+    except IndexError:
+        pass
+
+    # 撤销一步、几步和跨过快照的很多步
+    n = 120
+    for steps in (1, 5, 3, 25):
+        assert game.undo(steps)
+        n -= steps
+        assert state(game) == states[n], f"撤销到第 {n} 次放置之前的状态不对"
+        assert game.placements == n
+    # 历史之外的不能撤销，也不改变状态
+    assert not game.undo(len(history) + 1) and state(game) == states[n]
+
+    # 撤销后退回的方块仍按原来的顺序出现；快照保存了退回的方块
+    assert game.piece_queue
+    saved = GameSnapshot.from_bytes(game.snapshot().to_bytes())
+    for _ in range(120 - n):
+        play_turn(game, player)
+        n += 1
+        assert state(game) == states[n], "撤销后重新放置的结果不同"
+    restored = TetrisGame.from_snapshot(saved)
+    assert list(restored.piece_queue) == list(saved.queue)
+
+    # 手动操作到游戏结束后撤销：与图形界面相同，撤销后重置 InputHandler 继续游戏
+    game = TetrisGame(seed=21)
+    game.record_history()
+    handler = InputHandler(game)
+    t = 0
+    while handler.alive:
+        t += 10
+        handler.press('drop', t)
+        handler.release('drop', t)
+        handler.advance(t)
+    assert not handler.advance(t + 10), "游戏应当已经结束"
+    assert game.undo() and game.is_valid_position(game.current_piece)
+    handler.reset(game)
+    assert handler.advance(t + 20), "撤销之后应当可以继续游戏"
+    handler.press('left', t + 30)
+    handler.advance(t + 30)
+    assert handler.alive and game.placements == len(game.history)
+    print("✓ 撤销测试通过")
+
+def test_input_handler():
+    """测试逻辑层的 DAS/ARR：重复在各自的时刻执行，不受帧长限制"""
+    from tetris import TetrisGame, InputHandler
+
+    print("测试按键自动重复...")
+    game = TetrisGame(seed=20, width=40)
+    game.fall_speed = 10 ** 9  # 只看水平移动
+    handler = InputHandler(game, das=100, arr=10)
+    piece = game.current_piece
+    x = piece.x
+    handler.press('left', 5.0)
+    handler.advance(50)
+    assert piece.x == x - 1, "按下时应当立即移动一格"
+    handler.advance(104.9)
+    assert piece.x == x - 1, "DAS 之前不应该重复"
+    # 一次推进 33 毫秒（比一帧长）时，期间的每次重复都要执行
+    handler.advance(138)
+    assert piece.x == x - 5, f"重复次数不对: {x - piece.x}"
+    # 后按的方向优先，松开后原来的方向重新计算 DAS
+    handler.press('right', 140)
+    handler.advance(200)
+    assert piece.x == x - 4
+    handler.release('right', 200)
+    handler.advance(299)
+    assert piece.x == x - 4, "松开后应当重新等待 DAS"
+    handler.advance(300)
+    assert piece.x == x - 5
+    handler.release('left', 300)
+    handler.advance(1000)
+    assert piece.x == x - 5, "松开后不应该再移动"
+    assert len(handler.take_latencies(1000)) == 7 and handler.take_latencies(1000) == []
+
+    # ARR 为 0 时直接移到墙边
+    handler = InputHandler(game, das=50, arr=0, time=1000)
+    handler.press('right', 1000)
+    handler.advance(1050)
+    assert not game.move_piece(1, 0), "应当已经到达右边的墙"
+
+    # 重力和输入按时间先后交错：在下落之前按下的键作用在下落之前的位置上
+    game = TetrisGame(seed=21)
+    handler = InputHandler(game, das=100, arr=10)
+    game.fall_speed = 100
+    y = game.current_piece.y
+    handler.press('down', 50)
+    handler.advance(90)
+    assert game.current_piece.y == y + 1 and game.score == 1, "软降应当立即下落并加分"
+    handler.release('down', 90)
+    handler.advance(150)
+    assert game.current_piece.y == y + 2, "重力没有按时间推进"
+    # 暂停的时间跳过，不补重力也不补重复；期间的按键在恢复时执行一次
+    x = game.current_piece.x
+    handler.press('left', 150)
+    handler.skip(10000)
+    handler.advance(10050)
+    assert game.current_piece.x == x - 1 and game.current_piece.y == y + 2
+    assert handler.advance(10000 + 100 * 20) is True
+    handler.press('drop', 12001)
+    handler.advance(12001)
+    assert game.current_piece.y <= 1, "硬降后应当出现新方块"
+    print("✓ 按键自动重复测试通过")
+
 def main():
     """运行所有测试"""
     print("开始测试俄罗斯方块游戏逻辑...\n")
@@ -151,6 +632,18 @@ def main():
         test_collision_detection()
         test_line_clearing()
         test_movement()
+        test_bitboard()
+        test_geometry_table()
+        test_hard_drop()
+        test_core_without_pygame()
+        test_seeded_pieces()
+        test_placements()
+        test_zobrist_hash()
+        test_column_index()
+        test_snapshot()
+        test_large_board()
+        test_input_handler()
+        test_undo()
         
         print("\n🎉 所有测试都通过了！")
         print("俄罗斯方块游戏逻辑工作正常。")
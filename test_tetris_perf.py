@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+帧耗时统计测试脚本
+用注入的时钟检查各阶段的累计、滚动分位数和轨迹导出
+"""
+
+import sys
+import os
+
+# 添加当前目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def test_rolling_histogram():
+    """测试滚动直方图只保留最近的样本"""
+    from tetris_perf import RollingHistogram
+
+    print("测试滚动直方图...")
+    histogram = RollingHistogram(window=100)
+    for value in range(1000):
+        histogram.add(float(value))
+    stats = histogram.summary()
+    assert len(histogram) == 100 and stats['count'] == 1000, "窗口大小不正确"
+    assert stats['p50'] == 950 and stats['max'] == 999, "分位数没有只使用最近的样本"
+    assert histogram.percentile(99) == stats['p99'] == 999
+    assert RollingHistogram().summary()['p95'] == 0.0
+    print("✓ 滚动直方图测试通过")
+
+def test_frame_profiler():
+    """测试按阶段累计每帧的耗时并导出轨迹"""
+    import csv
+    import json
+    import tempfile
+    from tetris_perf import FrameProfiler
+
+    print("测试帧耗时统计...")
+    now = [0.0]
+    profiler = FrameProfiler(clock=lambda: now[0])
+
+    def tick(seconds):
+        now[0] += seconds
+
+    draw = profiler.wrap("draw_piece", lambda: tick(0.002))
+    for _ in range(3):
+        profiler.begin_frame()
+        with profiler.measure("update"):
+            tick(0.001)
+        draw()
+        draw()  # 同一帧内的同名阶段累加
+        profiler.end_frame()
+
+    summary = profiler.summary()
+    assert list(summary) == ['update', 'draw_piece', 'frame'], "阶段顺序不正确"
+    assert abs(summary['draw_piece']['p50'] - 4.0) < 1e-6, "同一帧的耗时没有累加"
+    assert abs(summary['frame']['max'] - 5.0) < 1e-6, "整帧耗时不正确"
+    assert profiler.frames == len(profiler.trace) == 3
+
+    # 单独的样本（输入延迟）不属于某一帧，也不计入帧数
+    profiler.sample("input_latency", 12.5)
+    profiler.sample("input_latency", 7.5)
+    assert profiler.summary()['input_latency']['max'] == 12.5 and profiler.frames == 3
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "trace.json")
+        profiler.dump(path)
+        with open(path) as f:
+            data = json.load(f)
+        assert len(data['frames']) == 3 and data['summary']['update']['count'] == 3
+
+        path = os.path.join(directory, "trace.csv")
+        profiler.dump(path)
+        with open(path) as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == 3 and abs(float(rows[0]['draw_piece']) - 4.0) < 1e-6, "CSV轨迹不正确"
+    print("✓ 帧耗时统计测试通过")
+
+def test_startup_timer():
+    """测试启动计时按阶段记录，合计等于从起点到最后一个标记"""
+    from tetris_perf import StartupTimer
+
+    print("测试启动计时...")
+    now = [10.0]
+    timer = StartupTimer(start=9.5, clock=lambda: now[0])
+    timer.mark("import")
+    now[0] += 0.002
+    timer.mark("init")
+    now[0] += 0.010
+    timer.mark("first_frame")
+    assert list(timer.phases) == ["import", "init", "first_frame"]
+    assert abs(timer.phases["import"] - 500.0) < 1e-6 and abs(timer.phases["init"] - 2.0) < 1e-6
+    assert abs(timer.total() - sum(timer.phases.values())) < 1e-6
+    assert "first_frame" in timer.format() and "total" in timer.format()
+    print("✓ 启动计时测试通过")
+
+def main():
+    """运行所有测试"""
+    print("开始测试帧耗时统计...\n")
+
+    try:
+        test_rolling_histogram()
+        test_frame_profiler()
+        test_startup_timer()
+        print("\n🎉 所有测试都通过了！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
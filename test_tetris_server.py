@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+多人服务器测试脚本
+在本地端口上启动服务器，检查协议、按 tick 合并的状态更新和压力测试的统计
+"""
+
+import sys
+import os
+
+# 添加当前目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def test_protocol():
+    """测试输入在 tick 内合并执行，状态行确认最大的输入序号"""
+    import asyncio
+    from tetris_server import TetrisServer
+
+    print("测试服务器协议...")
+    async def scenario():
+        server = TetrisServer(tick_rate=20, seed=7)
+        listener = await server.start("127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"1 left\n2 left\n3 rotate\nbogus\n9 fly\n")
+        errors, state = [], None
+        while state is None or int(state[2]) < 3:
+            line = (await asyncio.wait_for(reader.readline(), 2)).decode()
+            if line.startswith("ERR"):
+                errors.append(line)
+            elif line.startswith("S "):
+                state = line.split()
+        writer.write(b"stats\n")
+        while True:
+            line = (await asyncio.wait_for(reader.readline(), 2)).decode()
+            if line.startswith("STATS"):
+                break
+        writer.write(b"quit\n")
+        writer.close()
+
+        # 超过长度限制的一行：返回错误并关闭这个连接，服务器继续运行
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"1 " + b"x" * 100000 + b"\n")
+        reply = b""
+        try:
+            while True:
+                chunk = await asyncio.wait_for(reader.read(4096), 2)
+                if not chunk:
+                    break
+                reply += chunk
+        except ConnectionError:
+            pass
+        writer.close()
+        await asyncio.sleep(0.05)
+        too_long = b"ERR line too long" in reply
+        sessions = len(server.sessions)
+
+        listener.close()
+        await server.close()
+        await listener.wait_closed()
+        return errors, state, line.split(), too_long, sessions
+
+    errors, state, stats, too_long, sessions = asyncio.run(scenario())
+    assert len(errors) == 2, "错误的消息没有返回ERR"
+    assert state[2] == "3" and state[6] == "playing", "状态行没有确认全部输入"
+    assert len(state[11].split(",")) == 20, "状态行缺少棋盘"
+    assert int(stats[1]) == 1 and float(stats[2]) > 0, "统计不正确"
+    assert too_long and sessions == 0, "过长的一行没有正常结束连接"
+    print("✓ 服务器协议测试通过")
+
+def test_load_generator():
+    """测试压力测试在本地服务器上得到 tick 速率和延迟分位数"""
+    import asyncio
+    from tetris_loadgen import run_load
+
+    print("测试压力测试...")
+    result = asyncio.run(run_load(players=20, duration=1.0, rate=20, local=True,
+                                  tick_rate=30, warmup=0.3))
+    assert result['connected'] == 20 and result['errors'] == 0, "模拟玩家没有全部连接"
+    assert result['ticks_per_second'] > 0.5 * result['target_ticks_per_second'], "服务器 tick 太少"
+    latency = result['latency_ms']
+    assert 0 < latency['p50'] <= latency['p99'] <= latency['max'], "延迟分位数不正确"
+    print("✓ 压力测试测试通过")
+
+def main():
+    """运行所有测试"""
+    print("开始测试多人服务器...\n")
+
+    try:
+        test_protocol()
+        test_load_generator()
+        print("\n🎉 所有测试都通过了！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+观战数据流测试脚本
+检查增量消息能重建出与游戏相同的状态、广播时慢观众丢帧后从关键帧恢复，以及服务器的观战命令
+"""
+
+import sys
+import os
+
+# 添加当前目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def _same(view, game):
+    """观众看到的状态与游戏一致"""
+    piece = game.current_piece
+    board = game.grid
+    return (view.board.rows == board.rows and view.board.hash == board.hash and
+            all(view.board.get_color(x, y) == board.get_color(x, y)
+                for y in range(board.top_row(), board.height) for x in range(board.width)) and
+            view.piece == (piece.shape_index, piece.rotation, piece.x, piece.y) and
+            view.next_shape == game.next_piece.shape_index and
+            (view.score, view.lines_cleared, view.level) == (game.score, game.lines_cleared, game.level))
+
+def test_delta_stream():
+    """测试关键帧之后的增量消息重建出同样的对局，且远小于每帧发送整个棋盘"""
+    import random
+    from tetris_core import TetrisGame, SHAPE_COLORS
+    from tetris_spectate import SpectatorEncoder, SpectatorView, encode_keyframe, KEYFRAME
+
+    print("测试增量观战消息...")
+    game = TetrisGame(seed=23)
+    encoder = SpectatorEncoder()
+    view = SpectatorView()
+    rng = random.Random(23)
+    delta_bytes = full_bytes = 0
+    for tick in range(3000):
+        action = rng.randrange(12)
+        if action == 0:
+            alive = game.hard_drop()
+        elif action < 3:
+            alive = game.move_piece(1 if action == 1 else -1, 0) or True
+        elif action == 3:
+            alive = game.rotate_piece() or True
+        else:
+            alive = game.update(1000 / 60)
+        if not alive:
+            game = TetrisGame(seed=tick)
+        message = encoder.encode(game, tick)
+        full_bytes += len(encode_keyframe(game, tick))
+        if message is not None:
+            delta_bytes += len(message)
+            assert view.apply(message) == tick
+            assert _same(view, game), f"第 {tick} 个 tick 观众的状态不同"
+    assert encoder.deltas > 10 * encoder.keyframes, "关键帧太多"
+    assert delta_bytes * 10 < full_bytes, f"增量不够小: {delta_bytes} / {full_bytes}"
+
+    # 一个 tick 内放置两个方块、或者棋盘被直接修改时改发关键帧
+    game.hard_drop()
+    game.hard_drop()
+    assert encoder.encode(game, 3000)[:1] == KEYFRAME
+    game.grid.set_color(0, game.grid.height - 1, SHAPE_COLORS[2])
+    message = encoder.encode(game, 3001)
+    assert message[:1] == KEYFRAME and view.apply(message) == 3001 and _same(view, game)
+    assert encoder.encode(game, 3002) is None, "没有变化时不应该有消息"
+    print("✓ 增量观战消息测试通过")
+
+def test_broadcaster():
+    """测试慢观众丢帧后下一次收到关键帧，其他观众不受影响"""
+    import asyncio
+    from tetris_core import TetrisGame
+    from tetris_spectate import SpectatorBroadcaster, SpectatorView, KEYFRAME, DELTA
+
+    print("测试观战广播...")
+    async def scenario():
+        game = TetrisGame(seed=24)
+        broadcaster = SpectatorBroadcaster(max_queue=4)
+        fast, slow = broadcaster.subscribe(), broadcaster.subscribe()
+        view = SpectatorView()
+        for tick in range(1, 6):
+            game.move_piece(1 if tick % 2 else -1, 0)
+            broadcaster.publish(game, tick)
+            view.apply(await fast.get())  # 快的观众每个 tick 都取走
+        assert slow.dropped == 1 and slow.stale and slow.queue.empty(), "慢观众没有丢帧"
+        game.hard_drop()
+        broadcaster.publish(game, 6)
+        message = await slow.get()
+        assert message[:1] == KEYFRAME, "丢帧之后应当从关键帧开始"
+        message = await fast.get()
+        assert message[:1] == DELTA and view.apply(message) == 6 and _same(view, game)
+        broadcaster.close()
+        return await fast.get(), await slow.get()
+
+    assert asyncio.run(scenario()) == (None, None), "结束广播时观众没有收到 None"
+    print("✓ 观战广播测试通过")
+
+def test_watch_command():
+    """测试通过服务器观战另一个连接的对局"""
+    import asyncio
+    from tetris_server import TetrisServer
+    from tetris_spectate import SpectatorView, read_message, KEYFRAME
+
+    print("测试服务器观战...")
+    async def scenario():
+        server = TetrisServer(tick_rate=50, seed=9)
+        listener = await server.start("127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        player_reader, player = await asyncio.open_connection("127.0.0.1", port)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"games\n")
+        while True:
+            line = await asyncio.wait_for(reader.readline(), 2)
+            if line.startswith(b"GAMES"):
+                break
+        writer.write(b"watch 1\n")
+        while not (await asyncio.wait_for(reader.readline(), 2)).startswith(b"WATCH 1"):
+            pass
+        view = SpectatorView()
+        kinds = []
+        for seq in range(1, 6):
+            player.write(f"{seq} drop\n".encode())
+            message = await asyncio.wait_for(read_message(reader), 2)
+            kinds.append(message[:1])
+            view.apply(message)
+        session = server.games[1]
+
+        # 已经结束的对局不再有消息要发：观众断开时也要及时取消订阅
+        player.write("".join(f"{seq} drop\n" for seq in range(6, 60)).encode())
+        for _ in range(100):
+            if session.state == "over":
+                break
+            await asyncio.sleep(0.02)
+        late_reader, late = await asyncio.open_connection("127.0.0.1", port)
+        late.write(b"watch 1\n")
+        while not (await asyncio.wait_for(late_reader.readline(), 2)).startswith(b"WATCH 1"):
+            pass
+        await asyncio.wait_for(read_message(late_reader), 2)
+        late.close()
+        await asyncio.sleep(0.1)
+        over, watchers = session.state, len(session.spectators.subscribers)
+
+        player.write(b"quit\n")
+        # 读完积压的消息，之后连接应当关闭
+        ended = True
+        while ended is not None:
+            ended = await asyncio.wait_for(read_message(reader), 2)
+        writer.close()
+        listener.close()
+        await server.close()
+        await listener.wait_closed()
+        return line.split(), kinds, view, session, ended, over, watchers
+
+    games, kinds, view, session, ended, over, watchers = asyncio.run(scenario())
+    assert games == [b"GAMES", b"1", b"2"], "对局列表不正确"
+    assert kinds[0] == KEYFRAME and KEYFRAME not in kinds[1:], "应当只有第一条是关键帧"
+    assert view.board.top_row() < view.board.height and 0 < view.score <= session.game.score, "观众没有看到玩家的操作"
+    assert over == "over" and watchers == 1, "断开的观众没有取消订阅"
+    print("✓ 服务器观战测试通过")
+
+def main():
+    """运行所有测试"""
+    print("开始测试观战数据流...\n")
+
+    try:
+        test_delta_stream()
+        test_broadcaster()
+        test_watch_command()
+        print("\n🎉 所有测试都通过了！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
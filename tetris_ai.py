@@ -0,0 +1,263 @@
+"""
+俄罗斯方块自动玩家
+用启发式函数（总高度、洞数、凹凸度、消行数）给落点打分，
+沿着当前方块和 next_piece 做限时的束搜索
+"""
+
+import time
+from collections import OrderedDict
+
+from tetris_core import (
+    GEOMETRY, SHAPE_COLORS,
+    MOVE_LEFT, MOVE_RIGHT, MOVE_DOWN, ROTATE,
+    find_placements, find_moves,
+)
+
+# 启发式权重：高度、洞和凹凸度是惩罚，消行是奖励
+DEFAULT_WEIGHTS = {
+    'height': -0.510066,
+    'lines': 0.760666,
+    'holes': -0.35663,
+    'bumpiness': -0.184483,
+}
+
+# 平移类输入对应的 (dx, dy)
+MOVE_DELTAS = {MOVE_LEFT: (-1, 0), MOVE_RIGHT: (1, 0), MOVE_DOWN: (0, 1)}
+
+# 放置后新方块无法出现（游戏结束）时的得分
+GAME_OVER_SCORE = float('-inf')
+
+
+def board_features(board):
+    """计算棋盘特征：(总高度, 洞数, 凹凸度)，直接读取棋盘维护的列索引"""
+    heights = board.heights
+    bumpiness = sum(abs(a - b) for a, b in zip(heights, heights[1:]))
+    return sum(heights), sum(board.holes), bumpiness
+
+
+def evaluate(board, lines, weights=DEFAULT_WEIGHTS, cache=None):
+    """按权重给棋盘打分，分数越高越好
+
+    给出 cache 时按棋盘的 Zobrist 哈希缓存特征，重复出现的局面不再重新计算。
+    """
+    if cache is None:
+        features = board_features(board)
+    else:
+        features = cache.get(board.hash)
+        if features is None:
+            features = board_features(board)
+            cache.put(board.hash, features)
+    aggregate, holes, bumpiness = features
+    return (weights['height'] * aggregate + weights['lines'] * lines +
+            weights['holes'] * holes + weights['bumpiness'] * bumpiness)
+
+
+class EvalCache:
+    """有容量上限的LRU缓存：棋盘哈希 -> 评估结果，记录命中和未命中次数"""
+
+    def __init__(self, maxsize=65536):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """查找缓存，未命中返回 None"""
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def spawn_position(board):
+    """新方块出现的位置，与 TetrisGame.new_piece 相同"""
+    return board.width // 2 - 2, 0
+
+
+def simulate(board, shape_index, placement):
+    """在棋盘副本上放置方块并消行，返回 (新棋盘, 消除的行数)"""
+    child = board.copy()
+    geometry = GEOMETRY[shape_index][placement.rotation]
+    cells = [(placement.x + dx, placement.y + dy) for dx, dy in geometry.cells]
+    full = child.full_rows(child.lock(cells, SHAPE_COLORS[shape_index]))
+    child.remove_rows(full)
+    return child, len(full)
+
+
+class SearchNode:
+    """束搜索中的一个节点：第一步的落点、放置后的棋盘、累计消行和得分"""
+    __slots__ = ('placement', 'board', 'lines', 'score')
+
+    def __init__(self, placement, board, lines, score):
+        self.placement = placement
+        self.board = board
+        self.lines = lines
+        self.score = score
+
+
+class AutoPlayer:
+    """限时束搜索的自动玩家
+
+    第一层枚举当前方块的所有落点并打分，保留得分最高的 beam_width 个，
+    第二层再为这些节点枚举 next_piece 的落点，用最好的子节点重新打分。
+    超过 time_limit（秒）就停止展开，只在已经打过分或展开过的节点中做决定
+    （第一层也不例外，至少评估一个落点）；
+    time_limit 为 None 时不限时，结果可以复现。
+    """
+
+    def __init__(self, beam_width=8, time_limit=0.012, weights=DEFAULT_WEIGHTS, cache_size=65536):
+        self.beam_width = beam_width
+        self.time_limit = time_limit
+        self.weights = weights
+        # 棋盘哈希 -> 特征，跨决策保留：上一步第二层的棋盘就是这一步第一层的棋盘
+        self.feature_cache = EvalCache(cache_size)
+        # 最近一次决策的统计：评估的节点数、完整搜索的层数和耗时（秒）
+        self.last_nodes = 0
+        self.last_depth = 0
+        self.last_elapsed = 0.0
+
+    def _best_child(self, board, shape_index, lines, deadline):
+        """方块从出生位置落下后能得到的最好分数，超时返回 None"""
+        x, y = spawn_position(board)
+        best = GAME_OVER_SCORE
+        for placement in find_placements(board, shape_index, x, y, moves=False):
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            child, cleared = simulate(board, shape_index, placement)
+            best = max(best, evaluate(child, lines + cleared, self.weights, self.feature_cache))
+            self.last_nodes += 1
+        return best
+
+    def choose(self, game):
+        """为 game 的当前方块选择落点，没有可用落点时返回 None"""
+        start = time.perf_counter()
+        deadline = None if self.time_limit is None else start + self.time_limit
+        self.last_nodes = 0
+        self.last_depth = 0
+
+        piece = game.current_piece
+        board = game.grid
+        spawn_x, spawn_y = spawn_position(board)
+        next_shape = game.next_piece.shape_index
+        next_geometry = GEOMETRY[next_shape][0]
+
+        # 第一层：当前方块从当前位置出发，时间用完就只在已经打过分的落点中选
+        beam = []
+        complete = True
+        # 只枚举落点，输入序列等选定以后再还原（高棋盘上每条序列都有上万步）
+        for placement in find_placements(board, piece.shape_index, piece.x, piece.y, piece.rotation,
+                                         moves=False):
+            if beam and deadline is not None and time.perf_counter() >= deadline:
+                complete = False
+                break
+            child, cleared = simulate(board, piece.shape_index, placement)
+            if child.fits_piece(next_geometry, spawn_x, spawn_y):
+                score = evaluate(child, cleared, self.weights, self.feature_cache)
+            else:
+                score = GAME_OVER_SCORE
+            beam.append(SearchNode(placement, child, cleared, score))
+        self.last_nodes = len(beam)
+        if not beam:
+            self.last_elapsed = time.perf_counter() - start
+            return None
+        beam.sort(key=lambda node: node.score, reverse=True)
+        best = beam[0]
+        if complete:
+            self.last_depth = 1
+
+        # 第二层：按第一层得分从高到低展开，时间用完就停；第一层没有搜完时不展开
+        candidates = [node for node in beam[:self.beam_width] if node.score != GAME_OVER_SCORE]
+        if not complete:
+            candidates = []
+        expanded = []
+        for node in candidates:
+            score = self._best_child(node.board, next_shape, node.lines, deadline)
+            if score is None:
+                break
+            node.score = score
+            expanded.append(node)
+        if expanded:
+            best = max(expanded, key=lambda node: node.score)
+            if len(expanded) == len(candidates):
+                self.last_depth = 2
+
+        moves = find_moves(board, piece.shape_index, piece.x, piece.y, piece.rotation, best.placement)
+        self.last_elapsed = time.perf_counter() - start
+        return best.placement._replace(moves=moves)
+
+
+def plan_moves(placement):
+    """把落点的输入序列转换成操作计划：去掉末尾的连续下移，改用硬降完成"""
+    moves = list(placement.moves)
+    while moves and moves[-1] == MOVE_DOWN:
+        moves.pop()
+    return moves
+
+
+def play_turn(game, player):
+    """无界面模式下走一步：选择落点、直接放置，返回游戏是否仍在进行"""
+    placement = player.choose(game)
+    if placement is None:
+        return game.place_piece()
+    piece = game.current_piece
+    piece.x, piece.y, piece.rotation = placement.x, placement.y, placement.rotation
+    return game.place_piece()
+
+
+class AutoPilot:
+    """在实时游戏中执行自动玩家的决策
+
+    每个新方块决策一次，之后每次 step 只执行 moves_per_step 个输入，
+    输入序列走完后硬降；如果重力或其他原因让某个输入失败，就重新决策。
+    """
+
+    def __init__(self, player=None, moves_per_step=1):
+        self.player = player if player is not None else AutoPlayer()
+        self.moves_per_step = moves_per_step
+        self.reset()
+
+    def reset(self):
+        self.piece = None
+        self.plan = None
+
+    def step(self, game):
+        """执行一步，返回游戏是否仍在进行"""
+        if game.current_piece is not self.piece or self.plan is None:
+            self.piece = game.current_piece
+            placement = self.player.choose(game)
+            self.plan = plan_moves(placement) if placement is not None else []
+        for _ in range(self.moves_per_step):
+            if not self.plan:
+                self.plan = None
+                return game.hard_drop()
+            move = self.plan.pop(0)
+            if move == ROTATE:
+                ok = game.rotate_piece()
+            else:
+                ok = game.move_piece(*MOVE_DELTAS[move])
+            if not ok:
+                self.plan = None
+                break
+        return True
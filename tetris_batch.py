@@ -0,0 +1,155 @@
+"""
+俄罗斯方块批量模拟器
+用NumPy把N个棋盘放在同一个数组里同步推进，规则与 TetrisGame 相同，
+适合在单核上大量评估落子策略（不包含下落计时和渲染）
+"""
+
+import numpy as np
+
+from tetris_core import GEOMETRY, GRID_WIDTH, GRID_HEIGHT, LINE_SCORES
+
+# 棋盘每行是一个int64：第 x 列在第 x + PAD 位，左右两侧的墙位预先置1，
+# 这样越界检查和重叠检查都变成一次按位与
+PAD = 4
+# 顶部留出的空行（只有墙位）和底部的实心地板行，保证5x5的方块窗口不会越界
+TOP = 4
+FLOOR = 5
+PIECE_ROWS = 5
+
+NUM_SHAPES = len(GEOMETRY)
+NUM_ROTATIONS = np.array([len(rotations) for rotations in GEOMETRY], dtype=np.int64)
+
+# 几何表的数组版本：PIECE_MASKS[形状, 旋转, 行] 是方块在该行的掩码（未平移）
+MAX_ROTATIONS = max(len(rotations) for rotations in GEOMETRY)
+PIECE_MASKS = np.zeros((NUM_SHAPES, MAX_ROTATIONS, PIECE_ROWS), dtype=np.int64)
+for _shape, _rotations in enumerate(GEOMETRY):
+    for _rotation in range(MAX_ROTATIONS):
+        for _dy, _mask in _rotations[_rotation % len(_rotations)].row_masks:
+            PIECE_MASKS[_shape, _rotation, _dy] = _mask
+
+# LINE_SCORES 的数组版本，按一次消除的行数索引
+SCORE_TABLE = np.array([LINE_SCORES.get(n, 0) for n in range(PIECE_ROWS)], dtype=np.int64)
+
+
+class BatchTetris:
+    """N局同步进行的俄罗斯方块
+
+    所有操作都作用于全部仍在进行的棋局；move 的 dx/dy 可以是标量，
+    也可以是长度为N的数组（每局不同）。已经结束的棋局不再变化。
+    """
+
+    def __init__(self, n, width=GRID_WIDTH, height=GRID_HEIGHT, seed=None):
+        if width + 2 * PAD > 63:
+            raise ValueError("棋盘宽度超出int64位棋盘的范围")
+        self.n = n
+        self.width = width
+        self.height = height
+        self.rng = np.random.default_rng(seed)
+
+        self.field_mask = ((1 << width) - 1) << PAD
+        self.wall = ~self.field_mask
+        self.boards = np.full((n, TOP + height + FLOOR), self.wall, dtype=np.int64)
+        self.boards[:, TOP + height:] = -1  # 地板
+
+        self.index = np.arange(n)
+        self.window = np.arange(PIECE_ROWS)
+        self.spawn_x = width // 2 - 2
+
+        self.shape = self.rng.integers(0, NUM_SHAPES, n)
+        self.next_shape = self.rng.integers(0, NUM_SHAPES, n)
+        self.rotation = np.zeros(n, dtype=np.int64)
+        self.x = np.full(n, self.spawn_x, dtype=np.int64)
+        self.y = np.zeros(n, dtype=np.int64)
+
+        self.score = np.zeros(n, dtype=np.int64)
+        self.lines_cleared = np.zeros(n, dtype=np.int64)
+        self.level = np.ones(n, dtype=np.int64)
+        self.pieces_placed = np.zeros(n, dtype=np.int64)
+        self.alive = self.fits(self.shape, self.rotation, self.x, self.y)
+
+    def fits(self, shape, rotation, x, y):
+        """检查每一局中方块放在 (x, y) 时是否有效，返回布尔数组"""
+        # 远离棋盘的坐标一定无效；先截断到安全范围，避免移位和索引越界
+        inside = (x >= -PAD) & (x <= 63 - PAD - PIECE_ROWS) & (y >= -TOP) & (y <= self.height)
+        shift = np.clip(x + PAD, 0, 63 - PIECE_ROWS)
+        top = np.clip(y + TOP, 0, TOP + self.height)
+        masks = PIECE_MASKS[shape, rotation] << shift[:, None]
+        rows = self.boards[self.index[:, None], top[:, None] + self.window]
+        return inside & ~np.any(masks & rows, axis=1)
+
+    def move(self, dx, dy=0):
+        """移动方块，返回每局是否移动成功"""
+        dx = np.broadcast_to(np.asarray(dx, dtype=np.int64), (self.n,))
+        dy = np.broadcast_to(np.asarray(dy, dtype=np.int64), (self.n,))
+        ok = self.alive & self.fits(self.shape, self.rotation, self.x + dx, self.y + dy)
+        self.x += np.where(ok, dx, 0)
+        self.y += np.where(ok, dy, 0)
+        return ok
+
+    def rotate(self):
+        """旋转方块，返回每局是否旋转成功"""
+        new_rotation = (self.rotation + 1) % NUM_ROTATIONS[self.shape]
+        ok = self.alive & self.fits(self.shape, new_rotation, self.x, self.y)
+        self.rotation = np.where(ok, new_rotation, self.rotation)
+        return ok
+
+    def drop(self):
+        """把方块直接落到底（不放置），每下降一格+2分，返回每局下落的格数"""
+        distance = np.zeros(self.n, dtype=np.int64)
+        falling = self.alive.copy()
+        while falling.any():
+            falling &= self.fits(self.shape, self.rotation, self.x, self.y + distance + 1)
+            distance += falling
+        self.y += distance
+        self.score += 2 * distance
+        return distance
+
+    def place(self):
+        """放置方块、消行、计分并生成新方块，返回每局是否仍在进行"""
+        alive = self.alive
+        masks = PIECE_MASKS[self.shape, self.rotation] << (self.x + PAD)[:, None]
+        masks[~alive] = 0
+        rows = (self.y + TOP)[:, None] + self.window
+        self.boards[self.index[:, None], rows] |= masks
+        # 超出顶部的单元格直接丢弃，与 TetrisGame 一致
+        self.boards[:, :TOP] = self.wall
+        self.pieces_placed += alive
+
+        cleared = self.clear_lines()
+
+        # 消行得分使用消行前的等级
+        self.score += SCORE_TABLE[cleared] * self.level
+        self.lines_cleared += cleared
+        self.level = self.lines_cleared // 10 + 1
+
+        spawned = self.rng.integers(0, NUM_SHAPES, self.n)
+        self.shape = np.where(alive, self.next_shape, self.shape)
+        self.next_shape = np.where(alive, spawned, self.next_shape)
+        self.rotation[alive] = 0
+        self.x[alive] = self.spawn_x
+        self.y[alive] = 0
+        self.alive = alive & self.fits(self.shape, self.rotation, self.x, self.y)
+        return self.alive
+
+    def hard_drop(self):
+        """硬降：落到底并放置"""
+        self.drop()
+        return self.place()
+
+    def clear_lines(self):
+        """移除所有完整的行，返回每局消除的行数"""
+        field = self.boards[:, TOP:TOP + self.height]
+        full = (field & self.field_mask) == self.field_mask
+        cleared = full.sum(axis=1)
+        if cleared.any():
+            # 稳定排序把完整行移到顶部，其余行保持原有顺序落到底部，再把顶部清空
+            order = np.argsort(~full, axis=1, kind='stable')
+            field = np.take_along_axis(field, order, axis=1)
+            empty = np.arange(self.height)[None, :] < cleared[:, None]
+            self.boards[:, TOP:TOP + self.height] = np.where(empty, self.wall, field)
+        return cleared
+
+    def row_masks(self):
+        """返回 (N, 高度) 的行掩码数组，位布局与 Board.rows 相同"""
+        field = self.boards[:, TOP:TOP + self.height]
+        return (field & self.field_mask) >> PAD
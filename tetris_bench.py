@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+俄罗斯方块性能基准
+每个基准使用固定种子生成同样的工作负载，重复运行取中位数，结果可以保存为JSON，
+并与保存的基线比较，速度下降超过阈值的项目记为回退
+用法: python3 tetris_bench.py -o baseline.json
+      python3 tetris_bench.py --compare baseline.json --threshold 0.1
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+from tetris_core import GRID_WIDTH, GRID_HEIGHT, SHAPES, SHAPE_COLORS, Piece, TetrisGame
+
+
+def _filled_game(rng, rows):
+    """底部 rows 行随机填充（每行留一个空位）的对局"""
+    game = TetrisGame(seed=rng.randrange(1 << 30))
+    for y in range(GRID_HEIGHT - rows, GRID_HEIGHT):
+        hole = rng.randrange(GRID_WIDTH)
+        for x in range(GRID_WIDTH):
+            if x != hole:
+                game.grid[y][x] = SHAPE_COLORS[rng.randrange(len(SHAPE_COLORS))]
+    return game
+
+
+def _random_pieces(rng, count):
+    pieces = []
+    for _ in range(count):
+        piece = Piece(rng.randrange(-1, GRID_WIDTH - 1), rng.randrange(GRID_HEIGHT - 3),
+                      rng.randrange(len(SHAPES)))
+        piece.rotation = rng.randrange(len(SHAPES[piece.shape_index]))
+        pieces.append(piece)
+    return pieces
+
+
+def bench_get_cells(rng, scale):
+    """Piece.get_cells：随机形状、旋转和位置"""
+    pieces = _random_pieces(rng, 2000 * scale)
+    start = time.perf_counter()
+    for piece in pieces:
+        piece.get_cells()
+    return len(pieces), time.perf_counter() - start
+
+
+def bench_is_valid_position(rng, scale):
+    """is_valid_position：半满的棋盘上检查随机位置"""
+    game = _filled_game(rng, 10)
+    pieces = _random_pieces(rng, 2000 * scale)
+    is_valid_position = game.is_valid_position
+    start = time.perf_counter()
+    for piece in pieces:
+        is_valid_position(piece)
+    return len(pieces), time.perf_counter() - start
+
+
+def bench_clear_lines(rng, scale):
+    """clear_lines：每个棋盘有0~4个完整行"""
+    games = []
+    for _ in range(200 * scale):
+        game = _filled_game(rng, rng.randrange(4, 16))
+        for y in rng.sample(range(GRID_HEIGHT - 4, GRID_HEIGHT), rng.randrange(5)):
+            for x in range(GRID_WIDTH):
+                game.grid[y][x] = SHAPE_COLORS[0]
+        games.append(game)
+    start = time.perf_counter()
+    for game in games:
+        game.clear_lines()
+    return len(games), time.perf_counter() - start
+
+
+def bench_hard_drop(rng, scale):
+    """hard_drop：从随机位置落下并放置（包括消行和生成新方块）"""
+    games = []
+    for _ in range(200 * scale):
+        game = _filled_game(rng, rng.randrange(12))
+        game.move_piece(rng.randint(-4, 4), 0)
+        games.append(game)
+    start = time.perf_counter()
+    for game in games:
+        game.hard_drop()
+    return len(games), time.perf_counter() - start
+
+
+def bench_find_placements(rng, scale):
+    """find_placements：半满棋盘上当前方块的所有落点（不还原输入序列），单位是棋盘/秒"""
+    from tetris_core import find_placements
+    games = [_filled_game(rng, rng.randrange(12)) for _ in range(200 * scale)]
+    start = time.perf_counter()
+    for game in games:
+        piece = game.current_piece
+        find_placements(game.grid, piece.shape_index, piece.x, piece.y, piece.rotation, moves=False)
+    return len(games), time.perf_counter() - start
+
+
+def bench_headless_game(rng, scale):
+    """无界面完整对局（随机策略），单位是方块/秒"""
+    from run_simulation import play_game
+    seeds = [rng.randrange(1 << 30) for _ in range(20 * scale)]
+    start = time.perf_counter()
+    pieces = sum(play_game(seed)['pieces'] for seed in seeds)
+    return pieces, time.perf_counter() - start
+
+
+def bench_render(rng, scale):
+    """TetrisRenderer.render：SDL dummy驱动下的帧率，每帧之间操作一次游戏"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    import pygame
+    from tetris_gui import TetrisRenderer, WINDOW_WIDTH, WINDOW_HEIGHT
+
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    game = TetrisGame(seed=rng.randrange(1 << 30))
+    renderer = TetrisRenderer(screen)
+    renderer.render(game, "playing")
+    frames = 300 * scale
+    elapsed = 0.0
+    for _ in range(frames):
+        action = rng.randrange(10)
+        if action == 0:
+            alive = game.hard_drop()
+        elif action == 1:
+            alive = game.rotate_piece() or True
+        else:
+            alive = game.move_piece(rng.choice((-1, 0, 1)), action % 2) or True
+        if not alive:
+            game = TetrisGame(seed=rng.randrange(1 << 30))
+        start = time.perf_counter()
+        renderer.render(game, "playing")
+        elapsed += time.perf_counter() - start
+    return frames, elapsed
+
+
+def bench_env_step(rng, scale):
+    """TetrisEnv.step：随机动作，结束时重新开始（需要numpy）"""
+    from tetris_env import TetrisEnv, ACTIONS
+    env = TetrisEnv()
+    env.reset(seed=rng.randrange(1 << 30))
+    actions = [rng.randrange(len(ACTIONS)) for _ in range(20000 * scale)]
+    step = env.step
+    start = time.perf_counter()
+    for action in actions:
+        if step(action)[2]:
+            env.reset(seed=action)
+    return len(actions), time.perf_counter() - start
+
+
+# 基准名 -> (函数(rng, scale) 返回 (操作数, 秒), 速率单位)
+BENCHMARKS = {
+    'get_cells': (bench_get_cells, 'ops/s'),
+    'is_valid_position': (bench_is_valid_position, 'ops/s'),
+    'clear_lines': (bench_clear_lines, 'ops/s'),
+    'hard_drop': (bench_hard_drop, 'ops/s'),
+    'find_placements': (bench_find_placements, 'boards/s'),
+    'headless_game': (bench_headless_game, 'pieces/s'),
+    'render': (bench_render, 'fps'),
+    'env_step': (bench_env_step, 'steps/s'),
+}
+
+
+def run_benchmark(name, seed=0, repeat=5, scale=1):
+    """重复运行一个基准，每次使用相同的种子，返回结果字典"""
+    bench, unit = BENCHMARKS[name]
+    rates = []
+    ops = 0
+    for _ in range(repeat):
+        ops, seconds = bench(random.Random(f"{seed}:{name}"), scale)
+        rates.append(ops / seconds)
+    return {
+        'unit': unit,
+        'ops': ops,
+        'rate': statistics.median(rates),
+        'best': max(rates),
+        'runs': rates,
+    }
+
+
+def run(names=None, seed=0, repeat=5, scale=1):
+    """运行选中的基准（默认全部），返回可以保存为JSON的报告"""
+    names = list(BENCHMARKS) if names is None else names
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'seed': seed,
+            'repeat': repeat,
+            'scale': scale,
+        },
+        'results': {name: run_benchmark(name, seed, repeat, scale) for name in names},
+    }
+
+
+def compare(report, baseline, threshold=0.1):
+    """与基线比较中位数速率，返回 [(名称, 基线, 当前, 比值, 是否回退)]"""
+    rows = []
+    for name, result in report['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        ratio = result['rate'] / base['rate']
+        rows.append((name, base['rate'], result['rate'], ratio, ratio < 1 - threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="运行带种子的性能基准，可与基线比较")
+    parser.add_argument("-b", "--bench", action="append", choices=sorted(BENCHMARKS),
+                        help="只运行指定的基准（可重复），默认全部")
+    parser.add_argument("--seed", type=int, default=0, help="工作负载的种子")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="每个基准重复的次数")
+    parser.add_argument("--scale", type=int, default=1, help="工作负载的倍数")
+    parser.add_argument("-o", "--output", help="把结果写入JSON文件")
+    parser.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    parser.add_argument("--compare", metavar="BASELINE", help="与保存的基线JSON比较")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="速率下降超过该比例记为回退（默认0.1）")
+    args = parser.parse_args(argv)
+
+    report = run(args.bench, args.seed, args.repeat, args.scale)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        for name, result in report['results'].items():
+            print(f"{name:<18} {result['rate']:>12,.0f} {result['unit']:<9} "
+                  f"(最好 {result['best']:,.0f})")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.threshold)
+        print(f"\n与基线 {args.compare} 比较（阈值 {args.threshold:.0%}）:", file=sys.stderr)
+        for name, base, current, ratio, regressed in rows:
+            flag = "回退" if regressed else "正常"
+            print(f"  {name:<18} {base:>12,.0f} -> {current:>12,.0f}  {ratio:6.2f}x  {flag}",
+                  file=sys.stderr)
+        if any(row[4] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
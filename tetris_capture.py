@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+离屏录制
+用 TetrisRenderer 把对局画到离屏表面上，不需要显示设备，也不按真实时间运行；
+每帧以零拷贝的NumPy视图（与 pygame.surfarray.pixels3d 相同的 (宽, 高, 3) 布局）提供，
+可以交给后台线程写成原始RGB流或PNG序列
+用法: python3 tetris_capture.py --seed 0 --frames 600 --format png -o frames
+"""
+
+import os
+
+# 录制不需要真实的显示设备（用户显式指定的驱动优先）
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import json
+import queue
+import threading
+import time
+
+import numpy as np
+import pygame
+
+from tetris_core import TetrisGame
+from tetris_ai import AutoPilot, AutoPlayer
+from tetris_gui import TetrisRenderer, WINDOW_WIDTH, WINDOW_HEIGHT, TICK_RATE
+
+
+class FrameRecorder:
+    """在离屏表面上逐帧推进并渲染一局游戏
+
+    每一帧执行一次固定步长的逻辑更新（与 main() 的一个 tick 相同），不等待真实时间。
+    autoplay 为真时由不限时的自动玩家操作，同一种子总是得到相同的画面。
+
+    表面直接建在一块NumPy内存上，pixels 是这块内存的 (宽, 高, 3) 视图，
+    始终反映最新一帧。surfarray.pixels3d 的视图存在期间表面会被锁定、无法继续渲染，
+    而这里的视图不加锁，可以一直持有。
+    """
+
+    def __init__(self, seed=None, autoplay=True, tick_rate=TICK_RATE):
+        self.buffer = np.zeros((WINDOW_HEIGHT, WINDOW_WIDTH, 4), dtype=np.uint8)
+        self.surface = pygame.image.frombuffer(self.buffer, (WINDOW_WIDTH, WINDOW_HEIGHT), "RGBX")
+        self.pixels = self.buffer.transpose(1, 0, 2)[:, :, :3]
+        self.renderer = TetrisRenderer(self.surface)
+        self.game = TetrisGame(seed=seed)
+        self.pilot = AutoPilot(AutoPlayer(time_limit=None)) if autoplay else None
+        self.tick_ms = 1000.0 / tick_rate
+        self.state = "playing"
+        self.frame_index = 0
+
+    def step(self):
+        """推进一帧并渲染，返回游戏是否仍在进行"""
+        if self.state == "playing":
+            if self.pilot is not None and not self.pilot.step(self.game):
+                self.state = "game_over"
+            elif not self.game.update(self.tick_ms):
+                self.state = "game_over"
+        self.renderer.render(self.game, self.state)
+        self.frame_index += 1
+        return self.state == "playing"
+
+    def frames(self, count=None, writer=None):
+        """逐帧生成 (帧号, 像素视图)，到 count 帧或游戏结束为止
+
+        每次生成的都是同一个视图，内容在下一帧被覆盖，需要保留时自行复制；
+        给出 writer 时每一帧也交给它写盘。
+        """
+        while count is None or self.frame_index < count:
+            alive = self.step()
+            if writer is not None:
+                writer.submit(self.pixels)
+            yield self.frame_index - 1, self.pixels
+            if not alive:
+                break
+
+
+class FrameWriter:
+    """后台写盘线程
+
+    submit 把视图复制成按行存储的RGB数组放进有界队列，队列满时阻塞，
+    写盘跟不上时不会无限占用内存。format 为 'raw' 时所有帧依次写入 frames.rgb，
+    关闭时写 frames.json 记录尺寸和帧数；为 'png' 时每帧一个 frame_000000.png。
+    """
+
+    def __init__(self, directory, format='raw', queue_size=64):
+        if format not in ('raw', 'png'):
+            raise ValueError(f"不支持的格式: {format}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.format = format
+        self.count = 0
+        self.size = None
+        self.error = None
+        self._queue = queue.Queue(queue_size)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, pixels):
+        """提交一帧 (宽, 高, 3) 的像素"""
+        if self.error is not None:
+            raise self.error
+        frame = np.ascontiguousarray(pixels.transpose(1, 0, 2))
+        self.size = (frame.shape[1], frame.shape[0])
+        self._queue.put((self.count, frame))
+        self.count += 1
+
+    def _run(self):
+        raw = None
+        if self.format == 'raw':
+            raw = open(os.path.join(self.directory, "frames.rgb"), "wb")
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                if self.error is not None:
+                    continue  # 出错后只清空队列，不让 submit 阻塞
+                index, frame = item
+                try:
+                    if raw is not None:
+                        raw.write(frame)
+                    else:
+                        height, width = frame.shape[:2]
+                        surface = pygame.image.frombuffer(frame, (width, height), "RGB")
+                        pygame.image.save(surface, os.path.join(self.directory, f"frame_{index:06d}.png"))
+                except Exception as e:
+                    self.error = e
+        finally:
+            if raw is not None:
+                raw.close()
+
+    def close(self):
+        """等待队列写完；原始格式同时写出描述文件"""
+        self._queue.put(None)
+        self._thread.join()
+        if self.format == 'raw' and self.size is not None:
+            with open(os.path.join(self.directory, "frames.json"), "w") as f:
+                json.dump({'width': self.size[0], 'height': self.size[1],
+                           'pixel_format': 'rgb24', 'frames': self.count}, f)
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="离屏录制自动演示的画面")
+    parser.add_argument("--seed", type=int, default=0, help="对局种子")
+    parser.add_argument("--frames", type=int, default=600, help="最多录制的帧数")
+    parser.add_argument("-o", "--output", default="frames", help="输出目录")
+    parser.add_argument("--format", choices=("raw", "png", "none"), default="raw",
+                        help="raw 为连续的RGB24流，none 只渲染不写盘")
+    parser.add_argument("--no-ai", action="store_true", help="不使用自动玩家，方块只会自然下落")
+    args = parser.parse_args(argv)
+
+    recorder = FrameRecorder(args.seed, autoplay=not args.no_ai)
+    writer = None if args.format == "none" else FrameWriter(args.output, args.format)
+    start = time.perf_counter()
+    count = 0
+    try:
+        for _ in recorder.frames(args.frames, writer):
+            count += 1
+    finally:
+        if writer is not None:
+            writer.close()
+    elapsed = time.perf_counter() - start
+    print(f"录制 {count} 帧，用时 {elapsed:.2f} 秒（{count / elapsed:.0f} 帧/秒）")
+    if args.format == "raw":
+        print(f"转换为视频: ffmpeg -f rawvideo -pix_fmt rgb24 -s {WINDOW_WIDTH}x{WINDOW_HEIGHT} "
+              f"-r {TICK_RATE} -i {os.path.join(args.output, 'frames.rgb')} replay.mp4")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1345 @@
+"""
+俄罗斯方块核心逻辑
+纯Python实现，不依赖pygame，可用于测试、模拟和分析脚本
+"""
+
+import random
+import struct
+from collections import deque, namedtuple
+
+# 颜色定义
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+CYAN = (0, 255, 255)
+BLUE = (0, 0, 255)
+ORANGE = (255, 165, 0)
+YELLOW = (255, 255, 0)
+GREEN = (0, 255, 0)
+PURPLE = (128, 0, 128)
+RED = (255, 0, 0)
+GRAY = (128, 128, 128)
+
+# 游戏配置
+GRID_WIDTH = 10
+GRID_HEIGHT = 20
+
+# 得分计算：单行100分，双行300分，三行500分，四行800分（再乘以当前等级）
+LINE_SCORES = {1: 100, 2: 300, 3: 500, 4: 800}
+
+# 按键自动重复（毫秒）：左右键按住 DAS 之后每 ARR 移动一格，ARR 为 0 时直接移到墙边；
+# 下键按住时每 SOFT_DROP_MS 下落一格
+DAS_MS = 250
+ARR_MS = 50
+SOFT_DROP_MS = 50
+
+# 方块形状定义 (I, O, T, S, Z, J, L)
+SHAPES = [
+    # I形
+    [['.....',
+      '..#..',
+      '..#..',
+      '..#..',
+      '..#..'],
+     ['.....',
+      '.....',
+      '####.',
+      '.....',
+      '.....']],
+    
+    # O形
+    [['.....',
+      '.....',
+      '.##..',
+      '.##..',
+      '.....']],
+    
+    # T形
+    [['.....',
+      '.....',
+      '.#...',
+      '###..',
+      '.....'],
+     ['.....',
+      '.....',
+      '.#...',
+      '.##..',
+      '.#...'],
+     ['.....',
+      '.....',
+      '.....',
+      '###..',
+      '.#...'],
+     ['.....',
+      '.....',
+      '.#...',
+      '##...',
+      '.#...']],
+    
+    # S形
+    [['.....',
+      '.....',
+      '.##..',
+      '##...',
+      '.....'],
+     ['.....',
+      '.#...',
+      '.##..',
+      '..#..',
+      '.....']],
+    
+    # Z形
+    [['.....',
+      '.....',
+      '##...',
+      '.##..',
+      '.....'],
+     ['.....',
+      '..#..',
+      '.##..',
+      '.#...',
+      '.....']],
+    
+    # J形
+    [['.....',
+      '.#...',
+      '.#...',
+      '##...',
+      '.....'],
+     ['.....',
+      '.....',
+      '#....',
+      '###..',
+      '.....'],
+     ['.....',
+      '.##..',
+      '.#...',
+      '.#...',
+      '.....'],
+     ['.....',
+      '.....',
+      '###..',
+      '..#..',
+      '.....']],
+    
+    # L形
+    [['.....',
+      '..#..',
+      '..#..',
+      '.##..',
+      '.....'],
+     ['.....',
+      '.....',
+      '###..',
+      '#....',
+      '.....'],
+     ['.....',
+      '##...',
+      '.#...',
+      '.#...',
+      '.....'],
+     ['.....',
+      '.....',
+      '..#..',
+      '###..',
+      '.....']]
+]
+
+SHAPE_COLORS = [CYAN, YELLOW, PURPLE, GREEN, RED, BLUE, ORANGE]
+
+PALETTE = [BLACK] + SHAPE_COLORS  # 颜色平面中的索引 -> RGB，0 表示空格
+
+# 方块几何表：每个 (形状, 旋转) 预先解析为单元格偏移、包围盒和逐行位掩码
+# column_bottoms 是每一列中最低单元格的 (dx, dy)，用于计算下落距离
+PieceGeometry = namedtuple('PieceGeometry', ['cells', 'bbox', 'row_masks', 'column_bottoms'])
+
+
+def build_geometry(shape):
+    """把 5x5 的 '#' 字符串解析为 PieceGeometry"""
+    cells = tuple((j, i) for i, row in enumerate(shape)
+                  for j, cell in enumerate(row) if cell == '#')
+    xs = [dx for dx, _ in cells]
+    ys = [dy for _, dy in cells]
+    bbox = (min(xs), min(ys), max(xs), max(ys))
+    masks = {}
+    for dx, dy in cells:
+        masks[dy] = masks.get(dy, 0) | (1 << dx)
+    row_masks = tuple(sorted(masks.items()))
+    bottoms = {}
+    for dx, dy in cells:
+        bottoms[dx] = max(bottoms.get(dx, dy), dy)
+    column_bottoms = tuple(sorted(bottoms.items()))
+    return PieceGeometry(cells, bbox, row_masks, column_bottoms)
+
+
+GEOMETRY = [[build_geometry(shape) for shape in rotations] for rotations in SHAPES]
+
+
+# Zobrist 哈希键：每个 (x, y) 一个随机64位整数。每行由 (宽度, 行号) 单独播种，
+# 只为用到的行生成并缓存，很高的棋盘也只占用有方块的那部分行
+_ZOBRIST_ROWS = {}
+
+
+def zobrist_row(width, y):
+    """第 y 行每一列的 Zobrist 键"""
+    keys = _ZOBRIST_ROWS.get((width, y))
+    if keys is None:
+        rng = random.Random(f"zobrist:{width}:{y}")
+        keys = _ZOBRIST_ROWS[(width, y)] = tuple(rng.getrandbits(64) for _ in range(width))
+    return keys
+
+
+def zobrist_row_hash(width, y, mask):
+    """一行的哈希：该行所有已占用单元格的键异或"""
+    keys = zobrist_row(width, y)
+    value = 0
+    while mask:
+        low = mask & -mask
+        value ^= keys[low.bit_length() - 1]
+        mask ^= low
+    return value
+
+
+if hasattr(int, 'bit_count'):
+    _popcount = int.bit_count
+else:  # Python 3.9 及更早的版本
+    def _popcount(n):
+        return bin(n).count('1')
+
+
+class BoardRow:
+    """网格中一行的视图，兼容原来 grid[y][x] 的读写方式"""
+    __slots__ = ('board', 'y')
+
+    def __init__(self, board, y):
+        self.board = board
+        self.y = y
+
+    def __len__(self):
+        return self.board.width
+
+    def __getitem__(self, x):
+        if isinstance(x, slice):
+            return [self[i] for i in range(*x.indices(self.board.width))]
+        if x < 0:
+            x += self.board.width
+        if not 0 <= x < self.board.width:
+            raise IndexError("列索引超出范围")
+        return self.board.get_color(x, self.y)
+
+    def __setitem__(self, x, color):
+        if x < 0:
+            x += self.board.width
+        if not 0 <= x < self.board.width:
+            raise IndexError("列索引超出范围")
+        self.board.set_color(x, self.y, color)
+
+    def __iter__(self):
+        for x in range(self.board.width):
+            yield self.board.get_color(x, self.y)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return f"BoardRow({list(self)!r})"
+
+
+# 棋盘的不可变快照：rows/columns 是整数元组，colors 是按行拼接的调色板索引
+BoardSnapshot = namedtuple('BoardSnapshot', ['width', 'height', 'rows', 'colors', 'palette', 'columns', 'hash'])
+
+
+class Board:
+    """位棋盘：每行一个整数位掩码（第 x 位对应第 x 列），
+    另有一个紧凑的颜色平面只在渲染时使用。
+
+    hash 是占用情况的 Zobrist 哈希，随 set_color、lock 和 remove_rows 增量更新，
+    占用相同的棋盘哈希相同（与颜色无关）。version 在每次修改后加一，
+    渲染器据此判断缓存的画面是否过期。
+
+    同时维护按列的索引：columns[x] 的第 y 位表示 (x, y) 被占用，
+    heights[x] 是该列从底部算起的高度，holes[x] 是该列最高方块下面的空格数。
+
+    颜色平面按行延迟分配：空行是 None，只有有方块的行才有 bytearray。
+    copy 和 snapshot 会整份复制 rows（copy 还有 colors 的行列表），开销与棋盘高度成正比，
+    只是每行复制一个引用；逐行复制颜色、拼接颜色字节和消行时移动行只处理最高方块以下的部分。"""
+
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT):
+        self.width = width
+        self.height = height
+        self.full_mask = (1 << width) - 1
+        self.rows = [0] * height
+        self.colors = [None] * height
+        self.palette = list(PALETTE)
+        self._palette_index = {color: i for i, color in enumerate(self.palette)}
+        self.hash = 0
+        self.version = 0
+        self.columns = [0] * width
+        self.heights = [0] * width
+        self.holes = [0] * width
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, y):
+        if y < 0:
+            y += self.height
+        if not 0 <= y < self.height:
+            raise IndexError("行索引超出范围")
+        return BoardRow(self, y)
+
+    def __iter__(self):
+        for y in range(self.height):
+            yield BoardRow(self, y)
+
+    def copy(self):
+        """复制棋盘（掩码、颜色平面和调色板）"""
+        board = Board.__new__(Board)
+        board.width = self.width
+        board.height = self.height
+        board.full_mask = self.full_mask
+        board.rows = list(self.rows)
+        colors = board.colors = list(self.colors)
+        for y in range(self.top_row(), self.height):
+            if colors[y] is not None:
+                colors[y] = bytearray(colors[y])
+        board.palette = list(self.palette)
+        board._palette_index = dict(self._palette_index)
+        board.hash = self.hash
+        board.version = self.version
+        board.columns = list(self.columns)
+        board.heights = list(self.heights)
+        board.holes = list(self.holes)
+        return board
+
+    def snapshot(self):
+        """不可变快照：rows 复制成一个元组（与高度成正比），颜色只拼接最高方块以下的行
+
+        colors 只包含最高方块所在行到底部的部分（靠底部对齐），上方都是空行。
+        """
+        empty = bytes(self.width)
+        colors = b"".join(row or empty for row in self.colors[self.top_row():])
+        return BoardSnapshot(self.width, self.height, tuple(self.rows), colors,
+                             tuple(self.palette), tuple(self.columns), self.hash)
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """由快照重建棋盘；列索引和哈希为 None 时重新计算"""
+        width, height = snapshot.width, snapshot.height
+        board = cls(width, height)
+        board.rows = list(snapshot.rows)
+        colors = snapshot.colors
+        start = height - len(colors) // width
+        for y in range(start, height):
+            if board.rows[y]:
+                offset = (y - start) * width
+                board.colors[y] = bytearray(colors[offset:offset + width])
+        board.palette = list(snapshot.palette)
+        board._palette_index = {color: i for i, color in enumerate(board.palette)}
+        if snapshot.columns is None:
+            for y in range(start, height):
+                mask = board.rows[y]
+                while mask:
+                    low = mask & -mask
+                    board.columns[low.bit_length() - 1] |= 1 << y
+                    mask ^= low
+        else:
+            board.columns = list(snapshot.columns)
+        for x in range(width):
+            board._update_column(x)
+        if snapshot.hash is None:
+            board.hash = 0
+            for y in range(start, height):
+                board.hash ^= zobrist_row_hash(width, y, board.rows[y])
+        else:
+            board.hash = snapshot.hash
+        return board
+
+    def color_index(self, color):
+        """颜色 -> 颜色平面中的索引，遇到新颜色时加入调色板"""
+        index = self._palette_index.get(color)
+        if index is None:
+            index = len(self.palette)
+            self.palette.append(color)
+            self._palette_index[color] = index
+        return index
+
+    def get_color(self, x, y):
+        row = self.colors[y]
+        return self.palette[row[x]] if row is not None else BLACK
+
+    def _color_row(self, y):
+        """第 y 行的颜色平面，第一次写入时分配"""
+        row = self.colors[y]
+        if row is None:
+            row = self.colors[y] = bytearray(self.width)
+        return row
+
+    def top_row(self):
+        """最高的已占用行号，空棋盘返回 height；它上面的行都是空的"""
+        return self.height - max(self.heights)
+
+    def set_color(self, x, y, color):
+        """设置单元格颜色，BLACK 表示清空"""
+        occupied = self.rows[y] >> x & 1
+        if color == BLACK:
+            self.rows[y] &= ~(1 << x)
+            if not self.rows[y]:
+                self.colors[y] = None
+            elif self.colors[y] is not None:
+                self.colors[y][x] = 0
+        else:
+            self.rows[y] |= 1 << x
+            self._color_row(y)[x] = self.color_index(color)
+        if occupied != self.rows[y] >> x & 1:
+            self.hash ^= zobrist_row(self.width, y)[x]
+            self.columns[x] ^= 1 << y
+            self._update_column(x)
+        self.version += 1
+
+    def is_occupied(self, x, y):
+        return self.rows[y] >> x & 1 == 1
+
+    def fits(self, cells):
+        """检查这些单元格是否都在边界内且没有与已有方块重叠"""
+        rows = self.rows
+        width = self.width
+        height = self.height
+        for x, y in cells:
+            if x < 0 or x >= width or y >= height:
+                return False
+            if y >= 0 and rows[y] >> x & 1:
+                return False
+        return True
+
+    def fits_piece(self, geometry, x, y):
+        """用预计算的逐行掩码检查方块放在 (x, y) 时是否有效"""
+        min_x, _, max_x, max_y = geometry.bbox
+        if x + min_x < 0 or x + max_x >= self.width or y + max_y >= self.height:
+            return False
+        rows = self.rows
+        for dy, mask in geometry.row_masks:
+            row = y + dy
+            if row >= 0 and rows[row] & (mask << x if x >= 0 else mask >> -x):
+                return False
+        return True
+
+    def lock(self, cells, color):
+        """把单元格写入棋盘（超出顶部的部分忽略），返回涉及的行号（从上到下）"""
+        index = self.color_index(color)
+        rows = self.rows
+        columns = self.columns
+        touched = set()
+        for x, y in cells:
+            if y >= 0:
+                touched.add(y)
+                bit = 1 << x
+                if not rows[y] & bit:
+                    rows[y] |= bit
+                    columns[x] |= 1 << y
+                    self.hash ^= zobrist_row(self.width, y)[x]
+                    self._update_column(x)
+                self._color_row(y)[x] = index
+        self.version += 1
+        return sorted(touched)
+
+    def unlock(self, cells):
+        """清空这些单元格（超出顶部的部分忽略），是 lock 的逆操作"""
+        rows = self.rows
+        columns = self.columns
+        for x, y in cells:
+            if y >= 0:
+                bit = 1 << x
+                if rows[y] & bit:
+                    rows[y] ^= bit
+                    columns[x] ^= 1 << y
+                    self.hash ^= zobrist_row(self.width, y)[x]
+                    self._update_column(x)
+                if not rows[y]:
+                    self.colors[y] = None
+                elif self.colors[y] is not None:
+                    self.colors[y][x] = 0
+        self.version += 1
+
+    def full_rows(self, ys=None):
+        """返回已填满的行号（从上到下）
+
+        给出 ys 时只检查这些行（例如 lock 返回的行），否则检查最高方块以下的所有行。
+        """
+        full = self.full_mask
+        rows = self.rows
+        if ys is None:
+            ys = range(self.top_row(), self.height)
+        return [y for y in ys if rows[y] == full]
+
+    def remove_rows(self, ys):
+        """一次压缩移除指定的行，上方的行整体下移"""
+        if not ys:
+            return
+        removed = sorted(set(ys))
+        count = len(removed)
+        # 最高方块以上都是空行，最低被移除行以下的行没有移动，只有中间这段需要处理
+        top = min(self.top_row(), removed[0])
+        bottom = removed[-1] + 1
+        rows = self.rows
+        colors = self.colors
+        old_rows = rows[top:bottom]
+        kept = [y for y in range(top, bottom) if y not in removed]
+        rows[top:bottom] = [0] * count + [rows[y] for y in kept]
+        colors[top:bottom] = [None] * count + [colors[y] for y in kept]
+        for y, old in enumerate(old_rows, top):
+            if old != rows[y]:
+                self.hash ^= (zobrist_row_hash(self.width, y, old) ^
+                              zobrist_row_hash(self.width, y, rows[y]))
+        # 每一列去掉被移除的位，上方的位整体下移一格（从上往下处理，行号不受影响）
+        for y in removed:
+            below = ~((1 << (y + 1)) - 1)
+            above = (1 << y) - 1
+            self.columns = [(bits & below) | ((bits & above) << 1) for bits in self.columns]
+        for x in range(self.width):
+            self._update_column(x)
+        self.version += 1
+
+    def insert_rows(self, ys, colors):
+        """remove_rows 的逆操作：在 ys 处插回填满的行，颜色依次取自 colors（每行 width 字节）
+
+        ys 是插回之后的行号；上方的行整体上移，移出顶部的必须是空行。
+        """
+        if not ys:
+            return
+        inserted = sorted(ys)
+        count = len(inserted)
+        width = self.width
+        # 与 remove_rows 相同，只处理最高方块到最低插入行之间的一段
+        top = max(0, min(self.top_row() - count, inserted[0]))
+        bottom = inserted[-1] + 1
+        rows = self.rows
+        old_rows = rows[top:bottom]
+        kept_rows = iter(rows[top + count:bottom])
+        kept_colors = iter(self.colors[top + count:bottom])
+        new_rows = []
+        new_colors = []
+        index = {y: i for i, y in enumerate(inserted)}
+        for y in range(top, bottom):
+            i = index.get(y)
+            if i is None:
+                new_rows.append(next(kept_rows))
+                new_colors.append(next(kept_colors))
+            else:
+                new_rows.append(self.full_mask)
+                new_colors.append(bytearray(colors[i * width:(i + 1) * width]))
+        rows[top:bottom] = new_rows
+        self.colors[top:bottom] = new_colors
+        for y, old in enumerate(old_rows, top):
+            if old != rows[y]:
+                self.hash ^= (zobrist_row_hash(width, y, old) ^
+                              zobrist_row_hash(width, y, rows[y]))
+        # 每一列在插入的位置加上一位，上方的位整体上移一格（从下往上处理）
+        for y in reversed(inserted):
+            below = ~((1 << (y + 1)) - 1)
+            upto = (1 << (y + 1)) - 1
+            bit = 1 << y
+            self.columns = [(bits & below) | ((bits & upto) >> 1) | bit for bits in self.columns]
+        for x in range(width):
+            self._update_column(x)
+        self.version += 1
+
+    def _update_column(self, x):
+        """由列位集合重新计算该列的高度和洞数"""
+        bits = self.columns[x]
+        if bits:
+            height = self.height - ((bits & -bits).bit_length() - 1)
+            self.heights[x] = height
+            self.holes[x] = height - _popcount(bits)
+        else:
+            self.heights[x] = 0
+            self.holes[x] = 0
+
+    def drop_distance(self, geometry, x, y):
+        """方块从 (x, y) 还能下落的格数
+
+        对方块每一列最低的单元格，直接在列位集合中找它下方最近的占用格
+        （棋盘底部视为占用），取最小值；不需要逐行做碰撞检测。
+        """
+        columns = self.columns
+        floor = 1 << self.height
+        distance = self.height
+        for dx, dy in geometry.column_bottoms:
+            bits = columns[x + dx] | floor
+            start = y + dy + 1
+            if start >= 0:
+                below = bits >> start
+                gap = (below & -below).bit_length() - 1
+            else:
+                gap = (bits & -bits).bit_length() - 1 - start
+            if gap < distance:
+                distance = gap
+        return distance
+
+    def filled_cells(self, y_start=0, y_end=None):
+        """遍历 y_start 到 y_end（不含）之间所有已占用的单元格，返回 (x, y, color)"""
+        palette = self.palette
+        rows = self.rows
+        if y_end is None or y_end > self.height:
+            y_end = self.height
+        for y in range(max(y_start, self.top_row()), y_end):
+            mask = rows[y]
+            if not mask:
+                continue
+            row_colors = self.colors[y]
+            x = 0
+            while mask:
+                if mask & 1:
+                    yield x, y, palette[row_colors[x]]
+                mask >>= 1
+                x += 1
+
+class Piece:
+    def __init__(self, x, y, shape_index=None):
+        self.x = x
+        self.y = y
+        if shape_index is None:
+            shape_index = random.randint(0, len(SHAPES) - 1)
+        self.shape_index = shape_index
+        self.rotation = 0
+        self.color = SHAPE_COLORS[self.shape_index]
+    
+    def get_shape(self):
+        return SHAPES[self.shape_index][self.rotation]
+    
+    def get_geometry(self):
+        return GEOMETRY[self.shape_index][self.rotation]
+    
+    def get_cells(self):
+        """获取方块占用的所有单元格坐标"""
+        x, y = self.x, self.y
+        return [(x + dx, y + dy) for dx, dy in GEOMETRY[self.shape_index][self.rotation].cells]
+    
+    def rotate(self):
+        """旋转方块"""
+        self.rotation = (self.rotation + 1) % len(SHAPES[self.shape_index])
+
+
+# 落点搜索中使用的输入，与 TetrisGame.move_piece / rotate_piece 对应
+MOVE_LEFT = 'left'
+MOVE_RIGHT = 'right'
+MOVE_DOWN = 'down'
+ROTATE = 'rotate'
+
+# 一个最终落点：方块停在 (x, y, rotation)，moves 是从当前位置到达这里的输入序列
+Placement = namedtuple('Placement', ['x', 'y', 'rotation', 'moves'])
+
+# 搜索时允许的最小 y 偏移（方块可以部分位于棋盘顶部之上）
+_Y_MARGIN = 4
+
+
+def _fill_down(seeds, free, starts):
+    """free 中每一段连续的空位里，从最上面的种子一直到这一段的底部
+
+    starts 是每一段的起点（free & ~(free << 1)）。不含种子的部分记为 rest，
+    从每段起点加一，进位会一直穿过 rest 的前导部分，停在第一个种子或段尾；
+    被进位清掉的就是各段中种子以上的部分，其余即为结果。
+    """
+    rest = free & ~seeds
+    return free ^ (rest & ~(rest + (starts & rest)))
+
+
+def find_placements(board, shape_index, x, y, rotation=0, moves=True):
+    """搜索方块从 (x, y, rotation) 出发能到达的所有最终落点
+
+    不逐个状态搜索：每个 (旋转, x) 保存一个可到达行的位集合。从新到达的行出发，
+    用一次加法填满下方连续的空位（下移），再与左右两列和下一个旋转的空位集合相与，
+    直到没有新的行；落点就是下一行被挡住的可到达行。
+    方块远在最高方块上方时，先直接落到离它 2 * _Y_MARGIN 行的地方，高棋盘上也只处理这几行以下。
+
+    moves 为真时为每个落点还原一条有效的输入序列（左右和旋转尽量早，
+    不保证最短）；为假时 Placement.moves 是 None，只需要落点时更快。
+
+    纯 Python 实现，半满的 10x20 棋盘上每次约 85 µs（moves 为假，约 1.5 万个棋盘/秒，
+    见 tetris_bench.py -b find_placements），离每秒几十万个还差一个数量级以上，
+    剩下的主要是逐列计算空位集合的解释器开销。
+    """
+    search = _search(board, shape_index, x, y, rotation, moves)
+    if search is None:
+        return []
+    reach, free, starts, records, lo, drop = search
+    placements = []
+    for r, row_bits in enumerate(reach):
+        for col, bits in enumerate(row_bits):
+            if not bits:
+                continue
+            # 下一行不是空位的可到达行
+            resting = bits & ~(free[r][col] >> 1)
+            while resting:
+                low = resting & -resting
+                row = low.bit_length() - 1
+                resting ^= low
+                path = _trace(records, free, starts, drop, r, col, row) if moves else None
+                placements.append(Placement(col - _Y_MARGIN, row - _Y_MARGIN + lo, r, path))
+    return placements
+
+
+def find_moves(board, shape_index, x, y, rotation, placement):
+    """只为一个落点还原输入序列，落点不可到达时返回 None
+
+    和 find_placements(..., moves=False) 搭配：先只枚举落点，选定以后再还原，
+    高棋盘上不必为每个落点都生成上万步的序列。
+    """
+    search = _search(board, shape_index, x, y, rotation, True)
+    if search is None:
+        return None
+    reach, free, starts, records, lo, drop = search
+    r, col, row = placement.rotation, placement.x + _Y_MARGIN, placement.y - lo + _Y_MARGIN
+    if not (0 <= r < len(reach) and 0 <= col < len(reach[r]) and row >= 0):
+        return None
+    if not reach[r][col] >> row & 1 or free[r][col] >> (row + 1) & 1:
+        return None
+    return _trace(records, free, starts, drop, r, col, row)
+
+
+def _search(board, shape_index, x, y, rotation, moves):
+    """按列位集合传播可到达的行，出发位置无效时返回 None
+
+    返回 (reach, free, starts, records, lo, drop)：reach[r][c] 和 free[r][c] 的第 b 位
+    对应纵坐标 b + lo - _Y_MARGIN，records 只在 moves 为真时记录，drop 是起点直接下落的行数。
+    """
+    rotations = GEOMETRY[shape_index]
+    count = len(rotations)
+    width = board.width
+    # 最高方块以上的行都是空的，方块远在上方时先直接落到离它 2 * _Y_MARGIN 行的地方再搜索
+    lo = max(y, board.top_row() - 2 * _Y_MARGIN)
+    drop = lo - y
+    # 位集合的第 b 位对应纵坐标 b + lo - _Y_MARGIN，起点上方的行用不到
+    span = board.height - lo + _Y_MARGIN
+    limit = (1 << span) - 1
+    floor = ((1 << (span + _Y_MARGIN)) - 1) ^ limit   # 棋盘下方视为实心
+    offset = _Y_MARGIN - lo
+    if offset >= 0:
+        columns = [bits << offset | floor for bits in board.columns]
+    else:
+        columns = [bits >> -offset | floor for bits in board.columns]
+    x_span = width + 2 * _Y_MARGIN
+
+    # free[r][c]：方块在第 c - _Y_MARGIN 列、旋转为 r 时的有效纵坐标位集合
+    free = []
+    for geometry in rotations:
+        min_x, _, max_x, _ = geometry.bbox
+        row = [0] * x_span
+        for col in range(_Y_MARGIN - min_x, width + _Y_MARGIN - max_x):
+            blocked = 0
+            for dx, dy in geometry.cells:
+                blocked |= columns[col - _Y_MARGIN + dx] >> dy
+            row[col] = ~blocked & limit
+        free.append(row)
+    starts = [[bits & ~(bits << 1) for bits in row] for row in free]
+
+    col, bit = x + _Y_MARGIN, _Y_MARGIN
+    if not (0 <= col < x_span and 0 <= bit < span and free[rotation][col] >> bit & 1):
+        return None
+
+    reach = [[0] * x_span for _ in range(count)]
+    # 每个状态新增可到达行的记录：(种子, 从哪个状态来, 输入)，按先后顺序
+    records = [[[] for _ in range(x_span)] for _ in range(count)] if moves else None
+    seeds = 1 << bit
+    reach[rotation][col] = added = _fill_down(seeds, free[rotation][col], starts[rotation][col])
+    if moves:
+        records[rotation][col].append((seeds, None, None))
+    queue = [(rotation, col, added)]
+    push = queue.append
+    for r, col, added in queue:
+        if count > 1:
+            turned = (r + 1) % count
+            targets = ((r, col - 1, MOVE_LEFT), (r, col + 1, MOVE_RIGHT), (turned, col, ROTATE))
+        else:
+            targets = ((r, col - 1, MOVE_LEFT), (r, col + 1, MOVE_RIGHT))
+        for nr, ncol, move in targets:
+            if not 0 <= ncol < x_span:
+                continue
+            seeds = added & free[nr][ncol] & ~reach[nr][ncol]
+            if not seeds:
+                continue
+            filled = _fill_down(seeds, free[nr][ncol], starts[nr][ncol]) & ~reach[nr][ncol]
+            reach[nr][ncol] |= filled
+            if moves:
+                records[nr][ncol].append((seeds, (r, col), move))
+            push((nr, ncol, filled))
+
+    return reach, free, starts, records, lo, drop
+
+
+def _trace(records, free, starts, drop, r, col, row):
+    """从落点沿记录倒推回出发点，返回输入序列（元组）"""
+    path = []
+    while True:
+        for seeds, source, move in records[r][col]:
+            if _fill_down(seeds, free[r][col], starts[r][col]) >> row & 1:
+                break
+        # 这条记录里与 row 在同一段空位、位置最高的种子：尽量早做左右和旋转
+        top = (starts[r][col] & ((2 << row) - 1)).bit_length() - 1
+        above = seeds & ((2 << row) - (1 << top))
+        seed = (above & -above).bit_length() - 1
+        path.extend([MOVE_DOWN] * (row - seed))
+        if source is None:
+            break
+        path.append(move)
+        (r, col), row = source, seed
+    path.reverse()
+    if drop:
+        # 最高方块以上都是空行：先在原来的高度做完左右和旋转，再下落
+        lead = 0
+        while lead < len(path) and path[lead] != MOVE_DOWN:
+            lead += 1
+        path[lead:lead] = [MOVE_DOWN] * drop
+    return tuple(path)
+
+# 序列化格式：头部、调色板（RGB）、最高方块以下各行的掩码和颜色平面、随机数生成器状态、
+# 方块队列（可选，旧数据没有），全部小端
+_SNAPSHOT_MAGIC = b"TTS2"
+_SNAPSHOT_HEADER = struct.Struct("<4sHIBBiiBqIIdBI")
+# 旧格式 TTS1：高度和坐标字段更窄，头部没有保存的行数，所有行都保存，没有方块队列
+_SNAPSHOT_MAGIC_V1 = b"TTS1"
+_SNAPSHOT_HEADER_V1 = struct.Struct("<4sHHBBhhBqIIdB")
+_RNG_STATE = struct.Struct("<B625IBd")
+_QUEUE_SIZE = struct.Struct("<I")
+
+
+class GameSnapshot(namedtuple('GameSnapshot', [
+        'board', 'shape', 'rotation', 'x', 'y', 'next_shape',
+        'score', 'lines_cleared', 'level', 'fall_time', 'rng_state', 'queue'])):
+    """一局游戏的不可变快照
+
+    board 是 BoardSnapshot，当前方块只保存形状、旋转和位置，
+    rng_state 是随机数生成器的状态，queue 是撤销后退回、排在随机数生成器之前的方块形状，
+    恢复后生成的方块序列与原来的对局相同。
+    """
+    __slots__ = ()
+
+    def __new__(cls, board, shape, rotation, x, y, next_shape,
+                score, lines_cleared, level, fall_time, rng_state, queue=()):
+        # queue 可以省略（namedtuple 的 defaults 参数要到 Python 3.7 才有）
+        return super().__new__(cls, board, shape, rotation, x, y, next_shape,
+                               score, lines_cleared, level, fall_time, rng_state, queue)
+
+    def to_bytes(self):
+        """序列化为字节串（列索引和哈希不保存，读取时重新计算）"""
+        board = self.board
+        row_bytes = (board.width + 7) // 8
+        stored = len(board.colors) // board.width
+        parts = [
+            _SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, board.width, board.height,
+                                  self.shape, self.rotation, self.x, self.y, self.next_shape,
+                                  self.score, self.lines_cleared, self.level, self.fall_time,
+                                  len(board.palette), stored),
+            bytes(channel for color in board.palette for channel in color),
+            b"".join(mask.to_bytes(row_bytes, "little") for mask in board.rows[board.height - stored:]),
+            board.colors,
+        ]
+        version, internal, gauss = self.rng_state
+        parts.append(_RNG_STATE.pack(version, *internal, gauss is not None, gauss or 0.0))
+        if self.queue:
+            parts.append(_QUEUE_SIZE.pack(len(self.queue)))
+            parts.append(bytes(self.queue))
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """由 to_bytes 的结果还原快照（也能读取旧的 TTS1 格式）"""
+        magic = bytes(data[:4])
+        if magic == _SNAPSHOT_MAGIC:
+            (magic, width, height, shape, rotation, x, y, next_shape, score, lines_cleared,
+             level, fall_time, palette_size, stored) = _SNAPSHOT_HEADER.unpack_from(data)
+            offset = _SNAPSHOT_HEADER.size
+        elif magic == _SNAPSHOT_MAGIC_V1:
+            (magic, width, height, shape, rotation, x, y, next_shape, score, lines_cleared,
+             level, fall_time, palette_size) = _SNAPSHOT_HEADER_V1.unpack_from(data)
+            stored = height
+            offset = _SNAPSHOT_HEADER_V1.size
+        else:
+            raise ValueError("不是俄罗斯方块快照")
+        palette = tuple(tuple(data[offset + i:offset + i + 3]) for i in range(0, palette_size * 3, 3))
+        offset += palette_size * 3
+        row_bytes = (width + 7) // 8
+        rows = (0,) * (height - stored) + tuple(
+            int.from_bytes(data[offset + i * row_bytes:offset + (i + 1) * row_bytes], "little")
+            for i in range(stored))
+        offset += stored * row_bytes
+        colors = bytes(data[offset:offset + width * stored])
+        offset += width * stored
+        rng = _RNG_STATE.unpack_from(data, offset)
+        rng_state = (rng[0], rng[1:626], rng[627] if rng[626] else None)
+        offset += _RNG_STATE.size
+        queue = ()
+        if len(data) > offset:
+            count, = _QUEUE_SIZE.unpack_from(data, offset)
+            offset += _QUEUE_SIZE.size
+            queue = tuple(data[offset:offset + count])
+        board = BoardSnapshot(width, height, rows, colors, palette, None, None)
+        return cls(board, shape, rotation, x, y, next_shape,
+                   score, lines_cleared, level, fall_time, rng_state, queue)
+
+
+def _blank_rng():
+    """未播种的随机数生成器，马上会被 setstate 覆盖（跳过读取系统熵源的开销）"""
+    return random.Random.__new__(random.Random)
+
+
+class TetrisGame:
+    def __init__(self, seed=None, width=GRID_WIDTH, height=GRID_HEIGHT):
+        # 每局使用独立的随机数生成器，给定种子时方块序列可以复现
+        self.seed = seed
+        self.rng = random.Random(seed)
+        # 棋盘尺寸属于每一局，可以远大于默认的 10x20
+        self.grid = Board(width, height)
+        # 撤销时退回的方块形状，new_piece 先从这里取，取完才用随机数生成器
+        self.piece_queue = deque()
+        self.current_piece = self.new_piece()
+        self.next_piece = self.new_piece()
+        self.score = 0
+        self.lines_cleared = 0
+        self.level = 1
+        self.fall_time = 0
+        self.fall_speed = 500  # 毫秒
+        # 最近一次 place_piece 锁定的格子和 clear_lines 移除的行，placements 是放置的次数，
+        # 观战等增量输出用它们判断每一步发生了什么
+        self.last_placed = ()
+        self.last_cleared = ()
+        self.placements = 0
+        # record_history 之后的放置历史（GameHistory），用于 undo
+        self.history = None
+        
+    def new_piece(self):
+        """创建新方块"""
+        if self.piece_queue:
+            shape = self.piece_queue.popleft()
+        else:
+            shape = self.rng.randrange(len(SHAPES))
+        return Piece(self.grid.width // 2 - 2, 0, shape)
+    
+    def is_valid_position(self, piece, dx=0, dy=0, rotation=None):
+        """检查方块位置是否有效"""
+        if rotation is None:
+            rotation = piece.rotation
+        
+        # 直接查几何表，不再创建临时方块
+        return self.grid.fits_piece(GEOMETRY[piece.shape_index][rotation],
+                                    piece.x + dx, piece.y + dy)
+    
+    def drop_distance(self, piece=None):
+        """方块还能下落的格数（查列索引，代价与方块宽度成正比）"""
+        if piece is None:
+            piece = self.current_piece
+        return self.grid.drop_distance(GEOMETRY[piece.shape_index][piece.rotation],
+                                       piece.x, piece.y)
+    
+    def get_placements(self):
+        """当前方块所有可到达的最终落点（Placement 列表）"""
+        piece = self.current_piece
+        return find_placements(self.grid, piece.shape_index, piece.x, piece.y, piece.rotation)
+    
+    def place_piece(self):
+        """放置当前方块到网格中"""
+        piece = self.current_piece
+        cells = piece.get_cells()
+        touched = self.grid.lock(cells, piece.color)
+        self.last_placed = tuple((x, y) for x, y in cells if y >= 0)
+        self.placements += 1
+        
+        # 只有方块涉及的行可能被填满
+        self.clear_lines(touched)
+        
+        # 生成新方块
+        self.current_piece = self.next_piece
+        self.next_piece = self.new_piece()
+        if self.history is not None:
+            self.history.record(self, piece)
+        
+        # 检查游戏结束
+        if not self.is_valid_position(self.current_piece):
+            return False
+        return True
+    
+    def clear_lines(self, rows=None):
+        """清除完整的行，rows 给出时只检查这些行"""
+        lines_to_clear = self.grid.full_rows(rows)
+        self.last_cleared = tuple(lines_to_clear)
+        if lines_to_clear and self.history is not None:
+            self.history.cleared(self.grid, lines_to_clear)
+        
+        # 一次压缩移除完整的行
+        self.grid.remove_rows(lines_to_clear)
+        
+        # 更新得分
+        if lines_to_clear:
+            self.lines_cleared += len(lines_to_clear)
+            self.score += LINE_SCORES.get(len(lines_to_clear), 0) * self.level
+            
+            # 每清除10行提升一个等级
+            self.level = self.lines_cleared // 10 + 1
+            # 等级越高下落越快
+            self.fall_speed = max(50, 500 - (self.level - 1) * 50)
+    
+    def move_piece(self, dx, dy):
+        """移动方块"""
+        if self.is_valid_position(self.current_piece, dx, dy):
+            self.current_piece.x += dx
+            self.current_piece.y += dy
+            return True
+        return False
+    
+    def rotate_piece(self):
+        """旋转方块"""
+        new_rotation = (self.current_piece.rotation + 1) % len(SHAPES[self.current_piece.shape_index])
+        if self.is_valid_position(self.current_piece, rotation=new_rotation):
+            self.current_piece.rotation = new_rotation
+            return True
+        return False
+    
+    def hard_drop(self):
+        """硬降（快速下降到底部）"""
+        distance = self.drop_distance()
+        self.current_piece.y += distance
+        self.score += 2 * distance  # 硬降奖励分数
+        return self.place_piece()
+    
+    def snapshot(self):
+        """当前状态的不可变快照（GameSnapshot）"""
+        piece = self.current_piece
+        return GameSnapshot(self.grid.snapshot(), piece.shape_index, piece.rotation, piece.x, piece.y,
+                            self.next_piece.shape_index, self.score, self.lines_cleared,
+                            self.level, self.fall_time, self.rng.getstate(), tuple(self.piece_queue))
+
+    def restore(self, snapshot):
+        """回到快照时的状态；正在记录历史时从这里重新开始记录"""
+        self._load(snapshot)
+        if self.history is not None:
+            self.history.start(self)
+
+    def _load(self, snapshot):
+        self.grid = Board.from_snapshot(snapshot.board)
+        self.current_piece = Piece(snapshot.x, snapshot.y, snapshot.shape)
+        self.current_piece.rotation = snapshot.rotation
+        self.next_piece = Piece(self.grid.width // 2 - 2, 0, snapshot.next_shape)
+        self.score = snapshot.score
+        self.lines_cleared = snapshot.lines_cleared
+        self.level = snapshot.level
+        self.fall_time = snapshot.fall_time
+        self.fall_speed = max(50, 500 - (self.level - 1) * 50)
+        self.rng.setstate(snapshot.rng_state)
+        self.piece_queue = deque(snapshot.queue)
+        self.last_placed = ()
+        self.last_cleared = ()
+
+    @classmethod
+    def from_snapshot(cls, snapshot, seed=None):
+        """由快照创建新的对局"""
+        game = cls.__new__(cls)
+        game.seed = seed
+        game.rng = _blank_rng()
+        game.placements = 0
+        game.history = None
+        game.restore(snapshot)
+        return game
+
+    def clone(self):
+        """复制整局游戏，复制品与原对局互不影响"""
+        game = TetrisGame.__new__(TetrisGame)
+        game.__dict__.update(self.__dict__)
+        game.grid = self.grid.copy()
+        game.current_piece = Piece(self.current_piece.x, self.current_piece.y, self.current_piece.shape_index)
+        game.current_piece.rotation = self.current_piece.rotation
+        game.next_piece = Piece(self.next_piece.x, self.next_piece.y, self.next_piece.shape_index)
+        game.rng = _blank_rng()
+        game.rng.setstate(self.rng.getstate())
+        game.piece_queue = deque(self.piece_queue)
+        # 历史只属于原对局
+        game.history = None
+        return game
+
+    def record_history(self, capacity=1000, keyframe_interval=50):
+        """从当前状态开始记录放置历史，返回 GameHistory；之后可以用 undo 撤销"""
+        self.history = GameHistory(self, capacity, keyframe_interval)
+        return self.history
+
+    def undo(self, steps=1):
+        """撤销最近 steps 次放置，回到其中第一个方块刚出现时的状态
+
+        没有记录历史或历史不够时不做任何改变，返回 False。
+        """
+        if self.history is None:
+            return False
+        return self.history.rewind(self, steps)
+
+    def update(self, dt):
+        """更新游戏状态"""
+        self.fall_time += dt
+        if self.fall_time >= self.fall_speed:
+            if not self.move_piece(0, 1):
+                return self.place_piece()
+            self.fall_time = 0
+        return True
+
+
+# 放置历史的一条记录：这一轮开始时的状态和方块锁定的位置，以及消除的行（从上到下）和它们的颜色
+_TURN = struct.Struct("<BBhiIIHd")    # 形状、旋转、x、y、得分、行数、等级、下落计时
+_LOCK = struct.Struct("<BhiB")        # 锁定时的旋转、x、y，消除的行数
+HistoryEntry = namedtuple('HistoryEntry', ['shape', 'start', 'lock', 'score', 'lines_cleared', 'level', 'cleared'])
+
+
+class GameHistory:
+    """最近若干次放置的历史，用于撤销和回看
+
+    每次放置只记一条几十字节的增量（这一轮开始时的方块和计数、锁定位置、
+    消除的行和颜色），放在容量固定的环形缓冲里，最旧的记录被覆盖，
+    长时间对局的内存占用不会增长。撤销时反向应用增量：插回消除的行、
+    清掉锁定的格子，多出来的方块退回 piece_queue，之后的方块序列不变。
+    每 keyframe_interval 次放置另存一个序列化的快照，一次撤销很多步时
+    从目标之后最近的快照开始，最多反向应用 keyframe_interval 条增量。
+
+    只记录 place_piece 和 clear_lines 引起的变化；记录期间不要直接修改棋盘。
+    history[i] 是第 i 次放置的 HistoryEntry（i 从 first 到 head - 1），
+    start 和 lock 是方块出现和锁定时的 (旋转, x, y)。
+    """
+
+    def __init__(self, game, capacity=1000, keyframe_interval=50):
+        self.capacity = capacity
+        self.keyframe_interval = keyframe_interval
+        self.entries = [None] * capacity
+        self.keyframes = {}   # 第几次放置之前 -> GameSnapshot.to_bytes()
+        self.start(game)
+
+    def start(self, game):
+        """丢弃已有的记录，从 game 的当前状态重新开始"""
+        self.first = 0
+        self.head = 0
+        self.keyframes.clear()
+        self.keyframes[0] = game.snapshot().to_bytes()
+        self._turn = self._pack_turn(game)
+        self._cleared = b""
+
+    def __len__(self):
+        """可以撤销的放置次数"""
+        return self.head - self.first
+
+    def __getitem__(self, index):
+        if not self.first <= index < self.head:
+            raise IndexError("历史记录超出范围")
+        entry = self.entries[index % self.capacity]
+        shape, rotation, x, y, score, lines_cleared, level, _ = _TURN.unpack_from(entry)
+        lock_rotation, lock_x, lock_y, count = _LOCK.unpack_from(entry, _TURN.size)
+        cleared = struct.unpack_from(f"<{count}I", entry, _TURN.size + _LOCK.size)
+        return HistoryEntry(shape, (rotation, x, y), (lock_rotation, lock_x, lock_y),
+                            score, lines_cleared, level, cleared)
+
+    @staticmethod
+    def _pack_turn(game):
+        piece = game.current_piece
+        return _TURN.pack(piece.shape_index, piece.rotation, piece.x, piece.y,
+                          game.score, game.lines_cleared, game.level, game.fall_time)
+
+    def cleared(self, board, rows):
+        """clear_lines 移除这些行之前调用，保存它们的颜色"""
+        self._cleared = b"".join(board.colors[y] for y in rows)
+
+    def record(self, game, piece):
+        """place_piece 锁定 piece、生成新方块之后调用"""
+        rows = game.last_cleared
+        self.entries[self.head % self.capacity] = b"".join((
+            self._turn,
+            _LOCK.pack(piece.rotation, piece.x, piece.y, len(rows)),
+            struct.pack(f"<{len(rows)}I", *rows),
+            self._cleared if rows else b"",
+        ))
+        self._cleared = b""
+        self.head += 1
+        if self.head - self.first > self.capacity:
+            self.first += 1
+            self.keyframes.pop(self.first - 1, None)
+        self._turn = self._pack_turn(game)
+        if self.head % self.keyframe_interval == 0:
+            self.keyframes[self.head] = game.snapshot().to_bytes()
+
+    def rewind(self, game, steps=1):
+        """撤销最近 steps 次放置；历史不够时返回 False"""
+        target = self.head - steps
+        if steps < 1 or target < self.first:
+            return False
+        index = self.head
+        # 目标之后最近的快照比当前状态更近时，从快照开始反向应用
+        keyframe = -(-target // self.keyframe_interval) * self.keyframe_interval
+        if keyframe < index and keyframe in self.keyframes:
+            version = game.grid.version
+            game._load(GameSnapshot.from_bytes(self.keyframes[keyframe]))
+            # 棋盘是新建的，版本号接着原来的往上加，渲染器等缓存不会误以为没有变化
+            game.grid.version = version + 1
+            index = keyframe
+        while index > target:
+            index -= 1
+            self._undo(game, self.entries[index % self.capacity])
+        for key in [key for key in self.keyframes if key > target]:
+            del self.keyframes[key]
+        self.head = target
+        self._turn = self._pack_turn(game)
+        self._cleared = b""
+        game.placements -= steps
+        game.last_placed = ()
+        game.last_cleared = ()
+        return True
+
+    @staticmethod
+    def _undo(game, entry):
+        """反向应用一条记录：game 回到这次放置的方块刚出现的时候"""
+        shape, rotation, x, y, score, lines_cleared, level, fall_time = _TURN.unpack_from(entry)
+        lock_rotation, lock_x, lock_y, count = _LOCK.unpack_from(entry, _TURN.size)
+        offset = _TURN.size + _LOCK.size
+        board = game.grid
+        if count:
+            rows = struct.unpack_from(f"<{count}I", entry, offset)
+            board.insert_rows(rows, entry[offset + 4 * count:])
+        board.unlock([(lock_x + dx, lock_y + dy) for dx, dy in GEOMETRY[shape][lock_rotation].cells])
+        # 这次放置生成的方块退回队列，当时的下一个方块又排到当前方块之后
+        game.piece_queue.appendleft(game.next_piece.shape_index)
+        game.next_piece = Piece(board.width // 2 - 2, 0, game.current_piece.shape_index)
+        game.current_piece = Piece(x, y, shape)
+        game.current_piece.rotation = rotation
+        game.score = score
+        game.lines_cleared = lines_cleared
+        game.level = level
+        game.fall_time = fall_time
+        game.fall_speed = max(50, 500 - (level - 1) * 50)
+
+
+class InputHandler:
+    """逻辑层的按键处理：延迟自动移动（DAS）和自动重复（ARR）
+
+    press/release 带毫秒时间戳（任意单调时钟）排队，advance(t) 把游戏推进到时刻 t：
+    两次输入之间用 update() 推进重力，输入和自动重复都在各自的时刻执行，
+    不受帧率限制，一帧内可以重复多次。动作为 left right down rotate drop；
+    左右同时按住时后按的优先，松开后另一边重新计算 DAS。
+    """
+
+    def __init__(self, game, das=DAS_MS, arr=ARR_MS, soft_drop=SOFT_DROP_MS, time=0.0):
+        self.das = das
+        self.arr = arr
+        self.soft_drop = soft_drop
+        self.time = time
+        self.reset(game)
+
+    def reset(self, game):
+        """换成新的一局，清空按键状态"""
+        self.game = game
+        self.alive = True
+        self.events = deque()  # (时刻, 动作, 是否按下)
+        self.held = {}         # 按住的动作 -> 下一次重复的时刻
+        self.shift = None      # 生效的左右方向
+        self.changes = []      # 改变了画面的输入时刻，等待 take_latencies 取走
+
+    def press(self, action, t):
+        self.events.append((t, action, True))
+
+    def release(self, action, t):
+        self.events.append((t, action, False))
+
+    def skip(self, t):
+        """时钟跳到 t，不推进游戏（暂停、自动演示或丢弃积压之后），按住的键顺延"""
+        if t <= self.time:
+            return
+        delta = t - self.time
+        self.held = {action: when + delta for action, when in self.held.items()}
+        self.time = t
+
+    def _next_repeat(self):
+        """最早的自动重复 (时刻, 动作)，没有时为 None"""
+        best = None
+        for action, when in self.held.items():
+            if action in ('left', 'right') and action != self.shift:
+                continue
+            if best is None or when < best[0]:
+                best = (when, action)
+        return best
+
+    def advance(self, t):
+        """推进到时刻 t，返回游戏是否仍在进行"""
+        while self.alive:
+            repeat = self._next_repeat()
+            if self.events and self.events[0][0] <= t and (repeat is None or self.events[0][0] <= repeat[0]):
+                when, action, down = self.events.popleft()
+                when = max(when, self.time)
+                self._fall(when)
+                if down:
+                    self._press(action, when)
+                else:
+                    self._release(action, when)
+            elif repeat is not None and repeat[0] <= t:
+                when, action = repeat
+                self._fall(when)
+                self._repeat(action, when)
+            else:
+                break
+        self._fall(t)
+        return self.alive
+
+    def _fall(self, t):
+        """重力推进到时刻 t"""
+        if t > self.time:
+            if self.alive and not self.game.update(t - self.time):
+                self.alive = False
+            self.time = t
+
+    def _press(self, action, t):
+        if action in self.held:
+            return
+        if action in ('left', 'right'):
+            self.shift = action
+            self.held[action] = t + self.das
+        elif action == 'down':
+            self.held[action] = t + self.soft_drop
+        self._act(action, t)
+
+    def _release(self, action, t):
+        if self.held.pop(action, None) is None or action != self.shift:
+            return
+        other = 'right' if action == 'left' else 'left'
+        if other in self.held:
+            self.shift = other
+            self.held[other] = t + self.das
+        else:
+            self.shift = None
+
+    def _repeat(self, action, t):
+        if action == 'down':
+            self.held[action] = t + self.soft_drop
+            self._act(action, t)
+        elif self.arr > 0:
+            self.held[action] = t + self.arr
+            self._act(action, t)
+        else:
+            # ARR 为 0：直接移到底；之后每毫秒检查一次（新方块出现或下落后可能又能移动）
+            self.held[action] = t + 1
+            while self._act(action, t):
+                pass
+
+    def _act(self, action, t):
+        """执行一个动作，返回画面是否变化"""
+        game = self.game
+        if action == 'left':
+            changed = game.move_piece(-1, 0)
+        elif action == 'right':
+            changed = game.move_piece(1, 0)
+        elif action == 'down':
+            changed = game.move_piece(0, 1)
+            if changed:
+                game.score += 1  # 软降奖励分数
+        elif action == 'rotate':
+            changed = game.rotate_piece()
+        else:
+            changed = True
+            if not game.hard_drop():
+                self.alive = False
+        if changed:
+            self.changes.append(t)
+        return changed
+
+    def take_latencies(self, t):
+        """画面在时刻 t 显示出来：返回此前各次有效输入到现在的延迟（毫秒）"""
+        latencies = [t - when for when in self.changes]
+        self.changes.clear()
+        return latencies
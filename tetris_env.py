@@ -0,0 +1,136 @@
+"""
+强化学习环境
+把 TetrisGame 包装成 gym 风格的 reset(seed) / step(action) 接口（需要numpy，不依赖gym）。
+观测是预先分配的NumPy数组，每一步原地更新：棋盘只重写位掩码变化了的行，
+当前方块只擦掉旧位置、画上新位置，不会每步从棋盘重新生成
+"""
+
+import numpy as np
+
+from tetris_core import GRID_WIDTH, GRID_HEIGHT, TetrisGame
+
+# 离散动作，step 的参数是这里的下标
+ACTIONS = ('noop', 'left', 'right', 'down', 'rotate', 'drop')
+NOOP, LEFT, RIGHT, DOWN, ROTATE, DROP = range(len(ACTIONS))
+
+# 每一步之后推进的重力时间（毫秒），与图形界面的一个逻辑步相同
+TICK_MS = 1000.0 / 60
+
+
+class TetrisEnv:
+    """gym 风格的俄罗斯方块环境
+
+    observation 是一个字典，每次 reset/step 返回的都是同一个对象，数组原地更新：
+      board       (height, width) uint8，已放置的方块为 1
+      piece       (height, width) uint8，当前方块所在的格子为 1
+      piece_state (4,) int32，当前方块的 形状、旋转、x、y
+      next_piece  (1,) int32，下一个方块的形状
+    需要保留某一步的观测时自行复制。奖励是得分的增加量；tick_ms 为 None 时没有重力，
+    方块只在 drop 或软降到底之后才会放置。max_steps 到达时 truncated 为真。
+    """
+
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT, tick_ms=TICK_MS, max_steps=None):
+        self.width = width
+        self.height = height
+        self.tick_ms = tick_ms
+        self.max_steps = max_steps
+        self.action_count = len(ACTIONS)
+        self.observation = {
+            'board': np.zeros((height, width), dtype=np.uint8),
+            'piece': np.zeros((height, width), dtype=np.uint8),
+            'piece_state': np.zeros(4, dtype=np.int32),
+            'next_piece': np.zeros(1, dtype=np.int32),
+        }
+        self.info = {'score': 0, 'lines_cleared': 0, 'level': 1, 'steps': 0}
+        self.game = None
+        self.steps = 0
+        self.terminated = False
+        self._row_bytes = (width + 7) // 8
+        self._rows = [0] * height        # observation['board'] 中每行对应的位掩码
+        self._top = height               # observation['board'] 中最高的非空行
+        self._piece_cells = []           # observation['piece'] 中置 1 的格子
+        self._piece_key = None
+        self._board_version = None
+
+    def reset(self, seed=None):
+        """开始新的一局，返回 (observation, info)"""
+        self.game = TetrisGame(seed=seed, width=self.width, height=self.height)
+        self.steps = 0
+        self.terminated = False
+        self.observation['board'].fill(0)
+        self.observation['piece'].fill(0)
+        self._rows = [0] * self.height
+        self._top = self.height
+        self._piece_cells = []
+        self._piece_key = None
+        self._board_version = None
+        self._sync()
+        return self.observation, self.info
+
+    def step(self, action):
+        """执行一个动作并推进一个逻辑步，返回 (observation, reward, terminated, truncated, info)"""
+        if self.game is None:
+            raise RuntimeError("需要先调用 reset()")
+        game = self.game
+        score = game.score
+        if not self.terminated:
+            alive = True
+            if action == LEFT:
+                game.move_piece(-1, 0)
+            elif action == RIGHT:
+                game.move_piece(1, 0)
+            elif action == DOWN:
+                if game.move_piece(0, 1):
+                    game.score += 1  # 软降奖励分数
+            elif action == ROTATE:
+                game.rotate_piece()
+            elif action == DROP:
+                alive = game.hard_drop()
+            elif action != NOOP:
+                raise ValueError(f"未知的动作: {action}")
+            if alive and self.tick_ms is not None:
+                alive = game.update(self.tick_ms)
+            self.terminated = not alive
+            self.steps += 1
+            self._sync()
+        truncated = self.max_steps is not None and self.steps >= self.max_steps
+        return self.observation, game.score - score, self.terminated, truncated, self.info
+
+    def _sync(self):
+        """把游戏状态原地写入观测数组"""
+        game = self.game
+        board = game.grid
+        if board.version != self._board_version:
+            self._board_version = board.version
+            plane = self.observation['board']
+            rows = self._rows
+            masks = board.rows
+            # 最高方块以上的行在上一次和这一次都是空的（消行只会让方块下移）
+            for y in range(min(board.top_row(), self._top), self.height):
+                mask = masks[y]
+                if mask != rows[y]:
+                    rows[y] = mask
+                    plane[y] = np.unpackbits(
+                        np.frombuffer(mask.to_bytes(self._row_bytes, 'little'), dtype=np.uint8),
+                        count=self.width, bitorder='little')
+            self._top = board.top_row()
+
+        piece = game.current_piece
+        key = (piece.shape_index, piece.rotation, piece.x, piece.y)
+        if key != self._piece_key:
+            self._piece_key = key
+            plane = self.observation['piece']
+            for x, y in self._piece_cells:
+                plane[y, x] = 0
+            cells = [(x, y) for x, y in piece.get_cells() if 0 <= x < self.width and 0 <= y < self.height]
+            for x, y in cells:
+                plane[y, x] = 1
+            self._piece_cells = cells
+            self.observation['piece_state'][:] = key
+
+        self.observation['next_piece'][0] = game.next_piece.shape_index
+        info = self.info
+        info['score'] = game.score
+        info['lines_cleared'] = game.lines_cleared
+        info['level'] = game.level
+        info['steps'] = self.steps
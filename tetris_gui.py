@@ -0,0 +1,795 @@
+"""
+俄罗斯方块图形前端
+基于pygame的渲染器和主循环，游戏逻辑来自 tetris_core
+"""
+
+import math
+import pygame
+import sys
+import time
+from collections import OrderedDict
+
+from tetris_core import (
+    BLACK, WHITE, RED, YELLOW, GRAY, SHAPE_COLORS,
+    GRID_WIDTH, GRID_HEIGHT, DAS_MS, ARR_MS,
+    TetrisGame, InputHandler,
+)
+from tetris_ai import AutoPilot
+from tetris_perf import FrameProfiler, StartupTimer
+
+# 显示配置
+CELL_SIZE = 30
+GRID_X_OFFSET = 50
+GRID_Y_OFFSET = 50
+
+# 窗口尺寸
+WINDOW_WIDTH = GRID_WIDTH * CELL_SIZE + 2 * GRID_X_OFFSET + 200
+WINDOW_HEIGHT = GRID_HEIGHT * CELL_SIZE + 2 * GRID_Y_OFFSET
+
+# 棋盘大于窗口时只显示可视区域，方块离可视区域边缘少于这么多格时滚动
+SCROLL_MARGIN_ROWS = 4
+SCROLL_MARGIN_COLS = 2
+
+# 按键 -> InputHandler 的动作
+KEY_ACTIONS = {
+    pygame.K_LEFT: 'left',
+    pygame.K_RIGHT: 'right',
+    pygame.K_DOWN: 'down',
+    pygame.K_UP: 'rotate',
+    pygame.K_SPACE: 'drop',
+}
+
+# 逻辑更新频率和默认的渲染频率（每秒次数）
+TICK_RATE = 60
+RENDER_RATE = 60
+
+class _NoMeasure:
+    """不做性能分析时代替 FrameProfiler.measure 的空上下文管理器
+    （contextlib.nullcontext 要到 Python 3.7 才有）"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_MEASURE = _NoMeasure()
+
+
+class FrameScheduler:
+    """固定步长调度器
+
+    游戏逻辑按 tick_rate 以固定的 dt 推进，与渲染频率无关；渲染按 render_rate 限速，
+    render_rate 为 None 时不限速。一次最多补 max_ticks 步，落后太多（例如窗口被拖动）
+    时直接丢弃积压的时间，避免越追越慢。clock 用于测试时注入时间。
+    """
+
+    def __init__(self, tick_rate=TICK_RATE, render_rate=RENDER_RATE, max_ticks=5, clock=time.perf_counter):
+        self.tick_interval = 1.0 / tick_rate
+        self.tick_ms = 1000.0 / tick_rate
+        self.render_interval = None if render_rate is None else 1.0 / render_rate
+        self.max_ticks = max_ticks
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        """从当前时刻重新计时；暂停或等待事件之后调用，不补跑停下的时间"""
+        now = self.clock()
+        self.last = now
+        self.accumulator = 0.0
+        self.next_render = now
+
+    def ticks(self):
+        """返回到现在为止应该执行的逻辑步数"""
+        now = self.clock()
+        self.accumulator += now - self.last
+        self.last = now
+        count = int(self.accumulator / self.tick_interval)
+        if count > self.max_ticks:
+            count = self.max_ticks
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= count * self.tick_interval
+        return count
+
+    def logic_time(self):
+        """逻辑已经推进到的时刻（与 clock 同一时间轴，单位秒）"""
+        return self.last - self.accumulator
+
+    def should_render(self):
+        """是否到了渲染下一帧的时间"""
+        if self.render_interval is None:
+            return True
+        now = self.clock()
+        if now < self.next_render:
+            return False
+        # 按固定间隔排期；落后超过一帧时从现在重新开始
+        self.next_render += self.render_interval
+        if self.next_render <= now:
+            self.next_render = now + self.render_interval
+        return True
+
+    def idle_time(self):
+        """距离下一次逻辑更新或渲染还有多少秒，可以用来休眠；渲染不限速时不休眠"""
+        if self.render_interval is None:
+            return 0.0
+        now = self.clock()
+        wait = min(self.tick_interval - self.accumulator - (now - self.last),
+                   self.next_render - now)
+        return max(0.0, wait)
+
+class TextCache:
+    """文字表面缓存：(字体, 文本, 颜色) -> 渲染好的 Surface
+
+    有容量上限，按最近最少使用淘汰。数值变化时文本不同，自然会渲染新的表面，
+    旧表面随后被挤出缓存；数值不变时每帧都直接复用。
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._surfaces = OrderedDict()
+
+    def __len__(self):
+        return len(self._surfaces)
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.maxsize:
+            self._surfaces.popitem(last=False)
+        return surface
+
+
+class CellAtlas:
+    """预渲染的格子贴图集
+
+    所有贴图放在同一个 Surface 上，每种颜色占一列：普通格子、虚影格子（颜色的三分之一）
+    和预览用的半尺寸格子。SHAPE_COLORS 的贴图在创建时生成；遇到其他颜色
+    （例如直接调用 set_color）时再加一列。tile/ghost/preview 返回贴图在图集上的矩形，
+    与图集一起交给 Surface.blits。
+    """
+
+    def __init__(self, colors=SHAPE_COLORS, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.surface = pygame.Surface((0, 3 * cell_size))
+        self._tiles = {}
+        self._ghosts = {}
+        self._previews = {}
+        self._add(colors)
+
+    def __len__(self):
+        return len(self._tiles)
+
+    def tile(self, color):
+        area = self._tiles.get(color)
+        if area is None:
+            self._add([color])
+            area = self._tiles[color]
+        return area
+
+    def ghost(self, color):
+        area = self._ghosts.get(color)
+        if area is None:
+            self._add([color])
+            area = self._ghosts[color]
+        return area
+
+    def preview(self, color):
+        area = self._previews.get(color)
+        if area is None:
+            self._add([color])
+            area = self._previews[color]
+        return area
+
+    def _add(self, colors):
+        colors = [color for color in dict.fromkeys(colors) if color not in self._tiles]
+        if not colors:
+            return
+        size = self.cell_size
+        old = self.surface
+        self.surface = pygame.Surface((old.get_width() + len(colors) * size, 3 * size))
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert()
+        self.surface.fill(BLACK)
+        self.surface.blit(old, (0, 0))
+        x = old.get_width()
+        for color in colors:
+            tile = pygame.Rect(x, 0, size - 2, size - 2)
+            ghost = pygame.Rect(x, size, size - 2, size - 2)
+            preview = pygame.Rect(x, 2 * size, size // 2 - 1, size // 2 - 1)
+            self.surface.fill(color, tile)
+            self.surface.fill(tuple(c // 3 for c in color), ghost)
+            self.surface.fill(color, preview)
+            self._tiles[color] = tile
+            self._ghosts[color] = ghost
+            self._previews[color] = preview
+            x += size
+
+
+class TetrisRenderer:
+    """保留模式渲染器
+
+    静态背景（网格线、标题、操作说明）只绘制一次；已放置的方块缓存在离屏图层上，
+    只有棋盘变化时才重画。每帧只恢复并重画发生变化的区域（当前方块、虚影、
+    预览和计数），render 返回这些区域，交给 pygame.display.update 只刷新它们。
+    格子不逐个调用 pygame.draw.rect：draw_* 只把图集（CellAtlas）上的贴图加入队列，
+    draw_cells 用一次 Surface.blits 全部画出。
+
+    给出 profiler（FrameProfiler）时，render 和每个 draw_* 调用都会计时。
+    """
+
+    # 开启统计时计时的方法
+    PROFILED_METHODS = (
+        'render', 'draw_grid', 'draw_board', 'draw_piece', 'draw_ghost_piece',
+        'draw_next_piece', 'draw_cells', 'draw_counters', 'draw_controls', 'draw_game_over', 'draw_pause',
+    )
+
+    def __init__(self, screen, profiler=None):
+        if not pygame.font.get_init():
+            pygame.font.init()
+        self.screen = screen
+        # 字体只在这里加载一次
+        self.font = pygame.font.Font(None, 36)
+        self.small_font = pygame.font.Font(None, 24)
+        self.tiny_font = pygame.font.Font(None, 20)
+        self.text_cache = TextCache()
+        self._overlay = None
+        self.atlas = CellAtlas()
+        self.cells = []          # 等待 draw_cells 绘制的 (图集, 位置, 贴图矩形)
+        
+        side_x = GRID_X_OFFSET + GRID_WIDTH * CELL_SIZE + 20
+        self.screen_rect = screen.get_rect()
+        self.playfield_rect = pygame.Rect(GRID_X_OFFSET, GRID_Y_OFFSET,
+                                          GRID_WIDTH * CELL_SIZE + 1, GRID_HEIGHT * CELL_SIZE + 1)
+        self.preview_rect = pygame.Rect(side_x, GRID_Y_OFFSET + 50,
+                                        5 * (CELL_SIZE // 2), 5 * (CELL_SIZE // 2))
+        self.info_rect = pygame.Rect(side_x, GRID_Y_OFFSET + 150,
+                                     self.screen_rect.width - side_x, 80)
+        # 可视区域：最多 GRID_WIDTH x GRID_HEIGHT 格，左上角是棋盘上的 (view_x, view_y)
+        self.view_cols, self.view_rows = GRID_WIDTH, GRID_HEIGHT
+        self.view_x = self.view_y = 0
+        self._board_size = (GRID_WIDTH, GRID_HEIGHT)
+        
+        self.background = None   # 静态背景
+        self.board_layer = None  # 背景 + 已放置的方块
+        self._board = None
+        self._board_version = None
+        self._frame = None       # 上一帧动态内容的状态
+        self._piece_rects = []   # 上一帧当前方块和虚影所在的矩形
+        
+        # 帧耗时面板位于操作说明下方
+        self.hud_rect = pygame.Rect(side_x, self.info_rect.top + 320,
+                                    self.screen_rect.width - side_x, 16 * 11)
+        self.profiler = profiler
+        if profiler is not None:
+            # 用计时版本遮住这些方法，不开启时没有任何额外开销
+            for name in self.PROFILED_METHODS:
+                setattr(self, name, profiler.wrap(name, getattr(self, name)))
+    
+    def invalidate(self):
+        """丢弃上一帧的状态，下一帧整屏重画（例如窗口被遮挡后恢复）"""
+        self._frame = None
+    
+    def _draw_on(self, surface, draw, *args):
+        """让 draw_* 方法画到指定的图层上"""
+        screen, self.screen = self.screen, surface
+        try:
+            draw(*args)
+        finally:
+            self.screen = screen
+    
+    def _layout(self, board):
+        """按棋盘尺寸设置可视区域和游戏区域矩形，背景随之重建"""
+        self._board_size = (board.width, board.height)
+        self.view_cols = min(board.width, GRID_WIDTH)
+        self.view_rows = min(board.height, GRID_HEIGHT)
+        self.view_x = min(self.view_x, board.width - self.view_cols)
+        self.view_y = min(self.view_y, board.height - self.view_rows)
+        self.playfield_rect = pygame.Rect(GRID_X_OFFSET, GRID_Y_OFFSET,
+                                          self.view_cols * CELL_SIZE + 1, self.view_rows * CELL_SIZE + 1)
+        self.background = None
+        self._frame = None
+    
+    def _follow(self, piece):
+        """滚动可视区域，让方块离边缘至少留出几格；返回是否滚动了"""
+        width, height = self._board_size
+        min_x, min_y, max_x, max_y = piece.get_geometry().bbox
+        view_x = self._scroll(self.view_x, self.view_cols, width,
+                              piece.x + min_x, piece.x + max_x, SCROLL_MARGIN_COLS)
+        view_y = self._scroll(self.view_y, self.view_rows, height,
+                              piece.y + min_y, piece.y + max_y, SCROLL_MARGIN_ROWS)
+        if (view_x, view_y) == (self.view_x, self.view_y):
+            return False
+        self.view_x, self.view_y = view_x, view_y
+        return True
+    
+    @staticmethod
+    def _scroll(start, size, limit, low, high, margin):
+        """一个方向上的滚动：[low, high] 超出 [start + margin, start + size - 1 - margin] 时移动"""
+        margin = min(margin, (size - 1) // 2)
+        if low < start + margin:
+            start = low - margin
+        elif high > start + size - 1 - margin:
+            start = high + margin - size + 1
+        return max(0, min(start, limit - size))
+    
+    def draw_grid(self):
+        """绘制游戏网格（可视区域大小）"""
+        for x in range(self.view_cols + 1):
+            pygame.draw.line(self.screen, GRAY, 
+                           (GRID_X_OFFSET + x * CELL_SIZE, GRID_Y_OFFSET),
+                           (GRID_X_OFFSET + x * CELL_SIZE, GRID_Y_OFFSET + self.view_rows * CELL_SIZE))
+        
+        for y in range(self.view_rows + 1):
+            pygame.draw.line(self.screen, GRAY,
+                           (GRID_X_OFFSET, GRID_Y_OFFSET + y * CELL_SIZE),
+                           (GRID_X_OFFSET + self.view_cols * CELL_SIZE, GRID_Y_OFFSET + y * CELL_SIZE))
+    
+    def _visible(self, x, y):
+        return (self.view_x <= x < self.view_x + self.view_cols and
+                self.view_y <= y < self.view_y + self.view_rows)
+    
+    def draw_cell(self, x, y, color):
+        """把单个单元格（棋盘坐标）加入绘制队列"""
+        area = self.atlas.tile(color)
+        self.cells.append((self.atlas.surface,
+                           (GRID_X_OFFSET + (x - self.view_x) * CELL_SIZE + 1,
+                            GRID_Y_OFFSET + (y - self.view_y) * CELL_SIZE + 1),
+                           area))
+    
+    def draw_cells(self):
+        """用一次 Surface.blits 画出队列中的所有格子"""
+        if self.cells:
+            self.screen.blits(self.cells, doreturn=False)
+            self.cells.clear()
+    
+    def draw_board(self, board):
+        """把可视区域内已放置的方块加入绘制队列，只遍历可见的行"""
+        left, right = self.view_x, self.view_x + self.view_cols
+        atlas = self.atlas
+        tile = atlas.tile
+        origin_x = GRID_X_OFFSET + 1 - self.view_x * CELL_SIZE
+        origin_y = GRID_Y_OFFSET + 1 - self.view_y * CELL_SIZE
+        # 图集只会在遇到新颜色时重建，先取贴图矩形再取 atlas.surface
+        cells = [((origin_x + x * CELL_SIZE, origin_y + y * CELL_SIZE), tile(color))
+                 for x, y, color in board.filled_cells(self.view_y, self.view_y + self.view_rows)
+                 if left <= x < right]
+        surface = atlas.surface
+        self.cells.extend((surface, dest, area) for dest, area in cells)
+    
+    def draw_piece(self, piece):
+        """把方块加入绘制队列"""
+        cells = piece.get_cells()
+        for x, y in cells:
+            if self._visible(x, y):
+                self.draw_cell(x, y, piece.color)
+    
+    def draw_ghost_piece(self, game, ghost_y=None):
+        """把虚影方块（显示方块将要落下的位置）加入绘制队列"""
+        piece = game.current_piece
+        
+        # 找到最低可能的位置
+        if ghost_y is None:
+            ghost_y = piece.y + game.drop_distance(piece)
+        
+        # 虚影使用较淡的颜色，贴图已在图集中
+        area = self.atlas.ghost(piece.color)
+        surface = self.atlas.surface
+        for dx, dy in piece.get_geometry().cells:
+            x, y = piece.x + dx, ghost_y + dy
+            if self._visible(x, y):
+                self.cells.append((surface,
+                                   (GRID_X_OFFSET + (x - self.view_x) * CELL_SIZE + 1,
+                                    GRID_Y_OFFSET + (y - self.view_y) * CELL_SIZE + 1),
+                                   area))
+    
+    def draw_next_piece(self, piece, title=True):
+        """绘制下一个方块预览（标题已在背景中时传 title=False）"""
+        next_x, next_y = self.preview_rect.topleft
+        
+        # 绘制标题
+        if title:
+            text = self.text_cache.render(self.small_font, "Next:", WHITE)
+            self.screen.blit(text, (next_x, next_y - 30))
+        
+        # 下一个方块加入绘制队列
+        area = self.atlas.preview(piece.color)
+        surface = self.atlas.surface
+        self.cells.extend((surface, (next_x + j * (CELL_SIZE // 2), next_y + i * (CELL_SIZE // 2)), area)
+                          for j, i in piece.get_geometry().cells)
+    
+    def draw_counters(self, game):
+        """绘制得分、行数和等级"""
+        info_x, info_y = self.info_rect.topleft
+        
+        # 得分
+        score_text = self.text_cache.render(self.small_font, f"Score: {game.score}", WHITE)
+        self.screen.blit(score_text, (info_x, info_y))
+        
+        # 行数
+        lines_text = self.text_cache.render(self.small_font, f"Lines: {game.lines_cleared}", WHITE)
+        self.screen.blit(lines_text, (info_x, info_y + 30))
+        
+        # 等级
+        level_text = self.text_cache.render(self.small_font, f"Level: {game.level}", WHITE)
+        self.screen.blit(level_text, (info_x, info_y + 60))
+    
+    def draw_controls(self):
+        """绘制操作说明"""
+        info_x = self.info_rect.left
+        controls_y = self.info_rect.top + 120
+        controls = [
+            "Controls:",
+            "← → : Move",
+            "↓ : Soft Drop",
+            "↑ : Rotate",
+            "Space: Hard Drop",
+            "P: Pause",
+            "R: Restart",
+            "A: Autoplay",
+            "U: Undo"
+        ]
+        
+        for i, control in enumerate(controls):
+            color = WHITE if i == 0 else GRAY
+            font = self.small_font if i == 0 else self.tiny_font
+            text = self.text_cache.render(font, control, color)
+            self.screen.blit(text, (info_x, controls_y + i * 20))
+    
+    def draw_info(self, game):
+        """绘制游戏信息"""
+        self.draw_counters(game)
+        self.draw_controls()
+    
+    def _get_overlay(self):
+        """半透明遮罩，只创建一次"""
+        if self._overlay is None:
+            self._overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+            self._overlay.set_alpha(128)
+            self._overlay.fill(BLACK)
+        return self._overlay
+    
+    def draw_game_over(self):
+        """绘制游戏结束画面"""
+        self.screen.blit(self._get_overlay(), (0, 0))
+        
+        game_over_text = self.text_cache.render(self.font, "GAME OVER", RED)
+        restart_text = self.text_cache.render(self.small_font, "Press R to restart", WHITE)
+        
+        game_over_rect = game_over_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
+        restart_rect = restart_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 50))
+        
+        self.screen.blit(game_over_text, game_over_rect)
+        self.screen.blit(restart_text, restart_rect)
+    
+    def draw_pause(self):
+        """绘制暂停画面"""
+        self.screen.blit(self._get_overlay(), (0, 0))
+        
+        pause_text = self.text_cache.render(self.font, "PAUSED", YELLOW)
+        continue_text = self.text_cache.render(self.small_font, "Press P to continue", WHITE)
+        
+        pause_rect = pause_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
+        continue_rect = continue_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 50))
+        
+        self.screen.blit(pause_text, pause_rect)
+        self.screen.blit(continue_text, continue_rect)
+    
+    def draw_perf_hud(self, profiler):
+        """绘制各阶段耗时的滚动分位数（毫秒），返回需要刷新的矩形"""
+        rect = self.hud_rect
+        self.screen.blit(self.board_layer, rect, rect)
+        x, y = rect.topleft
+        header = self.tiny_font.render("ms        p50   p95   p99", True, WHITE)
+        self.screen.blit(header, (x, y))
+        for i, (name, stats) in enumerate(profiler.summary().items(), 1):
+            if y + (i + 1) * 16 > rect.bottom:
+                break
+            label = name[5:] if name.startswith("draw_") else name
+            line = f"{label[:9]:<9} {stats['p50']:5.2f} {stats['p95']:5.2f} {stats['p99']:5.2f}"
+            # 数值每次都不同，不放进文字缓存
+            text = self.tiny_font.render(line, True, GRAY)
+            self.screen.blit(text, (x, y + i * 16))
+        return rect
+    
+    def preload(self):
+        """预先生成第一帧用不到的表面（遮罩、暂停和结束画面的文字），之后切换时不卡顿"""
+        if self.background is None:
+            self._build_background()
+        scratch = pygame.Surface(self.screen_rect.size)
+        self._draw_on(scratch, self.draw_pause)
+        self._draw_on(scratch, self.draw_game_over)
+    
+    def _build_background(self):
+        """绘制静态背景：网格线、预览标题和操作说明"""
+        self.background = pygame.Surface(self.screen_rect.size)
+        if pygame.display.get_surface() is not None:
+            self.background = self.background.convert()
+        self.background.fill(BLACK)
+        self._draw_on(self.background, self.draw_grid)
+        self._draw_on(self.background, self.draw_controls)
+        title = self.text_cache.render(self.small_font, "Next:", WHITE)
+        self.background.blit(title, (self.preview_rect.left, self.preview_rect.top - 30))
+        self.board_layer = self.background.copy()
+        self._board = None
+    
+    def _update_board_layer(self, board):
+        """棋盘变化后，在图层上重画游戏区域"""
+        area = self.playfield_rect
+        self.board_layer.blit(self.background, area, area)
+        self.draw_board(board)
+        self._draw_on(self.board_layer, self.draw_cells)
+        self._board = board
+        self._board_version = board.version
+    
+    def _piece_rect(self, piece, y):
+        """方块在屏幕上占据的矩形（裁剪到游戏区域内）"""
+        min_x, min_y, max_x, max_y = piece.get_geometry().bbox
+        rect = pygame.Rect(GRID_X_OFFSET + (piece.x + min_x - self.view_x) * CELL_SIZE,
+                           GRID_Y_OFFSET + (y + min_y - self.view_y) * CELL_SIZE,
+                           (max_x - min_x + 1) * CELL_SIZE,
+                           (max_y - min_y + 1) * CELL_SIZE)
+        return rect.clip(self.playfield_rect)
+    
+    def render(self, game, game_state):
+        """渲染整个游戏，返回屏幕上发生变化的矩形列表"""
+        board = game.grid
+        if (board.width, board.height) != self._board_size:
+            self._layout(board)
+        if self.background is None:
+            self._build_background()
+        
+        piece = game.current_piece
+        playing = game_state == "playing"
+        # 可视区域滚动后已放置的方块也要重画
+        scrolled = playing and self._follow(piece)
+        board_changed = board is not self._board or board.version != self._board_version or scrolled
+        if board_changed:
+            self._update_board_layer(board)
+        
+        ghost_y = piece.y + game.drop_distance(piece) if playing else None
+        frame = {
+            'state': game_state,
+            'piece': (piece.shape_index, piece.rotation, piece.x, piece.y) if playing else None,
+            'ghost': ghost_y,
+            'next': game.next_piece.shape_index,
+            'counters': (game.score, game.lines_cleared, game.level),
+        }
+        last = self._frame
+        self._frame = frame
+        
+        if last is not None and frame == last and not board_changed:
+            return []
+        
+        last_piece_rects = self._piece_rects
+        if playing:
+            self._piece_rects = [self._piece_rect(piece, piece.y), self._piece_rect(piece, ghost_y)]
+        
+        if last is None or frame['state'] != last['state'] or not playing:
+            # 状态切换或覆盖层显示时整屏重画
+            self.screen.blit(self.board_layer, (0, 0))
+            if playing:
+                self.draw_ghost_piece(game, ghost_y)
+                self.draw_piece(piece)
+            self.draw_next_piece(game.next_piece, title=False)
+            self.draw_cells()
+            self.draw_counters(game)
+            if game_state == "game_over":
+                self.draw_game_over()
+            elif game_state == "paused":
+                self.draw_pause()
+            return [self.screen_rect]
+        
+        dirty = []
+        if board_changed:
+            dirty.append(self.playfield_rect)
+        elif frame['piece'] != last['piece'] or frame['ghost'] != last['ghost']:
+            # 旧位置和新位置都要刷新
+            dirty.extend(last_piece_rects)
+            dirty.extend(self._piece_rects)
+        if frame['next'] != last['next']:
+            dirty.append(self.preview_rect)
+        if frame['counters'] != last['counters']:
+            dirty.append(self.info_rect)
+        
+        dirty = [rect for rect in dirty if rect.width and rect.height]
+        for rect in dirty:
+            self.screen.blit(self.board_layer, rect, rect)
+        self.draw_ghost_piece(game, ghost_y)
+        self.draw_piece(piece)
+        if frame['next'] != last['next']:
+            self.draw_next_piece(game.next_piece, title=False)
+        self.draw_cells()
+        if frame['counters'] != last['counters']:
+            self.draw_counters(game)
+        return dirty
+
+def main(autoplay=False, tick_rate=TICK_RATE, render_rate=RENDER_RATE, profile=False, trace_path=None,
+         width=GRID_WIDTH, height=GRID_HEIGHT, das=DAS_MS, arr=ARR_MS, startup=None):
+    """运行游戏：逻辑按 tick_rate 固定步长更新，画面按 render_rate 刷新（None 为不限速）
+
+    width、height 是棋盘尺寸，超过窗口时画面跟随当前方块滚动。按键的自动重复由
+    InputHandler 按 das、arr（毫秒）在逻辑中处理；开启统计时记录输入到画面的延迟。
+
+    profile 为真时统计每帧各阶段的耗时，按 F3 显示统计面板；给出 trace_path 时
+    同时开启统计，并在退出时把轨迹写入该文件（.csv 或 .json）。
+    给出 startup（StartupTimer）时，显示第一帧之后打印启动各阶段的耗时。
+    """
+    timer = startup if startup is not None else StartupTimer()
+    try:
+        # 只初始化用到的子系统（显示和字体），音频、手柄等都不初始化
+        pygame.display.init()
+        pygame.font.init()
+        timer.mark("init")
+        screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        pygame.display.set_caption("俄罗斯方块")
+        timer.mark("set_mode")
+    except pygame.error as e:
+        print(f"无法初始化游戏窗口: {e}")
+        print("这通常是因为没有可用的图形显示设备。")
+        print("请在有图形界面的环境中运行此游戏。")
+        return
+    
+    profiler = FrameProfiler() if profile or trace_path else None
+    measure = profiler.measure if profiler is not None else (lambda name: _NO_MEASURE)
+    show_hud = False
+    hud_updated = 0.0
+    
+    game = TetrisGame(width=width, height=height)
+    # 记录最近的放置，按 U 撤销（练习用）
+    game.record_history()
+    renderer = TetrisRenderer(screen, profiler)
+    timer.mark("renderer")
+    first_frame = True
+    scheduler = FrameScheduler(tick_rate, render_rate)
+    # 按键带接收时刻交给逻辑层，自动重复不依赖系统的按键重复
+    handler = InputHandler(game, das, arr, time=scheduler.logic_time() * 1000)
+    game_state = "playing"  # "playing", "paused", "game_over"
+    # 自动演示：由AI代替玩家操作，按 A 切换
+    pilot = AutoPilot()
+    
+    waited = None  # 空闲等待时收到的 (事件, 时刻)
+    running = True
+    while running:
+        if game_state == "playing":
+            if waited is not None:
+                event, stamp = waited
+                events = [event] + pygame.event.get()
+                waited = None
+            else:
+                stamp = time.perf_counter()
+                events = pygame.event.get()
+        else:
+            # 暂停或结束时画面不会自己变化：阻塞等待下一个事件，不占用CPU
+            events = [pygame.event.wait()] + pygame.event.get()
+            stamp = time.perf_counter()
+            scheduler.reset()
+        stamp *= 1000
+        if profiler is not None:
+            profiler.begin_frame()
+        
+        # 处理事件
+        with measure("events"):
+            for event in events:
+                if event.type == pygame.QUIT:
+                    running = False
+                
+                elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    # 窗口内容可能已经丢失，下一帧整屏重画
+                    renderer.invalidate()
+                
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_r:
+                        # 重新开始游戏
+                        game = TetrisGame(width=width, height=height)
+                        game.record_history()
+                        game_state = "playing"
+                        pilot.reset()
+                        handler.reset(game)
+                    
+                    elif event.key == pygame.K_u and game_state != "paused":
+                        # 撤销上一次放置，结束画面上也可以撤销
+                        if game.undo():
+                            game_state = "playing"
+                            pilot.reset()
+                            # 结束时 handler.alive 已经为假，不重置的话下一个 tick 又会结束
+                            handler.reset(game)
+                            scheduler.reset()
+                    
+                    elif event.key == pygame.K_F3 and profiler is not None:
+                        # 显示/隐藏帧耗时面板
+                        show_hud = not show_hud
+                        renderer.invalidate()
+                    
+                    elif event.key == pygame.K_a:
+                        # 切换自动演示
+                        autoplay = not autoplay
+                        pilot.reset()
+                    
+                    elif event.key == pygame.K_p:
+                        # 暂停/继续
+                        if game_state == "playing":
+                            game_state = "paused"
+                        elif game_state == "paused":
+                            game_state = "playing"
+                    
+                    elif game_state == "playing" and not autoplay and event.key in KEY_ACTIONS:
+                        handler.press(KEY_ACTIONS[event.key], stamp)
+                
+                elif event.type == pygame.KEYUP and event.key in KEY_ACTIONS:
+                    # 松开总是要记录，否则暂停期间松开的键会一直重复
+                    handler.release(KEY_ACTIONS[event.key], stamp)
+        
+        # 更新游戏状态：按固定步长补齐经过的时间；手动操作时输入在各自的时刻执行
+        ticks = scheduler.ticks() if game_state == "playing" else 0
+        if ticks:
+            end = scheduler.logic_time() * 1000
+            # 暂停、自动演示或丢弃积压的时间不推进游戏
+            handler.skip(end - ticks * scheduler.tick_ms)
+            for i in range(ticks, 0, -1):
+                with measure("update"):
+                    if autoplay:
+                        # 自动演示同样受重力影响，AutoPilot 在输入失败时重新决策
+                        if not pilot.step(game) or not game.update(scheduler.tick_ms):
+                            game_state = "game_over"
+                        handler.skip(end - (i - 1) * scheduler.tick_ms)
+                    elif not handler.advance(end - (i - 1) * scheduler.tick_ms):
+                        game_state = "game_over"
+                if game_state != "playing":
+                    break
+        
+        # 渲染：只刷新发生变化的区域；暂停和结束画面要立即画出来
+        rendered = game_state != "playing" or scheduler.should_render()
+        if rendered:
+            dirty = renderer.render(game, game_state)
+            if show_hud:
+                # 面板每0.25秒更新一次，整屏重画后立即补上
+                now = time.perf_counter()
+                if now - hud_updated >= 0.25 or renderer.screen_rect in dirty:
+                    hud_updated = now
+                    dirty.append(renderer.draw_perf_hud(profiler))
+            if dirty:
+                with measure("flip"):
+                    pygame.display.update(dirty)
+                for latency in handler.take_latencies(time.perf_counter() * 1000):
+                    if profiler is not None:
+                        profiler.sample("input_latency", latency)
+        if profiler is not None and (ticks or rendered):
+            # 只记录做了事情的帧，等待的空转不算
+            profiler.end_frame()
+        if rendered and first_frame:
+            # 第一帧已经显示，再准备之后才用得到的表面；这一帧已经结束，
+            # 预加载时调用的 draw_* 在下一帧的 begin_frame 时丢弃，不计入统计
+            first_frame = False
+            timer.mark("first_frame")
+            renderer.preload()
+            timer.mark("preload")
+            if startup is not None:
+                print(timer.format())
+        
+        if game_state == "playing":
+            # 休眠到下一次逻辑更新或渲染；有输入时立即醒来并记下接收的时刻
+            idle_ms = math.ceil(scheduler.idle_time() * 1000)
+            if idle_ms > 0:
+                event = pygame.event.wait(idle_ms)
+                if event.type != pygame.NOEVENT:
+                    waited = (event, time.perf_counter())
+    
+    if trace_path:
+        profiler.dump(trace_path)
+        print(f"帧耗时轨迹已写入 {trace_path}")
+    pygame.quit()
+    sys.exit()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
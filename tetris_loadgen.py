@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+多人服务器压力测试
+用asyncio模拟大量玩家连接 tetris_server，每个玩家按固定频率发送随机输入，
+统计服务器的 tick/秒 和输入延迟（从发送到收到确认该输入的状态）的分位数
+用法: python3 tetris_loadgen.py --port 7777 -n 1000 --duration 10
+      python3 tetris_loadgen.py --local -n 200        # 在同一进程内启动服务器
+      python3 tetris_loadgen.py --local -n 20 --spectators 300   # 另有300个观众随机观战
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+from collections import deque
+
+from tetris_perf import RollingHistogram
+from tetris_server import TetrisServer, TICK_RATE
+from tetris_spectate import KEYFRAME, SpectatorView, read_message
+
+COMMANDS = ("left", "right", "rotate", "down", "drop")
+
+
+class LoadStats:
+    """所有模拟玩家共用的统计"""
+
+    def __init__(self):
+        self.latency = RollingHistogram(window=1000000)
+        self.sent = 0
+        self.updates = 0
+        self.connected = 0
+        self.errors = 0
+        self.spectator_bytes = 0
+        self.spectator_messages = 0
+        self.spectator_keyframes = 0
+
+
+async def _player(connect, rng, rate, stop, stats):
+    """一个模拟玩家：按 rate 次/秒发送输入，读取状态行计算延迟"""
+    loop = asyncio.get_running_loop()
+    try:
+        reader, writer = await connect()
+    except OSError:
+        stats.errors += 1
+        return
+    stats.connected += 1
+    pending = deque()  # (序号, 发送时间)，序号递增，服务器按顺序确认
+
+    async def receive():
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            if not line.startswith(b"S "):
+                continue
+            stats.updates += 1
+            fields = line.split(b" ", 8)
+            ack = int(fields[2])
+            now = loop.time()
+            while pending and pending[0][0] <= ack:
+                stats.latency.add((now - pending.popleft()[1]) * 1000.0)
+            if fields[6] == b"over":
+                writer.write(b"0 restart\n")
+
+    receiver = asyncio.create_task(receive())
+    seq = 0
+    # 错开各个玩家的发送时间
+    await asyncio.sleep(rng.random() / rate)
+    try:
+        while loop.time() < stop and not receiver.done():
+            seq += 1
+            pending.append((seq, loop.time()))
+            writer.write(f"{seq} {rng.choice(COMMANDS)}\n".encode())
+            stats.sent += 1
+            await asyncio.sleep(1.0 / rate)
+    except ConnectionError:
+        stats.errors += 1
+    finally:
+        receiver.cancel()
+        writer.close()
+
+
+async def _list_games(connect):
+    """正在进行的对局编号"""
+    reader, writer = await connect()
+    writer.write(b"games\n")
+    while True:
+        line = await reader.readline()
+        if not line or line.startswith(b"GAMES"):
+            break
+    writer.write(b"quit\n")
+    writer.close()
+    return line.split()[1:]
+
+
+async def _spectator(connect, game, stop, stats):
+    """一个观众：观战指定的一局，统计收到的字节数并解码每条消息"""
+    loop = asyncio.get_running_loop()
+    try:
+        reader, writer = await connect()
+    except OSError:
+        stats.errors += 1
+        return
+    try:
+        writer.write(b"watch " + game + b"\n")
+        while True:
+            line = await reader.readline()
+            if not line or line.startswith((b"WATCH", b"ERR")):
+                break
+        if not line.startswith(b"WATCH"):
+            return
+        view = SpectatorView()
+        while loop.time() < stop:
+            remaining = stop - loop.time()
+            try:
+                message = await asyncio.wait_for(read_message(reader), remaining)
+            except asyncio.TimeoutError:
+                break
+            if message is None:
+                break
+            view.apply(message)
+            stats.spectator_bytes += len(message) + 4
+            stats.spectator_messages += 1
+            stats.spectator_keyframes += message[:1] == KEYFRAME
+    except ConnectionError:
+        stats.errors += 1
+    finally:
+        writer.close()
+
+
+async def _query_stats(connect):
+    reader, writer = await connect()
+    writer.write(b"stats\n")
+    while True:
+        line = await reader.readline()
+        if not line or line.startswith(b"STATS"):
+            break
+    writer.write(b"quit\n")
+    writer.close()
+    _, games, rate, p50, p99 = line.split()
+    return {'games': int(games), 'ticks_per_second': float(rate),
+            'tick_lag_p50_ms': float(p50), 'tick_lag_p99_ms': float(p99)}
+
+
+async def run_load(players=100, duration=10.0, rate=10.0, host="127.0.0.1", port=7777,
+                   unix_path=None, local=False, tick_rate=TICK_RATE, seed=0, warmup=1.0, spectators=0):
+    """运行一次压力测试，返回结果字典；local 为真时在同一事件循环里启动服务器
+
+    spectators 个观众在预热之后各自随机选一局玩家的对局观战。
+    """
+    listener = None
+    if local:
+        server = TetrisServer(tick_rate, seed)
+        listener = await server.start(host, 0 if unix_path is None else port, unix_path)
+        if unix_path is None:
+            port = listener.sockets[0].getsockname()[1]
+
+    def connect():
+        if unix_path is not None:
+            return asyncio.open_unix_connection(unix_path)
+        return asyncio.open_connection(host, port)
+
+    loop = asyncio.get_running_loop()
+    rng = random.Random(seed)
+    stats = LoadStats()
+    stop = loop.time() + warmup + duration
+    tasks = [asyncio.create_task(_player(connect, random.Random(rng.random()), rate, stop, stats))
+             for _ in range(players)]
+    # 预热之后才开始统计
+    await asyncio.sleep(warmup)
+    if spectators:
+        # 每个连接都会先开一局自己的游戏，所以观众要在列出玩家的对局之后才连接
+        games = await _list_games(connect)
+        tasks.extend(asyncio.create_task(_spectator(connect, rng.choice(games), stop, stats))
+                     for _ in range(spectators))
+    await _query_stats(connect)
+    stats.latency = RollingHistogram(window=1000000)
+    stats.updates = 0
+    await asyncio.sleep(duration)
+    server_stats = await _query_stats(connect)
+    await asyncio.gather(*tasks)
+    if listener is not None:
+        listener.close()
+        await server.close()
+        await listener.wait_closed()
+
+    latency = stats.latency.summary()
+    return {
+        'players': players,
+        'connected': stats.connected,
+        'errors': stats.errors,
+        'duration': duration,
+        'inputs_sent': stats.sent,
+        'updates_per_second': stats.updates / duration,
+        'target_ticks_per_second': players * tick_rate,
+        **server_stats,
+        'latency_ms': {key: latency[key] for key in ('p50', 'p95', 'p99', 'max')},
+        'spectators': spectators,
+        'spectator_bytes_per_second': stats.spectator_bytes / duration,
+        'spectator_messages': stats.spectator_messages,
+        'spectator_keyframes': stats.spectator_keyframes,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="模拟大量玩家对 tetris_server 施加负载")
+    parser.add_argument("-n", "--players", type=int, default=100, help="模拟玩家数")
+    parser.add_argument("--duration", type=float, default=10.0, help="统计时长（秒）")
+    parser.add_argument("--rate", type=float, default=10.0, help="每个玩家每秒的输入次数")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--unix", help="连接Unix套接字而不是TCP")
+    parser.add_argument("--local", action="store_true", help="在同一进程中启动服务器（客户端也会占用CPU）")
+    parser.add_argument("--tick-rate", type=int, default=TICK_RATE, help="--local 时服务器每局的 tick/秒")
+    parser.add_argument("--spectators", type=int, default=0, help="观众数，每个观众随机观战一局")
+    parser.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run_load(args.players, args.duration, args.rate, args.host, args.port,
+                                  args.unix, args.local, args.tick_rate, spectators=args.spectators))
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+        return
+    latency = result['latency_ms']
+    print(f"玩家: {result['connected']}/{result['players']}  连接错误: {result['errors']}")
+    print(f"服务器: {result['ticks_per_second']:,.0f} tick/秒"
+          f"（目标 {result['target_ticks_per_second']:,}）  "
+          f"tick延迟 p50 {result['tick_lag_p50_ms']:.2f} ms  p99 {result['tick_lag_p99_ms']:.2f} ms")
+    print(f"状态更新: {result['updates_per_second']:,.0f} 行/秒  发送输入: {result['inputs_sent']}")
+    print(f"输入延迟: p50 {latency['p50']:.2f} ms  p95 {latency['p95']:.2f} ms  "
+          f"p99 {latency['p99']:.2f} ms  最大 {latency['max']:.2f} ms")
+    if result['spectators']:
+        print(f"观战: {result['spectators']} 个观众 {result['spectator_bytes_per_second'] / 1024:,.1f} KiB/秒  "
+              f"消息 {result['spectator_messages']}（关键帧 {result['spectator_keyframes']}）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+帧耗时统计
+按阶段（事件处理、逻辑更新、各个 draw_* 调用、刷新显示）记录每帧的耗时，
+保留最近若干帧的滚动分位数，可以导出为JSON或CSV轨迹；另有启动各阶段的计时。不依赖pygame
+"""
+
+import csv
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class RollingHistogram:
+    """最近 window 个样本（毫秒）的滚动统计"""
+
+    def __init__(self, window=600):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def __len__(self):
+        return len(self.samples)
+
+    def add(self, value):
+        self.samples.append(value)
+        self.count += 1
+
+    def percentile(self, p):
+        """第 p 百分位数（最近邻法），没有样本时为 0"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(p / 100 * len(ordered)))
+        return ordered[index]
+
+    def summary(self):
+        if not self.samples:
+            return {'count': self.count, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return {
+            'count': self.count,
+            'mean': sum(ordered) / len(ordered),
+            'p50': ordered[min(last, len(ordered) // 2)],
+            'p95': ordered[min(last, int(0.95 * len(ordered)))],
+            'p99': ordered[min(last, int(0.99 * len(ordered)))],
+            'max': ordered[last],
+        }
+
+
+class FrameProfiler:
+    """按阶段统计帧耗时
+
+    measure(name) 计时一段代码；同一帧内同名阶段的耗时累加，end_frame 时
+    写入该阶段的滚动直方图，并把整帧记录追加到轨迹（最多 trace_size 帧）。
+    """
+
+    def __init__(self, window=600, trace_size=36000, clock=time.perf_counter):
+        self.clock = clock
+        self.window = window
+        self.sections = {}  # 阶段名 -> RollingHistogram，按首次出现的顺序
+        self.trace = deque(maxlen=trace_size)
+        self.frames = 0
+        self._current = {}
+        self._frame_start = None
+        self._origin = clock()
+
+    def add(self, name, seconds):
+        """记录一段耗时（秒）"""
+        self._current[name] = self._current.get(name, 0.0) + seconds * 1000.0
+
+    def sample(self, name, ms):
+        """直接记录一个不属于某一帧的样本（毫秒），例如输入延迟"""
+        histogram = self.sections.get(name)
+        if histogram is None:
+            histogram = self.sections[name] = RollingHistogram(self.window)
+        histogram.add(ms)
+
+    @contextmanager
+    def measure(self, name):
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.add(name, self.clock() - start)
+
+    def wrap(self, name, function):
+        """返回计时版本的 function"""
+        def timed(*args, **kwargs):
+            start = self.clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.add(name, self.clock() - start)
+        return timed
+
+    def begin_frame(self):
+        self._current = {}
+        self._frame_start = self.clock()
+
+    def end_frame(self):
+        """结束一帧：更新各阶段的直方图并写入轨迹"""
+        if self._frame_start is not None:
+            self._current['frame'] = (self.clock() - self._frame_start) * 1000.0
+        record = {'frame_index': self.frames, 'time': (self.clock() - self._origin) * 1000.0}
+        for name, ms in self._current.items():
+            histogram = self.sections.get(name)
+            if histogram is None:
+                histogram = self.sections[name] = RollingHistogram(self.window)
+            histogram.add(ms)
+            record[name] = ms
+        self.trace.append(record)
+        self.frames += 1
+        self._current = {}
+        self._frame_start = None
+
+    def summary(self):
+        """各阶段的滚动统计（毫秒）"""
+        return {name: histogram.summary() for name, histogram in self.sections.items()}
+
+    def dump(self, path):
+        """导出轨迹：.csv 每帧一行，其他扩展名写JSON（汇总 + 每帧记录）"""
+        if path.endswith(".csv"):
+            columns = ['frame_index', 'time'] + list(self.sections)
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, columns, restval="")
+                writer.writeheader()
+                writer.writerows(self.trace)
+        else:
+            with open(path, "w") as f:
+                json.dump({'summary': self.summary(), 'frames': list(self.trace)}, f)
+
+
+class StartupTimer:
+    """启动过程的分阶段计时
+
+    start 是计时起点（例如启动脚本最开始记下的 perf_counter），mark(name) 记录
+    从上一个标记到现在的耗时，各阶段之和就是从起点到最后一个标记的总时间。
+    """
+
+    def __init__(self, start=None, clock=time.perf_counter):
+        self.clock = clock
+        self.start = clock() if start is None else start
+        self.phases = {}  # 阶段名 -> 毫秒，按发生的顺序
+        self._last = self.start
+
+    def mark(self, name):
+        now = self.clock()
+        self.phases[name] = self.phases.get(name, 0.0) + (now - self._last) * 1000.0
+        self._last = now
+
+    def total(self):
+        """从起点到最后一个标记的毫秒数"""
+        return (self._last - self.start) * 1000.0
+
+    def format(self):
+        lines = ["启动耗时（毫秒）:"]
+        lines.extend(f"  {name:<12} {ms:8.1f}" for name, ms in self.phases.items())
+        lines.append(f"  {'total':<12} {self.total():8.1f}")
+        return "\n".join(lines)
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+俄罗斯方块多人服务器
+在一个进程里用asyncio托管很多局 TetrisGame，每个连接一局，每局有自己的定时器；
+一个 tick 内收到的输入先排队，tick 到时一起执行，再把状态合并成一行发出
+用法: python3 tetris_server.py --port 7777
+      python3 tetris_server.py --unix /tmp/tetris.sock
+
+协议（文本，每条消息一行）
+  客户端 -> 服务器:
+    <序号> <命令>    命令为 left right down rotate drop restart；序号是客户端自增的整数
+    stats            查询服务器统计
+    games            列出正在进行的对局编号
+    watch <编号>     结束自己的对局，改为观战该局（之后只收二进制的观战消息）
+    quit             断开连接
+  服务器 -> 客户端:
+    S <tick> <ack> <score> <lines> <level> <playing|over> <形状> <旋转> <x> <y> <行掩码>
+        每个 tick 最多一行，只在状态变化时发送；ack 是已经执行的最大输入序号，
+        行掩码是每行占用位的十六进制，用逗号分隔
+    STATS <局数> <tick/秒> <延迟p50毫秒> <延迟p99毫秒>
+        tick/秒 是自上次查询以来所有对局的合计；延迟是 tick 比预定时间晚了多少
+    GAMES <编号> ...
+    WATCH <编号>
+        之后的数据是带 u32 长度前缀的观战消息（格式见 tetris_spectate），
+        对局结束时连接关闭
+    ERR <说明>
+"""
+
+import argparse
+import asyncio
+import itertools
+import time
+
+from tetris_core import TetrisGame
+from tetris_perf import RollingHistogram
+from tetris_spectate import SpectatorBroadcaster, write_message
+
+TICK_RATE = 60
+# 客户端接收太慢、发送缓冲超过这个字节数时跳过状态更新（下一次变化时会发送最新状态）
+MAX_WRITE_BUFFER = 64 * 1024
+# 落后超过这么多个 tick 时丢弃积压，不再补跑
+MAX_CATCH_UP = 5
+
+
+class GameSession:
+    """一个连接对应的一局游戏"""
+
+    def __init__(self, seed, writer, id=0):
+        self.id = id
+        self.seed = seed
+        self.writer = writer
+        self.game = TetrisGame(seed=seed)
+        self.state = "playing"
+        self.tick = 0
+        self.ack = 0
+        self.inputs = []      # 本 tick 内收到的 (序号, 命令)
+        self.last_sent = None
+        self.closed = False
+        self.spectators = None  # 第一个观众加入时创建的 SpectatorBroadcaster
+
+    def apply(self, command):
+        """执行一条输入"""
+        game = self.game
+        if command == "restart":
+            self.game = TetrisGame(seed=self.seed)
+            self.state = "playing"
+            return
+        if self.state != "playing":
+            return
+        if command == "left":
+            game.move_piece(-1, 0)
+        elif command == "right":
+            game.move_piece(1, 0)
+        elif command == "down":
+            if game.move_piece(0, 1):
+                game.score += 1
+        elif command == "rotate":
+            game.rotate_piece()
+        elif command == "drop":
+            if not game.hard_drop():
+                self.state = "over"
+
+    def step(self, ticks, tick_ms):
+        """执行排队的输入，再推进 ticks 个逻辑步"""
+        for seq, command in self.inputs:
+            self.apply(command)
+            self.ack = max(self.ack, seq)
+        self.inputs.clear()
+        for _ in range(ticks):
+            if self.state == "playing" and not self.game.update(tick_ms):
+                self.state = "over"
+        self.tick += ticks
+
+    def status_line(self):
+        """当前状态的一行消息；与上次发送的相同时返回 None"""
+        game = self.game
+        piece = game.current_piece
+        key = (self.ack, self.state, game.score, game.grid.version,
+               piece.shape_index, piece.rotation, piece.x, piece.y)
+        if key == self.last_sent:
+            return None
+        self.last_sent = key
+        rows = ",".join(format(mask, "x") for mask in game.grid.rows)
+        return (f"S {self.tick} {self.ack} {game.score} {game.lines_cleared} {game.level} "
+                f"{self.state} {piece.shape_index} {piece.rotation} {piece.x} {piece.y} {rows}\n")
+
+
+class TetrisServer:
+    """托管所有对局的服务器"""
+
+    COMMANDS = {"left", "right", "down", "rotate", "drop", "restart"}
+
+    def __init__(self, tick_rate=TICK_RATE, seed=0):
+        self.tick_rate = tick_rate
+        self.tick_ms = 1000.0 / tick_rate
+        self.sessions = set()
+        self.games = {}  # 编号 -> GameSession
+        self.ticks = 0
+        self.lag = RollingHistogram(window=10000)
+        self.skipped_updates = 0
+        self._handlers = set()
+        self._seeds = itertools.count(seed)
+        self._ids = itertools.count(1)
+        self._rate_mark = (time.perf_counter(), 0)
+
+    def stats(self):
+        """(局数, 自上次调用以来的 tick/秒, 延迟p50, 延迟p99)"""
+        now = time.perf_counter()
+        since, ticks = self._rate_mark
+        self._rate_mark = (now, self.ticks)
+        rate = (self.ticks - ticks) / (now - since) if now > since else 0.0
+        return len(self.sessions), rate, self.lag.percentile(50), self.lag.percentile(99)
+
+    async def handle_client(self, reader, writer):
+        session = GameSession(next(self._seeds), writer, next(self._ids))
+        self.sessions.add(session)
+        self.games[session.id] = session
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        ticker = asyncio.create_task(self._run_session(session))
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # 一行超过了 StreamReader 的长度限制，无法再按行解析：结束这个连接
+                    writer.write(b"ERR line too long\n")
+                    break
+                if not line:
+                    break
+                parts = line.split()
+                if not parts:
+                    continue
+                if parts[0] == b"quit":
+                    break
+                if parts[0] == b"stats":
+                    games, rate, p50, p99 = self.stats()
+                    writer.write(f"STATS {games} {rate:.1f} {p50:.3f} {p99:.3f}\n".encode())
+                    continue
+                if parts[0] == b"games":
+                    writer.write(("GAMES " + " ".join(map(str, sorted(self.games))) + "\n").encode())
+                    continue
+                if parts[0] == b"watch":
+                    target = self.games.get(int(parts[1])) if len(parts) > 1 and parts[1].isdigit() else None
+                    if target is None or target is session:
+                        writer.write(b"ERR no such game\n")
+                        continue
+                    # 这个连接不再玩自己的一局
+                    self._end_session(session, ticker)
+                    writer.write(f"WATCH {target.id}\n".encode())
+                    await self._stream(target, reader, writer)
+                    break
+                try:
+                    seq, command = int(parts[0]), parts[1].decode()
+                except (ValueError, IndexError, UnicodeDecodeError):
+                    writer.write(b"ERR bad message\n")
+                    continue
+                if command not in self.COMMANDS:
+                    writer.write(f"ERR unknown command {command}\n".encode())
+                    continue
+                session.inputs.append((seq, command))
+        except ConnectionError:
+            pass
+        finally:
+            self._end_session(session, ticker)
+            self._handlers.discard(handler)
+            writer.close()
+
+    def _end_session(self, session, ticker):
+        session.closed = True
+        ticker.cancel()
+        self.sessions.discard(session)
+        self.games.pop(session.id, None)
+        if session.spectators is not None:
+            session.spectators.close()
+            session.spectators = None
+
+    async def _stream(self, session, reader, writer):
+        """把一局的观战消息发给这个连接，直到对局结束或连接断开"""
+        if session.spectators is None:
+            session.spectators = SpectatorBroadcaster()
+        broadcaster = session.spectators
+        subscriber = broadcaster.subscribe()
+        # 对局已经结束时不会再有消息要写，只能靠读到 EOF 发现观众断开
+        watcher = asyncio.create_task(self._wait_eof(reader, broadcaster, subscriber))
+        try:
+            while True:
+                message = await subscriber.get()
+                if message is None:
+                    break
+                write_message(writer, message)
+                # 积压的消息合并成一次写入
+                while not subscriber.queue.empty():
+                    message = subscriber.queue.get_nowait()
+                    if message is None:
+                        return
+                    write_message(writer, message)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            watcher.cancel()
+            broadcaster.unsubscribe(subscriber)
+
+    @staticmethod
+    async def _wait_eof(reader, broadcaster, subscriber):
+        """忽略观众发来的数据；连接断开时结束它的订阅"""
+        try:
+            while await reader.read(4096):
+                pass
+        except ConnectionError:
+            pass
+        broadcaster.unsubscribe(subscriber)
+        subscriber.close()
+
+    async def _run_session(self, session):
+        """这一局的定时器：按绝对时间排期，落后时补跑逻辑步但只发一次状态"""
+        loop = asyncio.get_running_loop()
+        interval = 1.0 / self.tick_rate
+        deadline = loop.time()
+        while not session.closed:
+            deadline += interval
+            delay = deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            late = loop.time() - deadline
+            self.lag.add(late * 1000.0)
+            ticks = 1 + int(late / interval)
+            if ticks > MAX_CATCH_UP:
+                ticks = MAX_CATCH_UP
+                deadline = loop.time()
+            else:
+                deadline += (ticks - 1) * interval
+            session.step(ticks, self.tick_ms)
+            self.ticks += ticks
+            if session.spectators is not None:
+                session.spectators.publish(session.game, session.tick)
+            line = session.status_line()
+            if line is None:
+                continue
+            transport = session.writer.transport
+            if transport.is_closing():
+                break
+            if transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+                # 客户端跟不上：丢掉这次更新，下次发送最新状态
+                session.last_sent = None
+                self.skipped_updates += 1
+                continue
+            session.writer.write(line.encode())
+
+    async def close(self):
+        """断开所有连接，等待各连接的处理函数正常结束"""
+        for session in list(self.sessions):
+            session.writer.close()
+        if self._handlers:
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    async def start(self, host="127.0.0.1", port=7777, unix_path=None):
+        """开始监听，返回 asyncio 的 Server 对象"""
+        if unix_path is not None:
+            return await asyncio.start_unix_server(self.handle_client, unix_path)
+        return await asyncio.start_server(self.handle_client, host, port)
+
+
+async def _serve(args):
+    server = TetrisServer(args.tick_rate, args.seed)
+    listener = await server.start(args.host, args.port, args.unix)
+    where = args.unix or f"{args.host}:{args.port}"
+    print(f"服务器已启动: {where}，每局 {args.tick_rate} tick/秒")
+    async with listener:
+        while True:
+            await asyncio.sleep(args.report)
+            games, rate, p50, p99 = server.stats()
+            print(f"对局 {games}  {rate:,.0f} tick/秒  延迟 p50 {p50:.2f} ms  p99 {p99:.2f} ms  "
+                  f"跳过的更新 {server.skipped_updates}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="在一个进程中托管多局俄罗斯方块")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--unix", help="监听Unix套接字而不是TCP")
+    parser.add_argument("--tick-rate", type=int, default=TICK_RATE, help="每局每秒的逻辑步数")
+    parser.add_argument("--seed", type=int, default=0, help="第一局的种子，之后依次加一")
+    parser.add_argument("--report", type=float, default=5.0, help="打印统计的间隔（秒）")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
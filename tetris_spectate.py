@@ -0,0 +1,292 @@
+"""
+观战数据流
+把一局正在进行的 TetrisGame 编码成紧凑的二进制消息：先发一个关键帧，之后每个 tick
+只发变化的部分（方块位置和旋转、锁定的格子、移除的行、得分和等级、下一个方块）；
+SpectatorBroadcaster 用asyncio把同一条消息分发给所有观众，跟不上的观众丢帧，
+下一个 tick 从关键帧重新开始
+
+消息格式（全部小端；传输时每条消息前加 u32 长度，见 write_message / read_message）
+  关键帧  b"K" tick:u32 width:u16 height:u32 score:u32 lines:u32 level:u16
+          shape:u8 rotation:u8 x:i16 y:i32 next:u8 palette_size:u8 stored_rows:u32
+          调色板 RGB × palette_size，最高方块以下各行的掩码（每行 (width+7)//8 字节），
+          这些行的颜色下标（每行 width 字节）
+  增量    b"D" tick:u32 flags:u8，之后按标志位顺序排列：
+          PIECE  shape:u8 rotation:u8 x:i16 y:i32
+          LOCK   count:u8 r:u8 g:u8 b:u8 (x:u16 y:u32) × count    place_piece 锁定的格子
+          CLEAR  count:u8 y:u32 × count                           clear_lines 移除的行（从上到下）
+          STATS  score:u32 lines:u32 level:u16
+          NEXT   shape:u8
+"""
+
+import asyncio
+import struct
+
+from tetris_core import SHAPE_COLORS, Board, BoardSnapshot
+
+KEYFRAME = b"K"
+DELTA = b"D"
+
+PIECE = 1
+LOCK = 2
+CLEAR = 4
+STATS = 8
+NEXT = 16
+
+_KEYFRAME_HEADER = struct.Struct("<cIHIIIHBBhiBBI")
+_DELTA_HEADER = struct.Struct("<cIB")
+_PIECE = struct.Struct("<BBhi")
+_LOCK_HEADER = struct.Struct("<B3B")
+_CELL = struct.Struct("<HI")
+_ROW = struct.Struct("<I")
+_STATS = struct.Struct("<IIH")
+_LENGTH = struct.Struct("<I")
+
+
+def encode_keyframe(game, tick):
+    """当前状态的关键帧"""
+    board = game.grid.snapshot()
+    piece = game.current_piece
+    width = board.width
+    stored = len(board.colors) // width
+    row_bytes = (width + 7) // 8
+    return b"".join([
+        _KEYFRAME_HEADER.pack(KEYFRAME, tick, width, board.height, game.score, game.lines_cleared,
+                              game.level, piece.shape_index, piece.rotation, piece.x, piece.y,
+                              game.next_piece.shape_index, len(board.palette), stored),
+        bytes(channel for color in board.palette for channel in color),
+        b"".join(mask.to_bytes(row_bytes, "little") for mask in board.rows[board.height - stored:]),
+        board.colors,
+    ])
+
+
+class SpectatorEncoder:
+    """为一局游戏逐 tick 生成增量消息
+
+    编码器保存一份观众看到的棋盘，每次锁定和消行都在上面重放一遍；棋盘版本或哈希
+    与重放的结果不一致时（例如一个 tick 内放置了多个方块、棋盘被直接修改、
+    换了一局）改发关键帧，观众的状态始终与游戏一致。
+    """
+
+    def __init__(self):
+        self.game = None
+        self.mirror = None
+        self.keyframes = 0
+        self.deltas = 0
+
+    def keyframe(self, game, tick):
+        """生成关键帧，并以当前状态作为之后增量的基准"""
+        self._sync(game)
+        self.keyframes += 1
+        return encode_keyframe(game, tick)
+
+    def _sync(self, game):
+        piece = game.current_piece
+        self.game = game
+        self.mirror = game.grid.copy()
+        self.version = game.grid.version
+        self.placements = game.placements
+        self.piece = (piece.shape_index, piece.rotation, piece.x, piece.y)
+        self.stats = (game.score, game.lines_cleared, game.level)
+        self.next_shape = game.next_piece.shape_index
+
+    def encode(self, game, tick):
+        """与上一次相比的增量消息；需要时返回关键帧，没有变化时返回 None"""
+        if game is not self.game:
+            return self.keyframe(game, tick)
+        parts = []
+        flags = 0
+        piece = game.current_piece
+        key = (piece.shape_index, piece.rotation, piece.x, piece.y)
+        if key != self.piece:
+            flags |= PIECE
+            parts.append(_PIECE.pack(*key))
+
+        placed = game.placements - self.placements
+        if placed == 1:
+            color = SHAPE_COLORS[self.piece[0]]
+            cells = game.last_placed
+            flags |= LOCK
+            parts.append(_LOCK_HEADER.pack(len(cells), *color))
+            parts.extend(_CELL.pack(x, y) for x, y in cells)
+            self.mirror.lock(cells, color)
+            if game.last_cleared:
+                flags |= CLEAR
+                parts.append(bytes((len(game.last_cleared),)))
+                parts.extend(_ROW.pack(y) for y in game.last_cleared)
+                self.mirror.remove_rows(game.last_cleared)
+        # 一次放置让棋盘版本加一（锁定），有消行时再加一；其他任何修改都发关键帧
+        expected = self.version + (1 + bool(game.last_cleared) if placed == 1 else 0)
+        if placed not in (0, 1) or game.grid.version != expected or self.mirror.hash != game.grid.hash:
+            return self.keyframe(game, tick)
+
+        stats = (game.score, game.lines_cleared, game.level)
+        if stats != self.stats:
+            flags |= STATS
+            parts.append(_STATS.pack(*stats))
+        if game.next_piece.shape_index != self.next_shape:
+            flags |= NEXT
+            parts.append(bytes((game.next_piece.shape_index,)))
+
+        self.version = game.grid.version
+        self.placements = game.placements
+        self.piece = key
+        self.stats = stats
+        self.next_shape = game.next_piece.shape_index
+        if not flags:
+            return None
+        self.deltas += 1
+        return _DELTA_HEADER.pack(DELTA, tick, flags) + b"".join(parts)
+
+
+class SpectatorView:
+    """观众一侧：按收到的消息重建棋盘、当前方块和计数"""
+
+    def __init__(self):
+        self.board = None
+        self.tick = 0
+        self.piece = None       # (形状, 旋转, x, y)
+        self.next_shape = None
+        self.score = self.lines_cleared = 0
+        self.level = 1
+
+    def apply(self, message):
+        """应用一条消息，返回它的 tick；第一条必须是关键帧"""
+        kind = message[:1]
+        if kind == KEYFRAME:
+            return self._apply_keyframe(message)
+        if kind != DELTA:
+            raise ValueError("未知的观战消息")
+        if self.board is None:
+            raise ValueError("还没有收到关键帧")
+        _, self.tick, flags = _DELTA_HEADER.unpack_from(message)
+        offset = _DELTA_HEADER.size
+        if flags & PIECE:
+            self.piece = _PIECE.unpack_from(message, offset)
+            offset += _PIECE.size
+        if flags & LOCK:
+            count, *color = _LOCK_HEADER.unpack_from(message, offset)
+            offset += _LOCK_HEADER.size
+            cells = [_CELL.unpack_from(message, offset + i * _CELL.size) for i in range(count)]
+            offset += count * _CELL.size
+            self.board.lock(cells, tuple(color))
+        if flags & CLEAR:
+            count = message[offset]
+            offset += 1
+            rows = [_ROW.unpack_from(message, offset + i * _ROW.size)[0] for i in range(count)]
+            offset += count * _ROW.size
+            self.board.remove_rows(rows)
+        if flags & STATS:
+            self.score, self.lines_cleared, self.level = _STATS.unpack_from(message, offset)
+            offset += _STATS.size
+        if flags & NEXT:
+            self.next_shape = message[offset]
+        return self.tick
+
+    def _apply_keyframe(self, message):
+        (_, self.tick, width, height, self.score, self.lines_cleared, self.level, shape, rotation,
+         x, y, self.next_shape, palette_size, stored) = _KEYFRAME_HEADER.unpack_from(message)
+        self.piece = (shape, rotation, x, y)
+        offset = _KEYFRAME_HEADER.size
+        palette = tuple(tuple(message[offset + i:offset + i + 3]) for i in range(0, palette_size * 3, 3))
+        offset += palette_size * 3
+        row_bytes = (width + 7) // 8
+        rows = (0,) * (height - stored) + tuple(
+            int.from_bytes(message[offset + i * row_bytes:offset + (i + 1) * row_bytes], "little")
+            for i in range(stored))
+        offset += stored * row_bytes
+        colors = bytes(message[offset:offset + stored * width])
+        self.board = Board.from_snapshot(BoardSnapshot(width, height, rows, colors, palette, None, None))
+        return self.tick
+
+
+class Subscriber:
+    """一个观众的发送队列；stale 为真时下一条消息是关键帧"""
+
+    def __init__(self, max_queue):
+        self.queue = asyncio.Queue(max_queue)
+        self.stale = True
+        self.dropped = 0
+        self.closed = False
+
+    async def get(self):
+        """下一条消息，广播结束时返回 None"""
+        return await self.queue.get()
+
+    def _drop(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.stale = True
+        self.dropped += 1
+
+    def close(self):
+        """结束这个观众的订阅：丢掉积压的消息，get 返回 None"""
+        if self.closed:
+            return
+        self.closed = True
+        self._drop()
+        self.queue.put_nowait(None)
+
+
+class SpectatorBroadcaster:
+    """把一局的观战消息分发给所有观众
+
+    每个 tick 只编码一次；队列满了的观众丢掉积压的消息，下一个 tick 改收关键帧，
+    不会拖慢游戏或其他观众。新加入的观众也从关键帧开始。
+    """
+
+    def __init__(self, max_queue=64):
+        self.max_queue = max_queue
+        self.encoder = SpectatorEncoder()
+        self.subscribers = set()
+        self.bytes_sent = 0
+        self.dropped = 0
+
+    def subscribe(self):
+        subscriber = Subscriber(self.max_queue)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+
+    def publish(self, game, tick):
+        """游戏推进了一个 tick 之后调用"""
+        if not self.subscribers:
+            return
+        delta = keyframe = None
+        if any(not subscriber.stale for subscriber in self.subscribers):
+            delta = self.encoder.encode(game, tick)
+        if any(subscriber.stale for subscriber in self.subscribers):
+            keyframe = self.encoder.keyframe(game, tick)
+        for subscriber in self.subscribers:
+            message = keyframe if subscriber.stale else delta
+            if message is None:
+                continue
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                subscriber._drop()
+                self.dropped += 1
+                continue
+            subscriber.stale = False
+            self.bytes_sent += len(message)
+
+    def close(self):
+        """结束广播：每个观众收到 None"""
+        for subscriber in self.subscribers:
+            subscriber.close()
+        self.subscribers.clear()
+
+
+def write_message(writer, message):
+    """按长度前缀写一条消息"""
+    writer.write(_LENGTH.pack(len(message)) + message)
+
+
+async def read_message(reader):
+    """读一条带长度前缀的消息，连接关闭时返回 None"""
+    try:
+        header = await reader.readexactly(_LENGTH.size)
+        return await reader.readexactly(_LENGTH.unpack(header)[0])
+    except asyncio.IncompleteReadError:
+        return None